@@ -0,0 +1,211 @@
+import asyncio
+import codecs
+import functools
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import tracer
+
+
+class AsyncTask:
+    """Handle to a coroutine running on an AsyncCore, usable from any thread"""
+
+    def __init__(self, future, name=None):
+        self.future = future
+        self.name = name
+
+    def cancel(self):
+        """Cancel the coroutine; a running git process is killed"""
+        return self.future.cancel()
+
+    # CommandJob.attach() expects something it can kill()
+    kill = cancel
+
+    def done(self):
+        return self.future.done()
+
+    def cancelled(self):
+        return self.future.cancelled()
+
+
+class AsyncCore:
+    """One asyncio event loop on a dedicated thread, bridged to Tk.
+
+    Git commands run as asyncio subprocesses (``git()``) and blocking HTTP
+    calls in a small fixed thread pool (``http()``); at most
+    ``max_processes`` git processes run at once, anything beyond that waits as
+    a coroutine, so thousands of pending operations cost coroutines rather
+    than OS threads. ``submit()`` may be called from any thread and returns an
+    AsyncTask that can be cancelled; ``on_done(result, error)`` is delivered on
+    the Tk main thread through the UI bus.
+    """
+
+    def __init__(self, ui_bus=None, max_processes=8, http_workers=4):
+        self.ui_bus = ui_bus
+        self.max_processes = max_processes
+        self.loop = asyncio.new_event_loop()
+        self._http_executor = ThreadPoolExecutor(max_workers=http_workers, thread_name_prefix="async-http")
+        self._process_slots = None
+        self._thread = None
+        self._tasks = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is None:
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,), name="async-core", daemon=True)
+            self._thread.start()
+            ready.wait()
+        return self
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self._process_slots = asyncio.Semaphore(self.max_processes)
+        self.loop.call_soon(ready.set)
+        self.loop.run_forever()
+
+    def submit(self, coro, on_done=None, name=None):
+        """Schedule ``coro`` on the loop; thread-safe"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        task = AsyncTask(future, name)
+        with self._lock:
+            self._tasks.add(task)
+        future.add_done_callback(lambda f: self._finished(task, on_done))
+        return task
+
+    def _finished(self, task, on_done):
+        with self._lock:
+            self._tasks.discard(task)
+        if on_done is None:
+            return
+        if task.future.cancelled():
+            result, error = None, asyncio.CancelledError()
+        else:
+            error = task.future.exception()
+            result = None if error else task.future.result()
+        if self.ui_bus is not None:
+            self.ui_bus.post(on_done, result, error)
+        else:
+            on_done(result, error)
+
+    def pending(self):
+        with self._lock:
+            return len(self._tasks)
+
+    def cancel_all(self):
+        with self._lock:
+            tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        if self._thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._http_executor.shutdown(wait=False)
+
+    # Coroutines
+
+    async def http(self, func, *args, **kwargs):
+        """Run a blocking HTTP call (``requests``/GitHubClient) in the HTTP pool.
+
+        Cancelling returns immediately; the request itself finishes in the
+        background and its result is dropped.
+        """
+        return await self.loop.run_in_executor(self._http_executor, functools.partial(func, *args, **kwargs))
+
+    async def git(self, git_cmd, cwd=None, env=None, input=None, on_output=None, check=False,
+                  frame_interval=0.05, capture=True):
+        """Async counterpart of ``subprocess.run(capture_output=True)``.
+
+        With ``on_output`` the decoded output is also streamed as lists of
+        ``(stream, text)`` chunks, at most once per ``frame_interval``; pass
+        ``capture=False`` as well when nothing needs stdout afterwards, so a
+        long stream is not kept in memory (stderr is always kept).
+        Cancellation kills the process. Returns a CompletedProcess with bytes
+        output; ``check`` raises CalledProcessError like subprocess.run.
+        """
+        async with self._process_slots:
+            span = tracer.start('git', git_cmd, cwd)
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *git_cmd, cwd=cwd, env=env,
+                    stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE
+                )
+            except OSError as e:
+                span.finish(error=e)
+                raise
+            try:
+                if on_output is None:
+                    stdout, stderr = await process.communicate(input)
+                    size = len(stdout)
+                else:
+                    stdout, stderr, size = await self._stream(process, input, on_output, frame_interval, capture)
+                    await process.wait()
+            except asyncio.CancelledError:
+                if process.returncode is None:
+                    process.kill()
+                await process.wait()
+                span.finish(process.returncode, error="cancelled")
+                raise
+            # ``size`` also counts stdout that was streamed but not kept
+            span.finish(process.returncode, size, len(stderr))
+
+        result = subprocess.CompletedProcess(git_cmd, process.returncode, stdout, stderr)
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, git_cmd, stdout,
+                                                stderr.decode('utf-8', errors='replace'))
+        return result
+
+    async def _stream(self, process, input, on_output, frame_interval, capture):
+        collected = {'stdout': [], 'stderr': []}
+        size = 0
+        pending = []
+        flush_handle = None
+
+        def flush():
+            nonlocal flush_handle
+            if flush_handle is not None:
+                flush_handle.cancel()
+                flush_handle = None
+            if pending:
+                chunks = []
+                for name, text in pending:
+                    if chunks and chunks[-1][0] == name:
+                        chunks[-1] = (name, chunks[-1][1] + text)
+                    else:
+                        chunks.append((name, text))
+                pending.clear()
+                on_output(chunks)
+
+        async def pump(name, reader):
+            nonlocal flush_handle, size
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            while True:
+                data = await reader.read(64 * 1024)
+                text = decoder.decode(data, final=not data)
+                if text:
+                    pending.append((name, text))
+                if not data:
+                    return
+                if name == 'stdout':
+                    size += len(data)
+                if capture or name == 'stderr':
+                    collected[name].append(data)
+                # Whatever arrives within one frame goes out in one batch
+                if flush_handle is None:
+                    flush_handle = self.loop.call_later(frame_interval, flush)
+
+        if input is not None:
+            process.stdin.write(input)
+            await process.stdin.drain()
+            process.stdin.close()
+        try:
+            await asyncio.gather(pump('stdout', process.stdout), pump('stderr', process.stderr))
+        finally:
+            flush()
+        return b''.join(collected['stdout']), b''.join(collected['stderr']), size
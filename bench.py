@@ -0,0 +1,338 @@
+"""Headless benchmarks for the git work behind RepoTinker and AdvancedGitGUI.
+
+Generates a synthetic repository (and a local bare remote to push to), times
+the code paths the GUIs run for loading files, status, history, in-process
+and cat-file --batch object reads (against spawning git), editor diffs,
+content search with and without the trigram index, warm starts from the
+metadata cache, commit & push and streamed git commands, and reports
+percentiles as JSON.
+
+    python bench.py --files 20000 --depth 4 --commits 2000 --output bench_output.txt
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from async_core import AsyncCore
+from cat_file import CatFilePool
+from commit_engine import paths_to_stage, stage_paths, commit, push_with_token
+from commit_history import CommitHistory
+from file_index import list_repo_files
+from git_grep import TrigramIndex, grep_repo
+from git_objects import Repository
+from line_diff import DiffSession
+from repo_cache import RepoCache, repo_fingerprint
+from repo_status import RepoStatus
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(samples):
+    values = sorted(samples)
+    summary = {
+        'runs': len(values),
+        'min': values[0],
+        'mean': sum(values) / len(values),
+        'max': values[-1],
+    }
+    for pct in PERCENTILES:
+        summary[f'p{pct}'] = percentile(values, pct)
+    return summary
+
+
+def _git(repo_path, *args, **kwargs):
+    return subprocess.run(['git', *args], cwd=repo_path, check=True, capture_output=True, **kwargs)
+
+
+def file_path(index, depth):
+    """Spread files over ``depth`` levels of 8-way directories"""
+    parts = [f'dir{(index >> (3 * level)) % 8}' for level in range(depth)]
+    return '/'.join(parts + [f'file{index}.txt'])
+
+
+def file_content(index, revision, size):
+    line = f'file {index} revision {revision} '.encode()
+    line = (line * (size // len(line) + 1))[:max(size - 1, 0)] + b'\n'
+    return line
+
+
+def generate_repo(repo_path, files, depth, commits, file_size, changes_per_commit, seed=0):
+    """Build a repository with git fast-import and check it out"""
+    rng = random.Random(seed)
+    os.makedirs(repo_path)
+    _git(repo_path, 'init', '-q', '-b', 'main')
+    _git(repo_path, 'config', 'user.name', 'Bench')
+    _git(repo_path, 'config', 'user.email', 'bench@example.com')
+
+    importer = subprocess.Popen(['git', 'fast-import', '--quiet'], cwd=repo_path, stdin=subprocess.PIPE)
+    out = importer.stdin
+    timestamp = 1_600_000_000
+    for number in range(max(commits, 1)):
+        message = f'Commit {number}'.encode()
+        out.write(b'commit refs/heads/main\n')
+        out.write(b'committer Bench <bench@example.com> %d +0000\n' % (timestamp + number * 60))
+        out.write(b'data %d\n%s\n' % (len(message), message))
+        changed = range(files) if number == 0 else rng.sample(range(files), min(changes_per_commit, files))
+        for index in changed:
+            data = file_content(index, number, file_size)
+            out.write(b'M 100644 inline %s\ndata %d\n%s\n' % (file_path(index, depth).encode(), len(data), data))
+        out.write(b'\n')
+    out.close()
+    if importer.wait() != 0:
+        raise RuntimeError('git fast-import failed')
+    _git(repo_path, 'repack', '-adq')
+    _git(repo_path, 'reset', '-q', '--hard', 'main')
+
+
+def pack_bytes(repo_path):
+    pack_dir = os.path.join(repo_path, '.git', 'objects', 'pack')
+    return sum(os.path.getsize(os.path.join(pack_dir, name)) for name in os.listdir(pack_dir) if name.endswith('.pack'))
+
+
+def touch_files(repo_path, paths, revision):
+    for path in paths:
+        with open(os.path.join(repo_path, path), 'ab') as f:
+            f.write(b'bench edit %d\n' % revision)
+
+
+class Bench:
+    def __init__(self, args, repo_path, remote_path):
+        self.args = args
+        self.repo_path = repo_path
+        self.remote_path = remote_path
+        self.results = {}
+        self.rng = random.Random(1)
+
+    def measure(self, name, work, setup=None):
+        samples = []
+        for run in range(self.args.warmup + self.args.repeat):
+            if setup is not None:
+                setup(run)
+            started = time.perf_counter()
+            work()
+            elapsed = time.perf_counter() - started
+            if run >= self.args.warmup:
+                samples.append(elapsed)
+        self.results[name] = summarize(samples)
+        print(f"{name:32s} p50 {self.results[name]['p50'] * 1000:9.1f} ms", file=sys.stderr)
+
+    def random_paths(self, count):
+        return [file_path(index, self.args.depth) for index in self.rng.sample(range(self.args.files), count)]
+
+    def run(self):
+        repo = self.repo_path
+
+        # RepoTinker.load_files
+        self.measure('load_files', lambda: list_repo_files(repo))
+
+        # RepoTinker.update_repo_status: full scan, then one saved path
+        self.measure('update_repo_status.full', lambda: RepoStatus(repo).refresh())
+        status = RepoStatus(repo).refresh()
+        edited = self.random_paths(1)
+        self.measure('update_repo_status.path',
+                     lambda: status.refresh_paths(edited),
+                     setup=lambda run: touch_files(repo, edited, run))
+        _git(repo, 'checkout', '-q', '--', *edited)
+
+        # RepoTinker.update_commit_history: cold first page, cached HEAD, next page
+        def cold_history():
+            CommitHistory._cache.clear()
+            CommitHistory(repo, page_size=self.args.page_size).sync()
+        self.measure('update_commit_history.cold', cold_history)
+        self.measure('update_commit_history.cached',
+                     lambda: CommitHistory(repo, page_size=self.args.page_size).sync())
+        histories = []
+
+        def first_page(run):
+            CommitHistory._cache.clear()
+            histories[:] = [CommitHistory(repo, page_size=self.args.page_size)]
+            histories[0].sync()
+        self.measure('update_commit_history.load_more', lambda: histories[0].load_more(), setup=first_page)
+
+        # Read paths: in-process object reader against one git process per read
+        self.measure('read_head_commit.subprocess', lambda: _git(repo, 'cat-file', 'commit', 'HEAD'))
+        self.measure('read_head_commit.in_process', lambda: Repository(repo).commit('HEAD'))
+        reader = Repository(repo)
+        blob_paths = []
+        self.measure('read_blob_at_head.subprocess', lambda: _git(repo, 'show', f'HEAD:{blob_paths[0]}'),
+                     setup=lambda run: blob_paths.__setitem__(slice(None), self.random_paths(1)))
+        self.measure('read_blob_at_head.in_process', lambda: reader.blob_at('HEAD', blob_paths[0]),
+                     setup=lambda run: blob_paths.__setitem__(slice(None), self.random_paths(1)))
+        self.measure('list_refs.subprocess', lambda: _git(repo, 'for-each-ref', '--format=%(refname) %(objectname)'))
+        self.measure('list_refs.in_process', lambda: reader.refs())
+        self.measure('walk_history.subprocess', lambda: _git(repo, 'log', '--format=%H %an %at %s',
+                                                             '-n', str(self.args.page_size)))
+        self.measure('walk_history.in_process', lambda: list(reader.walk('HEAD', self.args.page_size)))
+        reader.close()
+
+        # Bulk object reads: one git process per object against a cat-file --batch pool
+        object_revs = []
+
+        def pick_objects(run):
+            object_revs[:] = [f'HEAD:{path}' for path in self.random_paths(min(self.args.objects, self.args.files))]
+
+        def spawn_per_object():
+            for rev in object_revs:
+                _git(repo, 'cat-file', '-p', rev)
+        self.measure('read_objects.spawn_per_object', spawn_per_object, setup=pick_objects)
+        pool = CatFilePool(repo)
+        self.measure('read_objects.cat_file_pool', lambda: list(pool.read_many(object_revs)), setup=pick_objects)
+        pool.close()
+
+        # Diff window: whole buffer against its base, then the re-diff after one edited line
+        base_lines = [file_content(index, 0, 60).decode().rstrip('\n') for index in range(self.args.diff_lines)]
+        edited_lines = list(base_lines)
+        for index in range(0, len(edited_lines), 1000):
+            edited_lines[index] += ' edited'
+        base_text = '\n'.join(base_lines)
+        buffers = []
+
+        def new_session(run):
+            buffers[:] = [DiffSession(base_text), '\n'.join(edited_lines)]
+        self.measure('diff_view.full', lambda: buffers[0].diff(buffers[1]), setup=new_session)
+
+        def type_one_line(run):
+            edited_lines[self.rng.randrange(len(edited_lines))] += 'x'
+            buffers[1] = '\n'.join(edited_lines)
+        buffers[0].diff(buffers[1])
+        self.measure('diff_view.keystroke', lambda: buffers[0].diff(buffers[1]), setup=type_one_line)
+
+        # Search window: git grep over the whole tree, then only over the files the index names
+        queries = []
+
+        def pick_query(run):
+            queries[:] = [f'file {self.rng.randrange(self.args.files)} revision']
+        self.measure('search.git_grep', lambda: grep_repo(repo, queries[0]), setup=pick_query)
+        index = TrigramIndex(repo)
+        self.measure('search.index_build', index.build)
+        self.measure('search.indexed', lambda: grep_repo(repo, queries[0], paths=index.candidates(queries[0])),
+                     setup=pick_query)
+
+        # RepoTinker.load_files on reopen: file list, status and history from the metadata cache
+        cache_dir = tempfile.mkdtemp(prefix='repo-bench-cache-')
+        try:
+            cache = RepoCache(os.path.join(cache_dir, 'metadata.sqlite3'))
+            fingerprint = repo_fingerprint(repo)
+            files = []
+            list_repo_files(repo, on_batch=files.extend)
+            snapshot = RepoStatus(repo).refresh()
+            history = CommitHistory(repo, page_size=self.args.page_size)
+            history.sync()
+            cache.save_files(repo, fingerprint, files)
+            cache.save_status(repo, fingerprint, snapshot.files, snapshot.branch)
+            cache.save_history(repo, history.head_oid, history.pages)
+            cache.flush()
+            self.measure('warm_start.cache_load', lambda: cache.load(repo))
+            cache.close()
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+        # RepoTinker.commit_push against the local bare remote
+        status = RepoStatus(repo).refresh()
+
+        def prepare_commit(run):
+            touch_files(repo, self.random_paths(self.args.changed), run)
+            status.refresh()
+
+        def commit_and_push():
+            stage_paths(repo, paths_to_stage(status.files))
+            commit(repo, 'Bench commit')
+            push_with_token(repo, 'unused', push_url=self.remote_path)
+        self.measure('commit_push', commit_and_push, setup=prepare_commit)
+
+        # AdvancedGitGUI.run_git_command: AsyncCore.git streaming output, discarded
+        core = AsyncCore().start()
+        sink = lambda chunks: None
+
+        def stream(git_cmd):
+            core.submit(core.git(git_cmd, cwd=repo, on_output=sink, capture=False)).future.result()
+        try:
+            self.measure('run_git_command.status', lambda: stream(['git', 'status']))
+            self.measure('run_git_command.log',
+                         lambda: stream(['git', 'log', '--stat', '-n', str(self.args.log_count)]))
+        finally:
+            core.shutdown()
+        return self.results
+
+
+def git_version():
+    return subprocess.run(['git', 'version'], capture_output=True, text=True).stdout.strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the git hot paths of both GUIs on a synthetic repository.")
+    parser.add_argument('--files', type=int, default=5000, help="Files in the synthetic repo")
+    parser.add_argument('--depth', type=int, default=3, help="Directory levels files are spread over")
+    parser.add_argument('--commits', type=int, default=500, help="Commits of history")
+    parser.add_argument('--file-size', type=int, default=512, help="Bytes per file")
+    parser.add_argument('--changes-per-commit', type=int, default=5, help="Files modified by each generated commit")
+    parser.add_argument('--changed', type=int, default=10, help="Files modified before each commit & push")
+    parser.add_argument('--page-size', type=int, default=100, help="Commit history page size")
+    parser.add_argument('--objects', type=int, default=200, help="Blobs read by the bulk object benchmarks")
+    parser.add_argument('--diff-lines', type=int, default=100000, help="Lines of the buffer diffed by the diff benchmarks")
+    parser.add_argument('--log-count', type=int, default=200, help="Commits shown by the streamed git log")
+    parser.add_argument('--repeat', type=int, default=10, help="Timed runs per benchmark")
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed runs per benchmark")
+    parser.add_argument('--workdir', help="Where to create the repos (default: a temporary directory)")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated repos")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='repo-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    repo_path = os.path.join(workdir, 'repo')
+    remote_path = os.path.join(workdir, 'remote.git')
+    try:
+        started = time.perf_counter()
+        generate_repo(repo_path, args.files, args.depth, args.commits, args.file_size, args.changes_per_commit)
+        _git(workdir, 'clone', '-q', '--bare', repo_path, remote_path)
+        _git(repo_path, 'remote', 'add', 'origin', remote_path)
+        generate_seconds = time.perf_counter() - started
+
+        report = {
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'workdir', 'keep')},
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'git': git_version(),
+            },
+            'repo': {
+                'generate_seconds': generate_seconds,
+                'pack_bytes': pack_bytes(repo_path),
+            },
+            'unit': 'seconds',
+            'benchmarks': Bench(args, repo_path, remote_path).run(),
+        }
+    finally:
+        if not args.keep:
+            # Only remove what was created here
+            for path in ([workdir] if args.workdir is None else [repo_path, remote_path]):
+                shutil.rmtree(path, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
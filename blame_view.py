@@ -0,0 +1,228 @@
+import asyncio
+import os
+import subprocess
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from cat_file import ObjectMissing, pool_for
+from commit_history import find_toplevel
+from git_blame import BlameResult, IncrementalBlameParser, split_blob_lines, worktree_blob_oid
+
+
+def gutter_label(commit, line_number):
+    if commit is None:
+        return f"{'':38} {line_number:>6}"
+    if not commit.committed:
+        return f"{'':8} {'Not Committed Yet':<17.17} {'':10} {line_number:>6}"
+    date = time.strftime('%Y-%m-%d', time.localtime(commit.author_time))
+    return f"{commit.oid[:8]} {commit.author:<17.17} {date} {line_number:>6}"
+
+
+def merge_ranges(ranges):
+    """Sort ``(start, end)`` ranges and join touching ones"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class BlameWindow:
+    """``git blame --incremental`` of one file, annotated as git reports it.
+
+    The file's lines are shown at once (read through the cat-file pool for a
+    revision, from disk for the working tree) with an empty gutter that fills
+    in as blame entries stream in; git reports commit metadata once and the
+    parser reuses it for every later entry of that commit. Finished results
+    go into ``cache`` under the file's blob id and the commit it was blamed
+    at, so re-opening an unchanged file is instant. Click a gutter line for
+    that commit's details.
+    """
+
+    def __init__(self, master, core, ui_bus, cache, repo_path, path, rev="", options=(), env=None):
+        self.core = core
+        self.ui_bus = ui_bus
+        self.cache = cache
+        self.repo_path = repo_path
+        # Git runs from the top of the tree, where object names resolve paths
+        self.toplevel = find_toplevel(repo_path) or repo_path
+        self.path = os.path.relpath(os.path.join(repo_path, path), self.toplevel).replace(os.sep, '/')
+        self.rev = rev
+        self.options = list(options)
+        self.env = env
+        self.result = None
+
+        self.window = tk.Toplevel(master)
+        self.window.title(f"Blame: {self.path}" + (f" at {rev}" if rev else ""))
+        self.window.geometry("1100x650")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.status = tk.StringVar(value="Loading...")
+        self.details = tk.StringVar()
+        ttk.Label(self.window, textvariable=self.status, padding=(5, 5, 5, 0)).pack(anchor="w")
+        ttk.Label(self.window, textvariable=self.details, padding=(5, 0, 5, 5)).pack(anchor="w")
+
+        frame = ttk.Frame(self.window)
+        frame.pack(fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self._yview)
+        self.scrollbar.pack(side="right", fill="y")
+        options = dict(wrap="none", font=("Courier", 10), state="disabled")
+        self.gutter = tk.Text(frame, width=45, bg="#e8e8e8", cursor="hand2", **options)
+        self.content = tk.Text(frame, **options)
+        self.gutter.configure(yscrollcommand=lambda first, last: self._scrolled(self.content, first, last))
+        self.content.configure(yscrollcommand=lambda first, last: self._scrolled(self.gutter, first, last))
+        self.gutter.pack(side="left", fill="y")
+        self.content.pack(side="left", fill="both", expand=True)
+        self.gutter.tag_configure('selected', background="#ffe082")
+        self.content.tag_configure('selected', background="#fff8e1")
+        self.gutter.bind("<Button-1>", self.select_line)
+
+        self.task = core.submit(self._blame(), on_done=self._finished, name=f"blame {self.path}")
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def lift(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def close(self):
+        self.task.cancel()
+        self.window.destroy()
+
+    # Async core
+
+    async def _blame(self):
+        pool = pool_for(self.toplevel)
+        if self.rev:
+            oid, _, data = await asyncio.wrap_future(pool.submit(f"{self.rev}:{self.path}"))
+        else:
+            data = await asyncio.get_running_loop().run_in_executor(None, self._read_worktree)
+            oid = worktree_blob_oid(data)
+        # Blame depends on the history behind the file too: key on the commit
+        # the rev (or, for the working tree, HEAD) resolves to right now
+        commit_oid = (await asyncio.wrap_future(pool.submit(f"{self.rev or 'HEAD'}^{{commit}}", True)))[0]
+        key = (os.path.realpath(self.toplevel), self.path, oid, commit_oid, tuple(self.options))
+        result = self.cache.get(key)
+        if result is not None:
+            self.ui_bus.post(self._show, result, True)
+            return result
+
+        result = BlameResult(self.path, oid, split_blob_lines(data))
+        self.ui_bus.post(self._show, result, False)
+        parser = IncrementalBlameParser()
+
+        def on_output(chunks):
+            ranges = []
+            for stream_name, text in chunks:
+                if stream_name == 'stdout':
+                    ranges += [result.apply(entry) for entry in parser.feed(text)]
+            if ranges:
+                self.ui_bus.post(self._annotate, result, ranges)
+
+        git_cmd = ['git', 'blame', '--incremental', *self.options]
+        if self.rev:
+            git_cmd.append(self.rev)
+        git_cmd += ['--', self.path]
+        await self.core.git(git_cmd, cwd=self.toplevel, env=self.env, on_output=on_output, check=True,
+                            capture=False)
+        result.complete = True
+        self.cache.put(key, result)
+        return result
+
+    def _read_worktree(self):
+        with open(os.path.join(self.toplevel, self.path), 'rb') as f:
+            return f.read()
+
+    # Tk thread
+
+    def _show(self, result, complete):
+        if not self.exists():
+            return
+        self.result = result
+        lines = result.lines
+        for text, value in ((self.content, "\n".join(lines)),
+                            (self.gutter, "\n".join(gutter_label(commit, index + 1)
+                                                    for index, commit in enumerate(result.line_commits)))):
+            text.configure(state="normal")
+            text.delete("1.0", tk.END)
+            text.insert("1.0", value)
+            text.configure(state="disabled")
+        if complete:
+            self._show_summary(cached=True)
+        else:
+            self.status.set(f"Annotated 0 of {len(lines)} lines...")
+
+    def _annotate(self, result, ranges):
+        if not self.exists() or result is not self.result:
+            return
+        commits = result.line_commits
+        self.gutter.configure(state="normal")
+        for start, end in merge_ranges(ranges):
+            if start >= end:
+                continue
+            self.gutter.delete(f"{start + 1}.0", f"{end}.end")
+            self.gutter.insert(f"{start + 1}.0", "\n".join(gutter_label(commits[index], index + 1)
+                                                           for index in range(start, end)))
+        self.gutter.configure(state="disabled")
+        self.status.set(f"Annotated {result.annotated} of {len(result.lines)} lines...")
+
+    def _finished(self, result, error):
+        if not self.exists() or isinstance(error, asyncio.CancelledError):
+            return
+        if isinstance(error, ObjectMissing):
+            self.status.set(f"{self.path} does not exist at {self.rev}")
+        elif isinstance(error, subprocess.CalledProcessError):
+            self.status.set(f"git blame failed: {(error.stderr or '').strip()}")
+        elif error is not None:
+            self.status.set(f"Blame failed: {error}")
+        else:
+            self._show_summary(cached=False)
+
+    def _show_summary(self, cached):
+        result = self.result
+        commits = {commit.oid for commit in result.line_commits if commit is not None}
+        self.status.set(f"{len(result.lines)} lines from {len(commits)} commits"
+                        + (" (cached)" if cached else ""))
+
+    def select_line(self, event):
+        if self.result is None:
+            return "break"
+        line = int(self.gutter.index(f"@{event.x},{event.y}").split('.')[0])
+        if line > len(self.result.lines):
+            return "break"
+        commit = self.result.line_commits[line - 1]
+        for text in (self.gutter, self.content):
+            text.tag_remove('selected', "1.0", tk.END)
+        if commit is None:
+            self.details.set("Not annotated yet")
+            return "break"
+        # Highlight every line from the same commit, one tag range per run of lines
+        runs = merge_ranges((index, index + 1) for index, other in enumerate(self.result.line_commits)
+                            if other is commit)
+        for text in (self.gutter, self.content):
+            for start, end in runs:
+                text.tag_add('selected', f"{start + 1}.0", f"{end + 1}.0")
+        if commit.committed:
+            when = time.strftime('%Y-%m-%d %H:%M', time.localtime(commit.author_time))
+            self.details.set(f"{commit.oid}  {commit.author} {commit.author_mail}  {when}  {commit.summary}")
+        else:
+            self.details.set("Not committed yet")
+        return "break"
+
+    # Shared scrolling
+
+    def _yview(self, *args):
+        self.gutter.yview(*args)
+        self.content.yview(*args)
+
+    def _scrolled(self, other, first, last):
+        self.scrollbar.set(first, last)
+        if other.yview()[0] != float(first):
+            other.yview_moveto(first)
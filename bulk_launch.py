@@ -0,0 +1,200 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from github_api import GITHUB_API_URL, RateLimiter, shared_client
+from launch_pipeline import LaunchPipeline, TEMPLATES, describe_error
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'y', 'on')
+
+
+def load_manifest(path, base_dir=None):
+    """Read a CSV, JSON or YAML manifest into a list of repo entries.
+
+    Every entry has ``name`` and optionally ``description``, ``template``,
+    ``private`` and ``directory``. Relative directories are resolved against
+    ``base_dir``, and entries without one are placed in ``base_dir/<name>``.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline='') as f:
+        if ext == '.csv':
+            rows = list(csv.DictReader(f))
+        elif ext in ('.yml', '.yaml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML manifests need PyYAML (pip install pyyaml)")
+            rows = yaml.safe_load(f) or []
+        else:
+            rows = json.load(f)
+    if isinstance(rows, dict):
+        rows = rows.get('repos', [])
+
+    if not isinstance(rows, list):
+        raise ValueError("A manifest must be a list of repositories")
+    entries = []
+    for number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            raise ValueError(f"Manifest entry {number} is not an object with a name")
+        name = (row.get('name') or '').strip()
+        if not name:
+            raise ValueError(f"Manifest entry {number} has no name")
+        template = (row.get('template') or 'empty').strip()
+        if template != 'empty' and template not in TEMPLATES:
+            raise ValueError(f"Manifest entry {number} ({name}) has unknown template '{template}'")
+        # Relative directories are taken relative to base_dir
+        directory = os.path.expanduser((row.get('directory') or '').strip() or name)
+        directory = os.path.join(base_dir or os.getcwd(), directory)
+        entries.append({
+            'name': name,
+            'description': row.get('description') or '',
+            'template': template,
+            'private': parse_bool(row.get('private')),
+            'directory': directory,
+        })
+    return entries
+
+
+class BulkLauncher:
+    """Launch many repositories concurrently with a bounded parallelism.
+
+    With ``skip_existing`` the user's repositories are listed first (all
+    pages) and entries whose name is taken are reported as skipped instead of
+    being sent to GitHub.
+    """
+
+    def __init__(self, access_token, entries, parallelism=4, api_url=GITHUB_API_URL,
+                 rate_limiter=None, details=None, on_result=None, skip_existing=False):
+        self.access_token = access_token
+        self.entries = entries
+        self.parallelism = parallelism
+        self.api_url = api_url
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # details(entry, repo_data) -> (filename, content), optional
+        self.details = details
+        self.on_result = on_result
+        self.skip_existing = skip_existing
+        self.existing = set()
+        self.results = []
+        self.elapsed = 0.0
+
+    def existing_names(self):
+        """Lower-cased names of the repositories the token's user owns"""
+        headers = {'Authorization': f'token {self.access_token}'}
+        names = set()
+        for page in shared_client(self.api_url).get_pages('/user/repos', params={'per_page': 100,
+                                                                                   'affiliation': 'owner'},
+                                                          headers=headers):
+            names.update(repo['name'].lower() for repo in page)
+        return names
+
+    def launch_one(self, entry):
+        if entry['name'].lower() in self.existing:
+            result = {'name': entry['name'], 'directory': entry['directory'], 'ok': False, 'skipped': True,
+                      'url': None, 'error': "A repository with this name already exists", 'timings': {}}
+            if self.on_result:
+                self.on_result(result)
+            return result
+        details = None
+        if self.details:
+            details = lambda repo_data: self.details(entry, repo_data)
+        pipeline = LaunchPipeline(
+            entry['name'],
+            self.access_token,
+            entry['directory'],
+            description=entry['description'],
+            private=entry['private'],
+            template=entry['template'],
+            details=details,
+            api_url=self.api_url,
+            rate_limiter=self.rate_limiter
+        )
+        result = {'name': entry['name'], 'directory': entry['directory'], 'ok': False,
+                  'url': None, 'error': None, 'timings': pipeline.timings}
+        try:
+            repo_data = pipeline.run()
+            result['ok'] = True
+            result['url'] = repo_data.get('html_url')
+        except Exception as e:
+            result['error'] = describe_error(e)
+        if self.on_result:
+            self.on_result(result)
+        return result
+
+    def run(self):
+        started = time.perf_counter()
+        if self.skip_existing:
+            self.existing = self.existing_names()
+        with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="bulk-launch") as executor:
+            self.results = list(executor.map(self.launch_one, self.entries))
+        self.elapsed = time.perf_counter() - started
+        return self.summary()
+
+    def summary(self):
+        succeeded = sum(1 for result in self.results if result['ok'])
+        skipped = sum(1 for result in self.results if result.get('skipped'))
+        return {
+            'total': len(self.results),
+            'succeeded': succeeded,
+            'skipped': skipped,
+            'failed': len(self.results) - succeeded - skipped,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'repos_per_second': round(len(self.results) / self.elapsed, 3) if self.elapsed else 0.0,
+            'throttled_seconds': round(self.rate_limiter.throttled_seconds, 3),
+            'throttle_events': self.rate_limiter.throttle_events,
+            'results': self.results,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Launch many GitHub repositories from a manifest")
+    parser.add_argument('manifest', help="CSV, JSON or YAML file with name/description/template/private/directory")
+    parser.add_argument('--token', default=os.environ.get('GITHUB_TOKEN'), help="GitHub token (default: $GITHUB_TOKEN)")
+    parser.add_argument('--base-dir', help="Directory that relative entry directories are resolved against "
+                                           "(default: the manifest's directory)")
+    parser.add_argument('--parallel', type=int, default=4, help="Number of repositories launched at once")
+    parser.add_argument('--api-url', default=GITHUB_API_URL, help="GitHub API base URL (e.g. a local fake server)")
+    parser.add_argument('--min-interval', type=float, default=1.0, help="Seconds between repository create calls")
+    parser.add_argument('--skip-existing', action='store_true',
+                        help="List your repositories first and skip names that already exist")
+    args = parser.parse_args(argv)
+
+    if not args.token:
+        parser.error("an access token is required (--token or $GITHUB_TOKEN)")
+
+    base_dir = args.base_dir or os.path.dirname(os.path.abspath(args.manifest))
+    entries = load_manifest(args.manifest, base_dir=base_dir)
+    launcher = BulkLauncher(
+        args.token,
+        entries,
+        parallelism=args.parallel,
+        api_url=args.api_url,
+        rate_limiter=RateLimiter(min_interval=args.min_interval),
+        skip_existing=args.skip_existing,
+        on_result=lambda result: print(
+            f"{'OK  ' if result['ok'] else 'SKIP' if result.get('skipped') else 'FAIL'} {result['name']}: {result['url'] or result['error']}",
+            file=sys.stderr
+        )
+    )
+    try:
+        summary = launcher.run()
+    except requests.RequestException as e:
+        print(f"Could not list existing repositories: {describe_error(e)}", file=sys.stderr)
+        return 1
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from commit_history import find_git_dir
+from tracing import tracer
+
+
+class CatFileError(Exception):
+    """A ``git cat-file`` process died or could not be started"""
+
+
+class ObjectMissing(KeyError):
+    """``git cat-file`` reported the object as missing or ambiguous"""
+
+
+class _Request:
+    __slots__ = ('rev', 'future', 'batch_check', 'attempts')
+
+    def __init__(self, rev, future, batch_check):
+        self.rev = rev
+        self.future = future
+        self.batch_check = batch_check
+        self.attempts = 0
+
+
+class CatFileProcess:
+    """One long-lived ``git cat-file --batch`` (or ``--batch-check``) process.
+
+    Requests are written to stdin as they come and a reader thread matches
+    the responses, in order, to the waiting futures, so many lookups can be
+    in flight at once. At most ``max_inflight`` requests are outstanding;
+    ``submit()`` blocks beyond that. When the process dies, unanswered
+    requests are handed to ``on_exit(requests)``.
+    """
+
+    def __init__(self, repo_path, batch_check=False, max_inflight=256, on_exit=None):
+        self.repo_path = repo_path
+        self.batch_check = batch_check
+        self.on_exit = on_exit
+        self.last_used = time.monotonic()
+        self.alive = True
+        self._pending = deque()
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._write_lock = threading.Lock()
+        self._bytes_out = 0
+        git_cmd = ['git', 'cat-file', '--batch-check' if batch_check else '--batch']
+        self._span = tracer.start('git', git_cmd, repo_path)
+        try:
+            self._process = subprocess.Popen(git_cmd, cwd=repo_path, stdin=subprocess.PIPE,
+                                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            self._span.finish(error=e)
+            raise CatFileError(f"cannot start git cat-file: {e}") from e
+        self._reader = threading.Thread(target=self._read_loop, name="cat-file", daemon=True)
+        self._reader.start()
+
+    @property
+    def inflight(self):
+        return len(self._pending)
+
+    def submit(self, request):
+        """Send one request; blocks while ``max_inflight`` are outstanding"""
+        self._slots.acquire()
+        with self._write_lock:
+            if not self.alive:
+                self._slots.release()
+                raise CatFileError("git cat-file is not running")
+            self.last_used = time.monotonic()
+            self._pending.append(request)
+            try:
+                self._process.stdin.write(request.rev.encode('utf-8', errors='surrogateescape') + b'\n')
+                self._process.stdin.flush()
+            except (OSError, ValueError):
+                # The reader notices the exit and hands the request back
+                pass
+
+    def close(self):
+        """Let git exit after answering what was already sent"""
+        with self._write_lock:
+            self.alive = False
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+
+    def kill(self):
+        self.close()
+        self._process.kill()
+
+    def _read_loop(self):
+        stdout = self._process.stdout
+        request = None
+        try:
+            while True:
+                header = stdout.readline()
+                if not header:
+                    break
+                self._bytes_out += len(header)
+                request = self._pending.popleft()
+                line = header.rstrip(b'\n')
+                # "<rev> missing" echoes the rev, which may contain spaces
+                if not line.endswith((b' missing', b' ambiguous')):
+                    try:
+                        oid, kind, size = line.rsplit(b' ', 2)
+                        oid, kind, size = oid.decode('ascii'), kind.decode('ascii'), int(size)
+                    except ValueError:
+                        # Out of step with git: give up on this process
+                        raise CatFileError(f"unexpected cat-file reply: {line!r}")
+                    if self.batch_check:
+                        result = (oid, kind, size)
+                    else:
+                        data = stdout.read(size + 1)
+                        if len(data) != size + 1:
+                            self._pending.appendleft(request)
+                            request = None
+                            break
+                        self._bytes_out += len(data)
+                        result = (oid, kind, data[:-1])
+                    self._slots.release()
+                    request.future.set_result(result)
+                else:
+                    self._slots.release()
+                    request.future.set_exception(ObjectMissing(request.rev))
+                request = None
+        except (OSError, ValueError, CatFileError) as e:
+            # Every request gets an answer, including the one being read
+            if request is not None:
+                self._slots.release()
+                request.future.set_exception(e if isinstance(e, CatFileError) else CatFileError(str(e)))
+        finally:
+            with self._write_lock:
+                self.alive = False
+                orphans = list(self._pending)
+                self._pending.clear()
+            for _ in orphans:
+                self._slots.release()
+            stdout.close()
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+            returncode = self._process.wait()
+            self._span.finish(returncode, self._bytes_out)
+            if orphans:
+                if self.on_exit is not None:
+                    self.on_exit(orphans)
+                else:
+                    for request in orphans:
+                        request.future.set_exception(CatFileError("git cat-file exited"))
+
+
+class CatFilePool:
+    """Persistent ``git cat-file`` processes for one repository.
+
+    ``read()`` returns ``(oid, type, data)`` and ``info()`` returns
+    ``(oid, type, size)`` for anything ``git rev-parse`` understands
+    (``HEAD:README.md``, ``:path`` for the index, object ids...).
+    ``submit()``/``read_many()`` pipeline lookups over up to ``size``
+    processes per mode. Crashed processes are replaced and their unanswered
+    requests retried once; processes unused for ``idle_timeout`` seconds
+    exit, and all of them are restarted when the index changes, since git
+    reads the index only once per process.
+    """
+
+    def __init__(self, repo_path, size=2, max_inflight=256, idle_timeout=60.0):
+        self.repo_path = repo_path
+        self.size = size
+        self.max_inflight = max_inflight
+        self.idle_timeout = idle_timeout
+        self._index_path = os.path.join(find_git_dir(repo_path), 'index')
+        self._index_stat = None
+        self._processes = {False: [], True: []}   # keyed by batch_check
+        self._lock = threading.Lock()
+        self._janitor = None
+        self._closed = False
+
+    # Public API
+
+    def submit(self, rev, batch_check=False):
+        """Queue one lookup and return a Future"""
+        if '\n' in rev:
+            raise ValueError("revision names cannot contain newlines")
+        future = Future()
+        # Running futures cannot be cancelled, so the reader can always resolve them
+        future.set_running_or_notify_cancel()
+        self._dispatch(_Request(rev, future, batch_check))
+        return future
+
+    def read(self, rev):
+        return self.submit(rev).result()
+
+    def info(self, rev):
+        return self.submit(rev, batch_check=True).result()
+
+    def read_many(self, revs, batch_check=False):
+        """Yield results in order; lookups are sent ahead while earlier ones are read.
+
+        A missing object yields its ObjectMissing exception instead of raising.
+        """
+        window = deque()
+        for rev in revs:
+            window.append(self.submit(rev, batch_check))
+            while len(window) > self.max_inflight:
+                yield self._result(window.popleft())
+        while window:
+            yield self._result(window.popleft())
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            processes = self._processes[False] + self._processes[True]
+            self._processes = {False: [], True: []}
+        for process in processes:
+            process.close()
+
+    # Internals
+
+    def _result(self, future):
+        try:
+            return future.result()
+        except ObjectMissing as e:
+            return e
+
+    def _dispatch(self, request):
+        batch_check = request.batch_check
+        while True:
+            process = self._process_for(batch_check, request.rev.startswith(':'))
+            try:
+                process.submit(request)
+                return
+            except CatFileError:
+                # Died between selection and write; pick or start another
+                with self._lock:
+                    if process in self._processes[batch_check]:
+                        self._processes[batch_check].remove(process)
+                request.attempts += 1
+                if request.attempts > 2:
+                    raise
+
+    def _process_for(self, batch_check, reads_index):
+        stale = []
+        with self._lock:
+            if self._closed:
+                raise CatFileError("cat-file pool is closed")
+            if reads_index:
+                # A process answers ":path" from the index it loaded first
+                index_stat = self._stat_index()
+                if index_stat != self._index_stat:
+                    self._index_stat = index_stat
+                    stale = self._processes[False] + self._processes[True]
+                    self._processes = {False: [], True: []}
+            processes = self._processes[batch_check]
+            processes[:] = [process for process in processes if process.alive]
+            process = min(processes, key=lambda process: process.inflight, default=None)
+            if process is None or (process.inflight and len(processes) < self.size):
+                process = CatFileProcess(self.repo_path, batch_check, self.max_inflight, on_exit=self._retry)
+                processes.append(process)
+                self._start_janitor()
+        for old in stale:
+            old.close()
+        return process
+
+    def _retry(self, requests):
+        for request in requests:
+            request.attempts += 1
+            if request.attempts > 1 or self._closed:
+                request.future.set_exception(CatFileError("git cat-file exited"))
+                continue
+            try:
+                self._dispatch(request)
+            except CatFileError as e:
+                request.future.set_exception(e)
+
+    def _stat_index(self):
+        try:
+            st = os.stat(self._index_path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _start_janitor(self):
+        # Must be called with self._lock held
+        if self._janitor is None or not self._janitor.is_alive():
+            self._janitor = threading.Thread(target=self._reap_idle, name="cat-file-janitor", daemon=True)
+            self._janitor.start()
+
+    def _reap_idle(self):
+        while True:
+            time.sleep(min(self.idle_timeout / 2, 5.0))
+            now = time.monotonic()
+            idle = []
+            with self._lock:
+                for processes in self._processes.values():
+                    for process in list(processes):
+                        if not process.alive or (not process.inflight
+                                                 and now - process.last_used > self.idle_timeout):
+                            processes.remove(process)
+                            idle.append(process)
+                if not self._processes[False] and not self._processes[True]:
+                    self._janitor = None
+                    remaining = False
+                else:
+                    remaining = True
+            for process in idle:
+                process.close()
+            if not remaining:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(repo_path):
+    """Return the process-wide cat-file pool of a repository"""
+    key = os.path.realpath(repo_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = CatFilePool(key)
+        return pool
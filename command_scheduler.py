@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Commands that never write to the repository and may run side by side
+READ_ONLY_COMMANDS = {'status', 'log', 'diff', 'show', 'blame', 'grep'}
+
+
+def is_read_only(git_cmd):
+    """Return True if a git argv only reads from the repository"""
+    if '--help' in git_cmd:
+        return True
+    return len(git_cmd) > 1 and git_cmd[1] in READ_ONLY_COMMANDS
+
+
+class CommandJob:
+    """A git command waiting for, or running on, the scheduler"""
+
+    def __init__(self, job_id, repo, git_cmd, read_only):
+        self.id = job_id
+        self.repo = repo
+        self.git_cmd = git_cmd
+        self.read_only = read_only
+        self.state = 'queued'
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.body_started = False
+        self._process = None
+        self._lock = threading.Lock()
+
+    @property
+    def label(self):
+        return ' '.join(self.git_cmd)
+
+    def attach(self, process):
+        """Register the running process so that it can be killed on cancel.
+
+        ``process`` is anything with a ``kill()`` method (a Popen or an
+        async_core.AsyncTask).
+        """
+        with self._lock:
+            self._process = process
+            cancel = self.cancel_requested
+        if cancel:
+            process.kill()
+
+    def kill(self):
+        with self._lock:
+            self.cancel_requested = True
+            process = self._process
+        if process is not None:
+            process.kill()
+
+
+class CommandScheduler:
+    """Bounded, per-repository scheduler for git commands.
+
+    At most ``max_workers`` commands run at once. Within one repository,
+    mutating commands run alone and in submission order, while read-only
+    commands (status, log, diff, show, ...) may run in parallel with each other.
+    ``on_change`` is called from whichever thread changed the queue.
+
+    Without ``core`` each job's ``run(job)`` is called on a worker thread. With
+    an async_core.AsyncCore, ``run(job)`` must return a coroutine, which runs
+    on the core's loop and is cancelled when the job is; no threads are used
+    per job.
+    """
+
+    HISTORY_SIZE = 50
+
+    def __init__(self, max_workers=4, on_change=None, core=None):
+        self.max_workers = max_workers
+        self.on_change = on_change
+        self.core = core
+        self._executor = None if core else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="git-cmd")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._queued = []
+        self._running = {}
+        self._finished = []
+
+    def submit(self, repo, git_cmd, run, read_only=None):
+        """Queue ``run(job)`` for a git command in ``repo`` and return the job"""
+        if read_only is None:
+            read_only = is_read_only(git_cmd)
+        job = CommandJob(next(self._ids), os.path.realpath(repo), git_cmd, read_only)
+        with self._lock:
+            self._queued.append((job, run))
+            self._dispatch()
+        self._notify()
+        return job
+
+    def cancel(self, job_id):
+        """Drop a queued job or kill a running one; return True if found"""
+        running = None
+        with self._lock:
+            for index, (job, _) in enumerate(self._queued):
+                if job.id == job_id:
+                    del self._queued[index]
+                    job.state = 'cancelled'
+                    job.finished = time.time()
+                    self._remember(job)
+                    break
+            else:
+                running = self._running.get(job_id)
+                if running is None:
+                    return False
+                running.state = 'cancelling'
+        # Outside the lock: killing an async job may finish it synchronously
+        if running is not None:
+            running.kill()
+        self._notify()
+        return True
+
+    def cancel_all(self):
+        for job in self.jobs():
+            if job.state in ('queued', 'running'):
+                self.cancel(job.id)
+
+    def jobs(self):
+        """Snapshot of finished, running and queued jobs, oldest first"""
+        with self._lock:
+            running = sorted(self._running.values(), key=lambda job: job.id)
+            return list(self._finished) + running + [job for job, _ in self._queued]
+
+    def shutdown(self):
+        self.cancel_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _can_start(self, job, blocked_repos, reading_repos):
+        if job.repo in blocked_repos:
+            return False
+        if job.read_only:
+            return True
+        return job.repo not in reading_repos
+
+    def _dispatch(self):
+        # Must be called with self._lock held
+        blocked = set()   # repos with a running or earlier queued mutating job
+        reading = set()   # repos with running or earlier queued read-only jobs
+        for job in self._running.values():
+            (reading if job.read_only else blocked).add(job.repo)
+
+        remaining = []
+        for job, run in self._queued:
+            if len(self._running) < self.max_workers and self._can_start(job, blocked, reading):
+                job.state = 'running'
+                job.started = time.time()
+                self._running[job.id] = job
+                if self.core is not None:
+                    task = self.core.submit(self._run_job_async(job, run), name=job.label)
+                    # A job cancelled before its coroutine started never runs its body
+                    task.future.add_done_callback(
+                        lambda future, job=job: future.cancelled() and not job.body_started
+                        and self._finish_job(job, 'cancelled'))
+                    job.attach(task)
+                else:
+                    self._executor.submit(self._run_job, job, run)
+            else:
+                remaining.append((job, run))
+            (reading if job.read_only else blocked).add(job.repo)
+        self._queued = remaining
+
+    def _run_job(self, job, run):
+        state = 'done'
+        try:
+            run(job)
+            if job.cancel_requested:
+                state = 'cancelled'
+        except Exception:
+            state = 'failed'
+        self._finish_job(job, state)
+
+    async def _run_job_async(self, job, run):
+        job.body_started = True
+        state = 'done'
+        try:
+            await run(job)
+            if job.cancel_requested:
+                state = 'cancelled'
+        except asyncio.CancelledError:
+            state = 'cancelled'
+        except Exception:
+            state = 'failed'
+        self._finish_job(job, state)
+
+    def _finish_job(self, job, state):
+        with self._lock:
+            if self._running.pop(job.id, None) is None:
+                return
+            job.state = state
+            job.finished = time.time()
+            self._remember(job)
+            self._dispatch()
+        self._notify()
+
+    def _remember(self, job):
+        self._finished.append(job)
+        del self._finished[:-self.HISTORY_SIZE]
+
+    def _notify(self):
+        if self.on_change:
+            self.on_change()
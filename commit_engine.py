@@ -0,0 +1,113 @@
+import os
+import subprocess
+
+from commit_history import find_toplevel
+from repo_status import parse_porcelain_v2, status_command
+from tracing import tracer
+
+# Answers git's credential "get" request from the environment, so the token is
+# used for one push without being written to .git/config or shown in argv.
+# The empty helper first clears any helper configured globally, which would
+# otherwise be asked first and told to store the token.
+CREDENTIAL_HELPER = '!f() { test "$1" = get && echo username=x-access-token && echo "password=$REPOROCKET_TOKEN"; }; f'
+
+
+class NothingToCommit(Exception):
+    """The working tree has no changes to commit"""
+
+
+def paths_to_stage(files):
+    """Paths from a status scan (``RepoStatus.files``) that a commit of
+    everything pending must stage; relative to the top of the tree"""
+    paths = []
+    for path, entry in files.items():
+        if entry.kind == 'ignored':
+            continue
+        paths.append(path)
+        if entry.orig_path:
+            paths.append(entry.orig_path)
+    return paths
+
+
+# Stage exactly the given paths (added, modified or deleted) from a NUL separated list on stdin
+STAGE_COMMAND = ['git', 'update-index', '--add', '--remove', '-z', '--stdin']
+
+
+def _path_list(paths):
+    return b''.join(os.fsencode(path) + b'\0' for path in paths)
+
+
+def commit_command(message):
+    return ['git', 'commit', '-q', '-m', message]
+
+
+def push_command(token, push_url=None, remote='origin', refspec='HEAD', set_upstream=False):
+    """Return ``(git_cmd, env)`` for a push using ``token`` for this one invocation.
+
+    The default pushes the current branch to the branch of the same name on
+    ``remote``; with ``remote=None`` it goes to the branch's upstream instead,
+    whatever remote and branch that is. ``set_upstream`` makes the local branch
+    track what was pushed. ``push_url`` overrides where ``remote`` pushes to for
+    this call only, so the remote's tracking branch is still updated while the
+    stored URL is left alone.
+    """
+    git_cmd = ['git', '-c', 'credential.helper=', '-c', f'credential.helper={CREDENTIAL_HELPER}']
+    if remote is None:
+        git_cmd += ['-c', 'push.default=upstream', 'push']
+    else:
+        if push_url:
+            git_cmd += ['-c', f'remote.{remote}.pushurl={push_url}']
+        git_cmd += ['push'] + (['--set-upstream'] if set_upstream else []) + [remote, refspec]
+    env = dict(os.environ, REPOROCKET_TOKEN=token, GIT_TERMINAL_PROMPT='0')
+    return git_cmd, env
+
+
+def stage_paths(repo_path, paths):
+    """Stage exactly ``paths`` in one process; ``repo_path`` is the top of the
+    working tree, which the paths are relative to"""
+    if not paths:
+        return
+    result = tracer.run(STAGE_COMMAND, cwd=repo_path, input=_path_list(paths), capture_output=True)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, STAGE_COMMAND,
+                                            stderr=result.stderr.decode('utf-8', errors='replace'))
+
+
+def commit(repo_path, message):
+    tracer.run(commit_command(message), cwd=repo_path, capture_output=True, text=True, check=True)
+
+
+def push_with_token(repo_path, token, push_url=None, remote='origin', refspec='HEAD'):
+    git_cmd, env = push_command(token, push_url, remote, refspec)
+    tracer.run(git_cmd, cwd=repo_path, env=env, capture_output=True, text=True, check=True)
+
+
+async def commit_and_push_async(core, repo_path, message, token):
+    """Scan, stage, commit and push as asyncio subprocesses on an
+    async_core.AsyncCore; returns the staged paths.
+
+    Only changes under ``repo_path`` are committed, also when it is a
+    subdirectory of the repository. The status is scanned here rather than
+    taken from a RepoStatus, which may have missed edits made outside the app.
+    The current branch goes to its upstream, or to a branch of the same name
+    on origin (which it then tracks) if it has none. Raises NothingToCommit
+    when there is nothing to commit.
+    """
+    toplevel = find_toplevel(repo_path) or repo_path
+    prefix = os.path.relpath(repo_path, toplevel).replace(os.sep, '/')
+    pathspecs = None if prefix == '.' else [f':(top,literal){prefix}']
+    result = await core.git(status_command(pathspecs, branch=True), cwd=toplevel, check=True)
+    files, branch = parse_porcelain_v2(result.stdout)
+    paths = paths_to_stage(files)
+    if not paths:
+        raise NothingToCommit()
+    if branch.get('branch.head', '(detached)') == '(detached)':
+        raise ValueError("HEAD is detached; check out a branch to push")
+    await core.git(STAGE_COMMAND, cwd=toplevel, input=_path_list(paths), check=True)
+    await core.git(commit_command(message), cwd=toplevel, check=True)
+    if 'branch.upstream' in branch:
+        git_cmd, env = push_command(token, remote=None)
+    else:
+        git_cmd, env = push_command(token, set_upstream=True)
+    await core.git(git_cmd, cwd=toplevel, env=env, check=True)
+    return paths
@@ -0,0 +1,200 @@
+import os
+import threading
+from collections import OrderedDict
+
+from log_store import CommitStore, ingest_log
+from tracing import tracer
+
+
+def find_toplevel(path):
+    """Top directory of the working tree containing ``path``, or None"""
+    path = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(path, '.git')):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def find_git_dir(repo_path):
+    """Return the git directory of the working tree containing ``repo_path``,
+    following ``.git`` files"""
+    repo_path = find_toplevel(repo_path) or repo_path
+    git_path = os.path.join(repo_path, '.git')
+    if os.path.isfile(git_path):
+        with open(git_path) as f:
+            line = f.readline().strip()
+        if line.startswith('gitdir:'):
+            return os.path.normpath(os.path.join(repo_path, line[len('gitdir:'):].strip()))
+    return git_path
+
+
+def read_head_oid(repo_path):
+    """Resolve HEAD without spawning git; None for unborn branches or non-repos"""
+    git_dir = find_git_dir(repo_path)
+    try:
+        with open(os.path.join(git_dir, 'HEAD')) as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+    if not head.startswith('ref: '):
+        return head
+    ref = head[len('ref: '):]
+
+    # Linked worktrees keep branch refs in the common git directory
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, 'commondir')) as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(common_dir, ref)) as f:
+            return f.read().strip() or None
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(common_dir, 'packed-refs')) as f:
+            for line in f:
+                oid, _, name = line.strip().partition(' ')
+                if name == ref:
+                    return oid
+    except OSError:
+        pass
+    return None
+
+
+class HistoryPages:
+    """Commits loaded so far for one HEAD, newest first.
+
+    The commits from ``base_offset`` on are a prefix of the ``git log`` walk
+    from ``base`` (None: from HEAD itself); the ones before it were fetched
+    by fast-forwards and are not reachable from ``base``. Further pages
+    continue that walk.
+    """
+
+    def __init__(self, commits=None, complete=False, base=None, base_offset=0):
+        self.commits = commits if commits is not None else CommitStore()
+        self.complete = complete
+        self.base = base
+        self.base_offset = base_offset
+
+
+class CommitHistory:
+    """Paginated ``git log`` for one repository, cached by HEAD object id.
+
+    Pages of ``page_size`` commits are loaded on demand. Parsed pages are kept
+    in a process-wide cache keyed by (repository, HEAD), so re-opening a repo
+    or refreshing when HEAD has not moved does not run git at all, and after a
+    commit/push only the commits new since the cached HEAD are fetched.
+    """
+
+    CACHE_SIZE = 16
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, repo_path, page_size=100):
+        self.repo_path = repo_path
+        self.key = os.path.realpath(repo_path)
+        self.page_size = page_size
+        self.head_oid = None
+        self.pages = HistoryPages(complete=True)
+
+    @property
+    def commits(self):
+        return self.pages.commits
+
+    @property
+    def complete(self):
+        return self.pages.complete
+
+    def sync(self):
+        """Bring the history in line with HEAD; return True if it changed"""
+        head_oid = read_head_oid(self.repo_path)
+        if head_oid == self.head_oid and self.head_oid is not None:
+            return False
+        if head_oid is None:
+            self.head_oid = None
+            self.pages = HistoryPages(complete=True)
+            return True
+
+        pages = self._cache_get(head_oid)
+        if pages is None:
+            old_head, old_pages = self.head_oid, self.pages
+            if old_head is None:
+                old_head, old_pages = self._latest_cached()
+            if old_head and self._is_ancestor(old_head, head_oid):
+                # Fast-forward (e.g. after commit & push): fetch only the new commits
+                commits = self._log([f'{old_head}..{head_oid}'])
+                new = len(commits)
+                commits.extend(old_pages.commits)
+                pages = HistoryPages(commits, old_pages.complete, old_pages.base or old_head,
+                                     new + old_pages.base_offset)
+            else:
+                pages = HistoryPages()
+            self._cache_put(head_oid, pages)
+
+        self.head_oid = head_oid
+        self.pages = pages
+        if not len(pages.commits) and not pages.complete:
+            self.load_more()
+        return True
+
+    def load_more(self):
+        """Load the next page; return the number of commits added"""
+        if self.head_oid is None or self.pages.complete:
+            return 0
+        before = len(self.pages.commits)
+        # Offsets only hold within one walk, so after a fast-forward paging
+        # continues the walk of the head the older pages came from
+        skip = before - self.pages.base_offset
+        self._log([f'--skip={skip}', '-n', str(self.page_size), self.pages.base or self.head_oid],
+                  self.pages.commits)
+        added = len(self.pages.commits) - before
+        if added < self.page_size:
+            self.pages.complete = True
+        return added
+
+    @classmethod
+    def seed(cls, repo_path, head_oid, pages):
+        """Add pages loaded elsewhere (e.g. repo_cache) unless already cached"""
+        key = (os.path.realpath(repo_path), head_oid)
+        with cls._cache_lock:
+            if key not in cls._cache:
+                cls._cache[key] = pages
+                while len(cls._cache) > cls.CACHE_SIZE:
+                    cls._cache.popitem(last=False)
+
+    def _log(self, args, store=None):
+        return ingest_log(self.repo_path, args, store)
+
+    def _is_ancestor(self, old_oid, new_oid):
+        result = tracer.run(
+            ['git', 'merge-base', '--is-ancestor', old_oid, new_oid],
+            cwd=self.repo_path,
+            capture_output=True
+        )
+        return result.returncode == 0
+
+    def _cache_get(self, head_oid):
+        with self._cache_lock:
+            pages = self._cache.get((self.key, head_oid))
+            if pages is not None:
+                self._cache.move_to_end((self.key, head_oid))
+            return pages
+
+    def _latest_cached(self):
+        with self._cache_lock:
+            for (key, head_oid) in reversed(self._cache):
+                if key == self.key:
+                    return head_oid, self._cache[(key, head_oid)]
+        return None, None
+
+    def _cache_put(self, head_oid, pages):
+        with self._cache_lock:
+            self._cache[(self.key, head_oid)] = pages
+            self._cache.move_to_end((self.key, head_oid))
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
@@ -0,0 +1,365 @@
+import itertools
+import os
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+
+from cat_file import ObjectMissing, pool_for
+from commit_history import find_toplevel
+from file_loader import BINARY_SNIFF_SIZE
+from line_diff import DiffSession
+
+
+def format_range(start, length):
+    """Hunk header range as in ``git diff`` (1-based, empty ranges point before)"""
+    if length == 1:
+        return f"{start + 1}"
+    if not length:
+        return f"{start},0"
+    return f"{start + 1},{length}"
+
+
+def hunk_header(hunk):
+    a1, a2, b1, b2 = hunk[0][1], hunk[-1][2], hunk[0][3], hunk[-1][4]
+    return f"@@ -{format_range(a1, a2 - a1)} +{format_range(b1, b2 - b1)} @@\n"
+
+
+def hunk_row_count(hunk, side_by_side):
+    count = 0
+    for tag, i1, i2, j1, j2 in hunk:
+        if tag == 'equal':
+            count += i2 - i1
+        elif side_by_side:
+            count += max(i2 - i1, j2 - j1)
+        else:
+            count += (i2 - i1) + (j2 - j1)
+    return count
+
+
+def hunk_rows(result, hunk, side_by_side):
+    """Yield the rows of one hunk, without its header.
+
+    A row has one entry per text widget (one for unified, left and right for
+    side by side), each a ``(text, tags)`` pair ready for Text.insert().
+    """
+    a, b = result.a_lines, result.b_lines
+    for tag, i1, i2, j1, j2 in hunk:
+        if tag == 'equal':
+            for offset in range(i2 - i1):
+                line = a[i1 + offset]
+                if side_by_side:
+                    yield ((f"{i1 + offset + 1:>6} {line}\n", ()), (f"{j1 + offset + 1:>6} {line}\n", ()))
+                else:
+                    yield ((f"{i1 + offset + 1:>6} {j1 + offset + 1:>6}   {line}\n", ()),)
+        elif side_by_side:
+            for offset in range(max(i2 - i1, j2 - j1)):
+                i, j = i1 + offset, j1 + offset
+                left = (f"{i + 1:>6} {a[i]}\n", 'del') if i < i2 else ("\n", 'filler')
+                right = (f"{j + 1:>6} {b[j]}\n", 'add') if j < j2 else ("\n", 'filler')
+                yield (left, right)
+        else:
+            for i in range(i1, i2):
+                yield ((f"{i + 1:>6} {'':>6} - {a[i]}\n", 'del'),)
+            for j in range(j1, j2):
+                yield ((f"{'':>6} {j + 1:>6} + {b[j]}\n", 'add'),)
+
+
+def _header_row(hunk, side_by_side):
+    header = hunk_header(hunk)
+    return ((header, 'hunk'), (header, 'hunk')) if side_by_side else ((header, 'hunk'),)
+
+
+def build_plan(result, side_by_side, hunk_batch, hunk_preview):
+    """What to draw first: a list of ``('rows', rows)`` and
+    ``('more', count, label, rows_iterator)`` items.
+
+    Only the first ``hunk_batch`` hunks, each cut to ``hunk_preview`` rows,
+    are formatted up front; the rest stay behind lazy iterators that the
+    view expands on demand.
+    """
+    items = []
+    for hunk in result.hunks[:hunk_batch]:
+        rows = hunk_rows(result, hunk, side_by_side)
+        items.append(('rows', [_header_row(hunk, side_by_side)] + list(itertools.islice(rows, hunk_preview))))
+        hidden = hunk_row_count(hunk, side_by_side) - hunk_preview
+        if hidden > 0:
+            items.append(('more', hidden, "lines in this hunk", rows))
+    rest = result.hunks[hunk_batch:]
+    if rest:
+        rows = itertools.chain.from_iterable(
+            itertools.chain([_header_row(hunk, side_by_side)], hunk_rows(result, hunk, side_by_side)) for hunk in rest)
+        items.append(('more', sum(hunk_row_count(hunk, side_by_side) + 1 for hunk in rest),
+                      f"lines in {len(rest)} more hunks", rows))
+    return items
+
+
+class DiffWindow:
+    """Diff of the file open in the editor against the index or HEAD.
+
+    ``source()`` is called on the Tk thread and returns ``(repo_path,
+    file_path, text)``, with ``text`` None when the file should be read from
+    disk (large files shown read-only), or None when nothing is selected.
+    ``schedule()`` asks for a new diff after DEBOUNCE_MS without further
+    calls, so typing triggers one diff per pause. The diff and the row
+    formatting run on one worker thread, in a DiffSession that is reused
+    while the file and base blob stay the same, and results reach Tk through
+    the UI bus. Only the first hunks, and the first rows of each, are drawn;
+    the rest is drawn in EXPAND_ROWS steps when its marker is clicked.
+    """
+
+    DEBOUNCE_MS = 300
+    HUNK_BATCH = 50
+    HUNK_PREVIEW = 100
+    EXPAND_ROWS = 2000
+    TEXT_OPTIONS = dict(bg="#333333", fg="#ffffff", wrap="none", font=("Courier", 10), state="disabled")
+
+    def __init__(self, master, ui_bus, source):
+        self.ui_bus = ui_bus
+        self.source = source
+        self.window = tk.Toplevel(master)
+        self.window.title("Diff")
+        self.window.geometry("1000x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diff")
+        self._session = None
+        self._session_key = None
+        self._request = 0
+        self._after_id = None
+        self._shown = None
+        self._expanders = {}
+        self._tags = itertools.count()
+
+        controls = ttk.Frame(self.window, padding=5)
+        controls.pack(fill="x")
+        self.base = tk.StringVar(value="index")
+        self.mode = tk.StringVar(value="unified")
+        ttk.Label(controls, text="Compare with:").pack(side="left")
+        ttk.Radiobutton(controls, text="Index", variable=self.base, value="index",
+                        command=self.update).pack(side="left", padx=2)
+        ttk.Radiobutton(controls, text="HEAD", variable=self.base, value="HEAD",
+                        command=self.update).pack(side="left", padx=2)
+        ttk.Radiobutton(controls, text="Unified", variable=self.mode, value="unified",
+                        command=self.change_mode).pack(side="left", padx=(15, 2))
+        ttk.Radiobutton(controls, text="Side by Side", variable=self.mode, value="split",
+                        command=self.change_mode).pack(side="left", padx=2)
+        self.summary = tk.StringVar()
+        ttk.Label(controls, textvariable=self.summary).pack(side="right", padx=5)
+
+        self.unified_frame = ttk.Frame(self.window)
+        self.unified_text = tk.Text(self.unified_frame, **self.TEXT_OPTIONS)
+        scrollbar = ttk.Scrollbar(self.unified_frame, orient="vertical", command=self.unified_text.yview)
+        self.unified_text.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.unified_text.pack(side="left", fill="both", expand=True)
+
+        self.split_frame = ttk.Frame(self.window)
+        self.split_scrollbar = ttk.Scrollbar(self.split_frame, orient="vertical", command=self._split_yview)
+        self.split_scrollbar.pack(side="right", fill="y")
+        self.left_text = tk.Text(self.split_frame, width=60, **self.TEXT_OPTIONS)
+        self.right_text = tk.Text(self.split_frame, width=60, **self.TEXT_OPTIONS)
+        self.left_text.configure(yscrollcommand=lambda first, last: self._split_scrolled(self.right_text, first, last))
+        self.right_text.configure(yscrollcommand=lambda first, last: self._split_scrolled(self.left_text, first, last))
+        self.left_text.pack(side="left", fill="both", expand=True)
+        self.right_text.pack(side="left", fill="both", expand=True)
+
+        for text in (self.unified_text, self.left_text, self.right_text):
+            text.tag_configure('add', background="#1e4620")
+            text.tag_configure('del', background="#5a1e1e")
+            text.tag_configure('filler', background="#262626")
+            text.tag_configure('hunk', foreground="#4fc3f7")
+            text.tag_configure('more', foreground="#ffeb3b", underline=True)
+
+        self.unified_frame.pack(fill="both", expand=True)
+        self.update()
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def lift(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def close(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+        self._request += 1
+        self._worker.shutdown(wait=False, cancel_futures=True)
+        self.window.destroy()
+
+    # Scheduling
+
+    def schedule(self):
+        """Recompute once the editor has been quiet for DEBOUNCE_MS"""
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+        self._after_id = self.window.after(self.DEBOUNCE_MS, self.update)
+
+    def update(self):
+        self._after_id = None
+        self._request += 1
+        snapshot = self.source()
+        if snapshot is None:
+            self._show_message("No file selected.")
+            return
+        repo_path, file_path, text = snapshot
+        self.summary.set(f"{os.path.basename(file_path)}: comparing...")
+        self._worker.submit(self._compute, self._request, repo_path, file_path, text,
+                            self.base.get(), self.mode.get() == "split")
+
+    def change_mode(self):
+        self.unified_frame.pack_forget()
+        self.split_frame.pack_forget()
+        (self.split_frame if self.mode.get() == "split" else self.unified_frame).pack(fill="both", expand=True)
+        self._shown = None
+        self.update()
+
+    # Worker thread
+
+    def _compute(self, request, repo_path, file_path, text, base, side_by_side):
+        if request != self._request:
+            return  # a newer request is already queued
+        name = os.path.basename(file_path)
+        try:
+            # Object names take paths relative to the top of the tree
+            toplevel = find_toplevel(repo_path) or repo_path
+            relative = os.path.relpath(file_path, toplevel).replace(os.sep, '/')
+            pool = pool_for(toplevel)
+            rev = (':' if base == "index" else 'HEAD:') + relative
+            try:
+                oid = pool.info(rev)[0]
+            except ObjectMissing:
+                oid = None
+            key = (toplevel, relative, base, oid)
+            if key != self._session_key:
+                base_text = "" if oid is None else _text_of(pool.read(oid)[2])
+                self._session = None if base_text is None else DiffSession(base_text)
+                self._session_key = key
+            if text is None:
+                with open(file_path, 'rb') as f:
+                    text = _text_of(f.read())
+            else:
+                # The editor keeps the \r of mixed-ending files; normalise it
+                # like the base so only real edits show as changed
+                text = text.replace('\r\n', '\n')
+            if self._session is None or text is None:
+                self.ui_bus.post_latest(('diff', id(self)), self._show_text, request,
+                                        f"{name}: binary file, no line diff")
+                return
+            result = self._session.diff(text)
+            plan = build_plan(result, side_by_side, self.HUNK_BATCH, self.HUNK_PREVIEW)
+            # Same hunks with the same new-side text draw the same rows
+            signature = (key, side_by_side, tuple(map(tuple, result.hunks)),
+                         hash(tuple(itertools.chain.from_iterable(result.b_lines[hunk[0][3]:hunk[-1][4]]
+                                                        for hunk in result.hunks))))
+        except Exception as e:
+            self._session_key = None
+            self.ui_bus.post_latest(('diff', id(self)), self._show_error, request, name, e)
+            return
+        where = "the index" if base == "index" else "HEAD"
+        if oid is None:
+            summary = f"{name}: not in {where}, +{result.added}"
+        elif result.identical:
+            summary = f"{name}: no changes against {where}"
+        else:
+            summary = f"{name}: {len(result.hunks)} hunks, +{result.added} -{result.removed} against {where}"
+        self.ui_bus.post_latest(('diff', id(self)), self._show, request, side_by_side, plan, signature, summary)
+
+    # Rendering (Tk thread)
+
+    def _texts(self, side_by_side):
+        return (self.left_text, self.right_text) if side_by_side else (self.unified_text,)
+
+    def _show(self, request, side_by_side, plan, signature, summary):
+        if request != self._request or not self.exists():
+            return
+        self.summary.set(summary)
+        if signature == self._shown:
+            return  # same rows as on screen; keep scroll position and expanded parts
+        self._shown = signature
+        texts = self._texts(side_by_side)
+        top = texts[0].yview()[0]
+        self._expanders = {}
+        for text in texts:
+            text.configure(state="normal")
+            text.delete("1.0", tk.END)
+        for item in plan:
+            if item[0] == 'rows':
+                self._insert_rows(texts, tk.END, item[1])
+            else:
+                self._insert_expander(texts, tk.END, *item[1:])
+        for text in texts:
+            text.configure(state="disabled")
+            text.yview_moveto(top)
+
+    def _show_message(self, message):
+        self._shown = None
+        self.summary.set("")
+        for text in (self.unified_text, self.left_text, self.right_text):
+            text.configure(state="normal")
+            text.delete("1.0", tk.END)
+            text.insert("1.0", message)
+            text.configure(state="disabled")
+
+    def _show_text(self, request, message):
+        if request == self._request and self.exists():
+            self._show_message(message)
+
+    def _show_error(self, request, name, error):
+        self._show_text(request, f"Cannot diff {name}: {error}")
+
+    def _insert_rows(self, texts, index, rows):
+        for column, text in enumerate(texts):
+            args = []
+            for row in rows:
+                args += row[column]
+            if args:
+                text.insert(index, *args)
+
+    def _insert_expander(self, texts, index, count, label, rows):
+        tag = f"more{next(self._tags)}"
+        self._expanders[tag] = (count, label, rows)
+        for text in texts:
+            text.insert(index, f"... {count} more {label} (click to show)\n", ('more', tag))
+            text.tag_bind(tag, "<Button-1>", lambda event, tag=tag: self._expand(tag))
+            text.tag_bind(tag, "<Enter>", lambda event, text=text: text.configure(cursor="hand2"))
+            text.tag_bind(tag, "<Leave>", lambda event, text=text: text.configure(cursor=""))
+
+    def _expand(self, tag):
+        entry = self._expanders.pop(tag, None)
+        if entry is None:
+            return
+        count, label, rows = entry
+        texts = self._texts(self.mode.get() == "split")
+        chunk = list(itertools.islice(rows, self.EXPAND_ROWS))
+        # Rows are one line in every widget, so the marker sits on the same line in all of them
+        index = texts[0].index(f"{tag}.first")
+        for text in texts:
+            text.configure(state="normal")
+            text.delete(f"{tag}.first", f"{tag}.last")
+            text.tag_delete(tag)
+        self._insert_rows(texts, index, chunk)
+        if count > len(chunk):
+            self._insert_expander(texts, f"{index} + {len(chunk)} lines", count - len(chunk), label, rows)
+        for text in texts:
+            text.configure(state="disabled")
+
+    # Side-by-side scrolling
+
+    def _split_yview(self, *args):
+        self.left_text.yview(*args)
+        self.right_text.yview(*args)
+
+    def _split_scrolled(self, other, first, last):
+        self.split_scrollbar.set(first, last)
+        if other.yview()[0] != float(first):
+            other.yview_moveto(first)
+
+
+def _text_of(data):
+    """Decoded text with editor newlines, or None for binary data"""
+    if b'\0' in data[:BINARY_SNIFF_SIZE]:
+        return None
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n')
@@ -0,0 +1,94 @@
+import os
+import subprocess
+
+from tracing import tracer
+
+# Directories never worth listing when a folder is not a git repository
+PRUNED_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv'}
+
+
+def list_repo_files(dir_path, include_untracked=True, on_batch=None, batch_size=2000, should_stop=None):
+    """List the files of a working tree in batches.
+
+    Inside a git repository the list comes from ``git ls-files -z``: tracked
+    files plus, when ``include_untracked`` is set, untracked files that are not
+    ignored, so ``.git`` and ignored directories are never walked. Elsewhere it
+    falls back to ``os.walk`` with ``PRUNED_DIRS`` pruned. Each batch of
+    relative paths is passed to ``on_batch``; ``should_stop()`` can abort early.
+    Returns the total number of files listed.
+    """
+    total = _list_git_files(dir_path, include_untracked, on_batch, batch_size, should_stop)
+    if total is None:
+        total = _walk_files(dir_path, on_batch, batch_size, should_stop)
+    return total
+
+
+def _list_git_files(dir_path, include_untracked, on_batch, batch_size, should_stop):
+    git_cmd = ['git', 'ls-files', '-z', '--cached']
+    if include_untracked:
+        git_cmd += ['--others', '--exclude-standard']
+    span = tracer.start('git', git_cmd, dir_path)
+    try:
+        process = subprocess.Popen(git_cmd, cwd=dir_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        span.finish(error=e)
+        return None
+    bytes_out = 0
+
+    total = 0
+    batch = []
+    previous = None
+    remainder = b''
+    try:
+        for data in iter(lambda: process.stdout.read(64 * 1024), b''):
+            bytes_out += len(data)
+            parts = (remainder + data).split(b'\0')
+            remainder = parts.pop()
+            for part in parts:
+                # Conflicted files are listed once per stage, keep one entry
+                if part == previous:
+                    continue
+                previous = part
+                batch.append(os.fsdecode(part))
+            if len(batch) >= batch_size:
+                total += len(batch)
+                if on_batch:
+                    on_batch(batch)
+                batch = []
+            if should_stop and should_stop():
+                process.kill()
+                break
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+        span.finish(returncode, bytes_out)
+
+    if returncode != 0 and not (should_stop and should_stop()):
+        # Not a git repository (or git failed before producing output)
+        return None if total == 0 else total
+    if batch:
+        total += len(batch)
+        if on_batch:
+            on_batch(batch)
+    return total
+
+
+def _walk_files(dir_path, on_batch, batch_size, should_stop):
+    total = 0
+    batch = []
+    for root, dirs, files in os.walk(dir_path):
+        dirs[:] = sorted(d for d in dirs if d not in PRUNED_DIRS)
+        for file in sorted(files):
+            batch.append(os.path.relpath(os.path.join(root, file), dir_path))
+        if len(batch) >= batch_size:
+            total += len(batch)
+            if on_batch:
+                on_batch(batch)
+            batch = []
+        if should_stop and should_stop():
+            return total
+    if batch:
+        total += len(batch)
+        if on_batch:
+            on_batch(batch)
+    return total
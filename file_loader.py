@@ -0,0 +1,211 @@
+import tkinter as tk
+from tkinter import ttk
+import mmap
+import os
+
+# Files above this size open in the read-only windowed viewer
+EDITOR_SIZE_LIMIT = 2 * 1024 * 1024
+
+LFS_POINTER_PREFIX = b"version https://git-lfs.github.com/spec/v1"
+LFS_POINTER_MAX_SIZE = 1024
+
+# Same heuristic as git: a NUL byte in the first 8000 bytes means binary
+BINARY_SNIFF_SIZE = 8000
+
+
+def classify_file(path, size_limit=EDITOR_SIZE_LIMIT):
+    """Return ``(kind, size)`` with kind one of 'text', 'large', 'binary' or 'lfs'"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(BINARY_SNIFF_SIZE)
+    if size <= LFS_POINTER_MAX_SIZE and head.startswith(LFS_POINTER_PREFIX):
+        return 'lfs', size
+    if b'\0' in head:
+        return 'binary', size
+    if size > size_limit:
+        return 'large', size
+    return 'text', size
+
+
+class MappedFile:
+    """Read-only memory map of a file, read in windows"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+    def text_window(self, start, length):
+        """Decode about ``length`` bytes from ``start``, ending on a line break
+        (or at least on a UTF-8 character boundary); return ``(text, end)``"""
+        end = min(self.size, start + length)
+        if end < self.size:
+            newline = self._map.find(b'\n', end, min(self.size, end + 4096))
+            if newline != -1:
+                end = newline + 1
+            else:
+                while end > start and (self._map[end] & 0xC0) == 0x80:
+                    end -= 1
+        return self.decode(start, end), end
+
+    def decode(self, start, end):
+        return self._map[start:end].decode('utf-8', errors='replace')
+
+    def count_lines(self, start, end):
+        return self._map[start:end].count(b'\n')
+
+    def line_start_before(self, offset, limit=4096):
+        """Offset of the start of the line containing ``offset``"""
+        if offset <= 0:
+            return 0
+        newline = self._map.rfind(b'\n', max(0, offset - limit), offset)
+        return newline + 1 if newline != -1 else offset
+
+    def hex_window(self, start, length):
+        """Hex dump of ``length`` bytes from ``start`` (16 bytes per line)"""
+        start -= start % 16
+        end = min(self.size, start + length)
+        lines = []
+        for offset in range(start, end, 16):
+            row = self._map[offset:min(offset + 16, end)]
+            hex_part = ' '.join(f'{byte:02x}' for byte in row)
+            text_part = ''.join(chr(byte) if 32 <= byte < 127 else '.' for byte in row)
+            lines.append(f'{offset:010x}  {hex_part:<47}  {text_part}\n')
+        return ''.join(lines), end
+
+    def close(self):
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+
+class LargeFileView(ttk.Frame):
+    """Read-only viewer that pages through a memory-mapped file.
+
+    Only a window of about ``window_chunks`` chunks is ever in the Text widget;
+    scrolling past either edge swaps in the neighbouring chunk, so the cost of
+    opening a file does not depend on its size. Binary files are shown as a
+    hex dump.
+    """
+
+    def __init__(self, master, chunk_size=256 * 1024, window_chunks=3, **text_options):
+        super().__init__(master)
+        self.chunk_size = chunk_size
+        self.window_chunks = window_chunks
+        self.mapped = None
+        self.hex_mode = False
+        self._chunks = []          # (start, end) byte ranges currently shown
+        self._page_pending = False
+        self._kind_label = ""
+
+        self.info = tk.StringVar()
+        ttk.Label(self, textvariable=self.info, style="TLabel").pack(anchor="w")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical")
+        self.text = tk.Text(self, yscrollcommand=self._on_yscroll, wrap="none", **text_options)
+        self.scrollbar.configure(command=self.text.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.text.pack(side="left", fill="both", expand=True)
+
+    def open(self, path, kind):
+        self.close()
+        self.mapped = MappedFile(path)
+        self.hex_mode = kind == 'binary'
+        self._chunks = []
+        self._set_text("")
+        self._append_chunk(0)
+        self._update_info(kind)
+
+    def close(self):
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        self._chunks = []
+        self._set_text("")
+
+    def _read(self, start):
+        if self.hex_mode:
+            return self.mapped.hex_window(start, self.chunk_size)
+        return self.mapped.text_window(start, self.chunk_size)
+
+    def _set_text(self, text):
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", text)
+        self.text.configure(state="disabled")
+
+    def _update_info(self, kind=None):
+        if self.mapped is None:
+            return
+        start = self._chunks[0][0] if self._chunks else 0
+        end = self._chunks[-1][1] if self._chunks else 0
+        label = {'binary': "Binary file (hex)", 'large': "Large file", 'lfs': "Git LFS pointer"}.get(kind)
+        if label:
+            self._kind_label = label
+        self.info.set(f"{self._kind_label}, read-only: bytes {start:,}-{end:,} of {self.mapped.size:,}")
+
+    def _append_chunk(self, start):
+        text, end = self._read(start)
+        if end <= start:
+            return False
+        self.text.configure(state="normal")
+        self.text.insert(tk.END, text)
+        self._chunks.append((start, end))
+        if len(self._chunks) > self.window_chunks:
+            first_start, first_end = self._chunks.pop(0)
+            removed_lines = self._line_count(first_start, first_end)
+            self.text.delete("1.0", f"{removed_lines + 1}.0")
+        self.text.configure(state="disabled")
+        return True
+
+    def _prepend_chunk(self, end):
+        if self.hex_mode:
+            start = max(0, end - self.chunk_size)
+            start -= start % 16
+        else:
+            start = self.mapped.line_start_before(max(0, end - self.chunk_size))
+        if self.hex_mode:
+            text, _ = self.mapped.hex_window(start, end - start)
+        else:
+            text = self.mapped.decode(start, end)
+        self.text.configure(state="normal")
+        self.text.insert("1.0", text)
+        self._chunks.insert(0, (start, end))
+        if len(self._chunks) > self.window_chunks:
+            self._chunks.pop()
+            keep = sum(self._line_count(s, e) for s, e in self._chunks)
+            self.text.delete(f"{keep + 1}.0", tk.END)
+        self.text.configure(state="disabled")
+        return text.count('\n')
+
+    def _line_count(self, start, end):
+        if self.hex_mode:
+            return (end - start + 15) // 16
+        return self.mapped.count_lines(start, end)
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.mapped is None or self._page_pending or not self._chunks:
+            return
+        if float(last) >= 1.0 and self._chunks[-1][1] < self.mapped.size:
+            self._page_pending = True
+            self.after_idle(self._page_down)
+        elif float(first) <= 0.0 and self._chunks[0][0] > 0:
+            self._page_pending = True
+            self.after_idle(self._page_up)
+
+    def _page_down(self):
+        self._page_pending = False
+        top_line = int(self.text.index("@0,0").split('.')[0])
+        before = self._chunks[0]
+        if self._append_chunk(self._chunks[-1][1]):
+            if self._chunks[0] != before:
+                top_line -= self._line_count(*before)
+            self.text.yview(f"{max(top_line, 1)}.0")
+        self._update_info()
+
+    def _page_up(self):
+        self._page_pending = False
+        added = self._prepend_chunk(self._chunks[0][0])
+        self.text.yview(f"{added + 1}.0")
+        self._update_info()
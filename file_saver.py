@@ -0,0 +1,122 @@
+import hashlib
+import os
+import tempfile
+
+from cat_file import CatFileError, ObjectMissing, pool_for
+from commit_history import find_git_dir, find_toplevel
+
+# Atomic writes go through a temporary file with this suffix next to the target
+TEMP_SUFFIX = '.savetmp'
+
+
+def blob_oid(data):
+    """Object id git would give ``data`` as a blob (SHA-1 repositories)"""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def atomic_write(path, data):
+    """Write ``data`` to ``path`` via a temporary file, fsync and rename"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix=TEMP_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        # Make the rename itself durable
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class SaveResult:
+    def __init__(self, written, matches_index=None):
+        self.written = written
+        # True/False once the index blob is known, None outside a repo or for untracked files
+        self.matches_index = matches_index
+
+
+class SaveTracker:
+    """Change-aware saving for the files of one working tree.
+
+    The blob id and stat of every file loaded or saved is remembered, so a save
+    whose buffer hashes to what is already on disk is skipped without touching
+    the file (and usually without even reading it). After a real write, the
+    new content is compared with the blob in the index, so the caller can tell
+    whether the file's git status could have changed.
+    """
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        # Index paths are relative to the top of the tree, even when
+        # ``repo_path`` is a subdirectory of it
+        self.toplevel = find_toplevel(repo_path) or repo_path
+        self.index_path = os.path.join(find_git_dir(self.toplevel), 'index')
+        self._known = {}        # path -> ((mtime_ns, size), blob oid) of the content on disk
+        self._index_oids = {}   # relative path -> (index stat, blob oid or None)
+
+    def remember(self, path, data):
+        """Record ``data`` as the current on-disk content of ``path``"""
+        self._known[path] = (self._stat(path), blob_oid(data))
+
+    def save(self, path, data):
+        oid = blob_oid(data)
+        known = self._known.get(path)
+        stat = self._stat(path)
+        if known is not None and known[0] == stat and stat is not None:
+            unchanged = known[1] == oid
+        else:
+            try:
+                with open(path, 'rb') as f:
+                    unchanged = blob_oid(f.read()) == oid
+            except FileNotFoundError:
+                unchanged = False
+        if unchanged:
+            self._known[path] = (stat, oid)
+            return SaveResult(False)
+
+        atomic_write(path, data)
+        self._known[path] = (self._stat(path), oid)
+        index_oid = self.index_oid(path)
+        return SaveResult(True, None if index_oid is None else index_oid == oid)
+
+    def index_oid(self, path):
+        """Blob id staged for ``path``; None if untracked or not in a repo"""
+        relative = os.path.relpath(path, self.toplevel).replace(os.sep, '/')
+        index_stat = self._stat(self.index_path)
+        cached = self._index_oids.get(relative)
+        if cached is not None and cached[0] == index_stat:
+            return cached[1]
+        if relative.startswith('../'):
+            return None
+        # ":<path>" names the staged blob; the pool keeps one cat-file process
+        # per repository instead of spawning git on every save
+        try:
+            oid = pool_for(self.toplevel).info(':' + relative)[0]
+        except ObjectMissing:
+            oid = None
+        except (CatFileError, ValueError):
+            return None
+        self._index_oids[relative] = (index_stat, oid)
+        return oid
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
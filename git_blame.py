@@ -0,0 +1,155 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Commit id git blame reports for lines that are not committed yet
+NOT_COMMITTED = '0' * 40
+
+
+class BlameCommit:
+    """Metadata of one commit, as printed the first time blame mentions it"""
+
+    __slots__ = ('oid', 'author', 'author_mail', 'author_time', 'summary', 'previous', 'boundary')
+
+    def __init__(self, oid):
+        self.oid = oid
+        self.author = ''
+        self.author_mail = ''
+        self.author_time = 0
+        self.summary = ''
+        self.previous = None
+        self.boundary = False
+
+    @property
+    def committed(self):
+        return self.oid != NOT_COMMITTED
+
+    def set(self, key, value):
+        if key == 'author':
+            self.author = value
+        elif key == 'author-mail':
+            self.author_mail = value
+        elif key == 'author-time':
+            self.author_time = int(value)
+        elif key == 'summary':
+            self.summary = value
+        elif key == 'previous':
+            self.previous = value
+        elif key == 'boundary':
+            self.boundary = True
+
+
+class BlameEntry:
+    """``count`` lines starting at 1-based ``final_line`` come from ``commit``"""
+
+    __slots__ = ('commit', 'orig_line', 'final_line', 'count', 'filename')
+
+    def __init__(self, commit, orig_line, final_line, count, filename):
+        self.commit = commit
+        self.orig_line = orig_line
+        self.final_line = final_line
+        self.count = count
+        self.filename = filename
+
+
+class IncrementalBlameParser:
+    """Parser for ``git blame --incremental`` output fed in arbitrary pieces.
+
+    git prints a commit's headers only with its first entry; later entries
+    for the same commit carry just the line numbers and the filename. The
+    parser keeps every BlameCommit in ``commits`` (which may be shared
+    between runs) and hands each entry the same object.
+    """
+
+    def __init__(self, commits=None):
+        self.commits = {} if commits is None else commits
+        self._buffer = ''
+        self._header = None
+        self._commit = None
+
+    def feed(self, text):
+        """Parse more output; return the entries completed by it"""
+        lines = (self._buffer + text).split('\n')
+        self._buffer = lines.pop()
+        entries = []
+        for line in lines:
+            if self._header is None:
+                if not line:
+                    continue
+                oid, orig_line, final_line, count = line.split(' ')
+                self._header = (int(orig_line), int(final_line), int(count))
+                self._commit = self.commits.get(oid)
+                if self._commit is None:
+                    self._commit = self.commits[oid] = BlameCommit(oid)
+            else:
+                key, _, value = line.partition(' ')
+                if key == 'filename':
+                    entries.append(BlameEntry(self._commit, *self._header, value))
+                    self._header = None
+                else:
+                    self._commit.set(key, value)
+        return entries
+
+
+class BlameResult:
+    """Lines of one blob and, as far as known, the commit of each line"""
+
+    def __init__(self, path, blob_oid, lines):
+        self.path = path
+        self.blob_oid = blob_oid
+        self.lines = lines
+        self.line_commits = [None] * len(lines)
+        self.annotated = 0
+        self.complete = False
+
+    def apply(self, entry):
+        """Record one entry; return the 0-based range of lines it covered"""
+        start = entry.final_line - 1
+        end = min(start + entry.count, len(self.lines))
+        for index in range(start, end):
+            if self.line_commits[index] is None:
+                self.annotated += 1
+            self.line_commits[index] = entry.commit
+        return start, end
+
+
+def worktree_blob_oid(data):
+    """Object id ``git hash-object`` gives the bytes (without filters)"""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def split_blob_lines(data):
+    """Decoded lines as numbered by blame: split on '\\n', CR dropped"""
+    text = data.decode('utf-8', errors='replace')
+    lines = text.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    return [line[:-1] if line.endswith('\r') else line for line in lines]
+
+
+class BlameCache:
+    """Finished blame results, keyed by repository, path, blob id and options.
+
+    The blob id pins the content, so a file re-opened unchanged is shown
+    from here without running git. Least recently used results are dropped
+    beyond ``max_entries``. Thread-safe.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
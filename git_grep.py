@@ -0,0 +1,271 @@
+import os
+import subprocess
+import threading
+from array import array
+
+from cat_file import ObjectMissing, pool_for
+from repo_cache import repo_fingerprint
+from tracing import tracer
+
+
+class GrepError(Exception):
+    """git grep rejected the search (e.g. an invalid regular expression)"""
+
+
+class GrepMatch:
+    __slots__ = ('path', 'line', 'text')
+
+    def __init__(self, path, line, text):
+        self.path = path
+        self.line = line
+        self.text = text
+
+    def __repr__(self):
+        return f"GrepMatch({self.path!r}, {self.line}, {self.text!r})"
+
+
+# How often a silent git grep is checked for cancellation
+STOP_POLL_SECONDS = 0.02
+
+
+def grep_repo(dir_path, pattern, on_batch=None, fixed=True, ignore_case=False, word=False, paths=None,
+              max_results=1000, batch_size=100, should_stop=None, max_text=300):
+    """Search the working tree with ``git grep``, streaming matches in batches.
+
+    Tracked and untracked (not ignored) files are searched, binary files
+    skipped. ``paths`` limits the search to those relative paths. Each batch
+    of GrepMatch objects goes to ``on_batch``; git is killed once
+    ``max_results`` matches were read or ``should_stop()`` returns True,
+    which is also polled every STOP_POLL_SECONDS while git prints nothing.
+    Returns ``(count, truncated)``; raises GrepError when git refuses the
+    pattern.
+    """
+    if paths is not None and not paths:
+        return 0, False
+    git_cmd = ['git', 'grep', '-z', '-n', '-I', '--no-color', '--untracked']
+    if fixed:
+        git_cmd.append('-F')
+    else:
+        git_cmd.append('-E')
+    if ignore_case:
+        git_cmd.append('-i')
+    if word:
+        git_cmd.append('-w')
+    git_cmd += ['-e', pattern]
+    if paths is not None:
+        git_cmd += ['--'] + [f':(literal){path}' for path in paths]
+    span = tracer.start('git', git_cmd, dir_path)
+    try:
+        process = subprocess.Popen(git_cmd, cwd=dir_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        span.finish(error=e)
+        raise GrepError(str(e)) from e
+
+    finished = threading.Event()
+    cancelled = threading.Event()
+
+    def watch():
+        # A search over a large tree may print nothing for a long time, so
+        # cancelling must not wait for the next read to return
+        while not finished.wait(STOP_POLL_SECONDS):
+            if should_stop():
+                cancelled.set()
+                process.kill()
+                return
+
+    if should_stop is not None:
+        threading.Thread(target=watch, name="grep-cancel", daemon=True).start()
+
+    count = 0
+    truncated = False
+    stopped = False
+    batch = []
+    remainder = b''
+    bytes_out = 0
+    try:
+        for data in iter(lambda: process.stdout.read(64 * 1024), b''):
+            bytes_out += len(data)
+            records = (remainder + data).split(b'\n')
+            remainder = records.pop()
+            for record in records:
+                fields = record.split(b'\0', 2)
+                if len(fields) != 3:
+                    continue
+                batch.append(GrepMatch(os.fsdecode(fields[0]), int(fields[1]),
+                                       fields[2][:max_text].decode('utf-8', errors='replace')))
+                count += 1
+                if count >= max_results:
+                    truncated = True
+                    break
+            if len(batch) >= batch_size or truncated:
+                if on_batch and batch:
+                    on_batch(batch)
+                batch = []
+            if truncated or (should_stop and should_stop()):
+                stopped = True
+                process.kill()
+                break
+    finally:
+        finished.set()
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+        span.finish(returncode, bytes_out, len(stderr))
+
+    stopped = stopped or cancelled.is_set()
+    if not stopped and returncode not in (0, 1):
+        # 1 only means nothing matched
+        raise GrepError(stderr.decode('utf-8', errors='replace').strip() or f"git grep exited with {returncode}")
+    if batch and on_batch:
+        on_batch(batch)
+    return count, truncated
+
+
+def _trigrams(data):
+    """Distinct byte triples of ``data``, as tuples of ints"""
+    return set(zip(data, data[1:], data[2:]))
+
+
+class TrigramIndex:
+    """In-memory trigram index over the staged contents of a repository.
+
+    ``build()`` reads every staged blob through the cat-file pool and
+    records, per distinct trigram of its ASCII-lowercased bytes, the files
+    containing it. ``candidates(text)`` then returns the files that can
+    contain ``text`` (None when the index cannot narrow the search), so a
+    repeat query only greps those files plus the ones changed since staging.
+    Repositories beyond MAX_FILES staged files or MAX_BYTES of text are not
+    indexed, which keeps the index to a few tens of MB. The index is tied to
+    the ``repo_fingerprint()`` it was built under; ``current()`` says
+    whether that still holds.
+    """
+
+    MAX_FILES = 20000
+    MAX_BYTES = 32 * 1024 * 1024
+    MAX_FILE_SIZE = 1024 * 1024
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.fingerprint = None
+        self.ready = False
+        self.too_large = False
+        self.paths = []
+        self._postings = {}
+        self._lock = threading.Lock()
+        self._builder = None
+
+    def current(self):
+        return self.ready and self.fingerprint == repo_fingerprint(self.repo_path)
+
+    def start_build(self):
+        """(Re)build on a background thread unless one is running, the
+        index is current or the repository is too large"""
+        with self._lock:
+            if self.too_large or (self._builder is not None and self._builder.is_alive()):
+                return
+            self._builder = threading.Thread(target=self._build_if_stale, name="trigram-index", daemon=True)
+            self._builder.start()
+
+    def _build_if_stale(self):
+        if not self.current():
+            self.build()
+
+    def build(self, should_stop=None):
+        """Index the staged files; runs on a worker thread. Returns False if
+        stopped, outside a repository or over the size limits."""
+        fingerprint = repo_fingerprint(self.repo_path)
+        entries = self._staged_blobs()
+        if entries is None or should_stop and should_stop():
+            return False
+        if len(entries) > self.MAX_FILES:
+            self.too_large = True
+            return False
+        sizes = pool_for(self.repo_path).read_many((oid for oid, _ in entries), batch_check=True)
+        total = 0
+        wanted = []
+        for (oid, path), info in zip(entries, sizes):
+            if isinstance(info, ObjectMissing) or info[2] > self.MAX_FILE_SIZE:
+                continue
+            total += info[2]
+            wanted.append((oid, path))
+        if total > self.MAX_BYTES:
+            self.too_large = True
+            return False
+
+        paths = []
+        postings = {}
+        for (oid, path), blob in zip(wanted, pool_for(self.repo_path).read_many(oid for oid, _ in wanted)):
+            if should_stop and should_stop():
+                return False
+            if isinstance(blob, ObjectMissing):
+                continue
+            data = blob[2]
+            if b'\0' in data[:8000]:
+                continue  # binary; git grep -I skips it too
+            file_id = len(paths)
+            paths.append(path)
+            for gram in _trigrams(data.lower()):
+                ids = postings.get(gram)
+                if ids is None:
+                    ids = postings[gram] = array('I')
+                ids.append(file_id)
+        with self._lock:
+            self.paths = paths
+            self._postings = postings
+            self.fingerprint = fingerprint
+            self.ready = True
+            self.too_large = False
+        return True
+
+    def candidates(self, text, ignore_case=False):
+        """Paths that may contain ``text`` literally, or None if unknown"""
+        query = text.encode('utf-8')
+        if not self.ready or len(query) < 3 or (ignore_case and not text.isascii()):
+            return None
+        with self._lock:
+            postings, paths = self._postings, self.paths
+        # Rarest trigram first, so the candidate set shrinks fastest
+        grams = sorted(_trigrams(query.lower()), key=lambda gram: len(postings.get(gram, ())))
+        ids = None
+        for gram in grams:
+            found = postings.get(gram)
+            if not found:
+                return []
+            ids = set(found) if ids is None else ids.intersection(found)
+            if not ids:
+                return []
+        return [paths[file_id] for file_id in sorted(ids)]
+
+    def _staged_blobs(self):
+        git_cmd = ['git', 'ls-files', '-s', '-z']
+        try:
+            result = tracer.run(git_cmd, cwd=self.repo_path, capture_output=True)
+        except OSError:
+            return None
+        if result.returncode != 0:
+            return None
+        entries = []
+        for record in result.stdout.split(b'\0'):
+            if not record:
+                continue
+            # <mode> <oid> <stage>\t<path>
+            info, _, path = record.partition(b'\t')
+            mode, oid, stage = info.split(b' ')
+            if mode.startswith(b'100') and stage == b'0':
+                entries.append((oid.decode('ascii'), os.fsdecode(path)))
+        return entries
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for(repo_path):
+    """Return the process-wide trigram index of a repository"""
+    key = os.path.realpath(repo_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = TrigramIndex(key)
+        return index
@@ -1,10 +1,22 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox
 import subprocess
 import os
 from pathlib import Path
-import threading
+import asyncio
 import base64
+from output_console import OutputConsole
+from command_scheduler import CommandScheduler
+from tracing import tracer
+from trace_view import OperationsWindow
+from ui_watchdog import UIWatchdog, StallReportWindow
+from ui_bus import UIBus
+from repo_dashboard import DashboardWindow
+from git_objects import ObjectNotFound, Repository
+from async_core import AsyncCore
+from git_blame import BlameCache
+from blame_view import BlameWindow
+from search_view import SearchWindow
 
 class AdvancedGitGUI:
     def __init__(self, root):
@@ -21,7 +33,35 @@ class AdvancedGitGUI:
         self.token = tk.StringVar()
         self.use_auth = tk.BooleanVar(value=False)
         
+        # Worker threads hand UI updates to the main thread through this bus
+        self.ui_bus = UIBus(self.root)
+        
+        # asyncio loop thread that runs git commands and API calls as coroutines
+        self.core = AsyncCore(self.ui_bus).start()
+        self.auth_task = None
+        
+        # Bounded per-repository scheduler for git commands
+        self.scheduler = CommandScheduler(
+            max_workers=4,
+            on_change=lambda: self.ui_bus.post_latest('queue', self.refresh_queue_view),
+            core=self.core
+        )
+        
+        # Recent git/HTTP operations window, created on demand
+        self.operations_window = None
+        # Multi-repository dashboard, created on demand
+        self.dashboard_window = None
+        # Finished blames by (path, blob id), so re-opening a file is instant
+        self.blame_cache = BlameCache()
+        self.search_window = None
+        
         self.setup_gui()
+        self.ui_bus.start()
+        
+        # Logs callbacks that block the mainloop; see "UI Stalls"
+        self.watchdog = UIWatchdog(self.root)
+        self.watchdog.start()
+        self.stall_window = None
         
     def setup_gui(self):
         # Create main frame
@@ -82,7 +122,7 @@ class AdvancedGitGUI:
             'clone', 'init', 'add', 'status', 'commit', 'push', 'pull', 'fetch',
             'branch', 'checkout', 'merge', 'rebase', 'log', 'diff', 'remote',
             'stash', 'tag', 'reset', 'revert', 'cherry-pick', 'bisect', 'blame',
-            'clean', 'config', 'show', 'rm', 'mv', 'restore', 'switch', 'worktree'
+            'grep', 'clean', 'config', 'show', 'rm', 'mv', 'restore', 'switch', 'worktree'
         ]
         self.command_combo.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=5)
         self.command_combo.bind('<<ComboboxSelected>>', self.on_command_select)
@@ -108,12 +148,34 @@ class AdvancedGitGUI:
         output_frame.rowconfigure(0, weight=1)
         main_frame.rowconfigure(5, weight=1)
         
-        self.output_text = scrolledtext.ScrolledText(output_frame, height=20, width=100)
+        # Bounded console: only a window of recent output is kept in the widget,
+        # the rest spills to an on-disk log and is paged back in on scroll
+        self.output_text = OutputConsole(output_frame, max_lines=5000, height=20, width=100)
         self.output_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.output_text.tag_configure("stderr", foreground="#b00000")
+        
+        # Command queue
+        queue_frame = ttk.LabelFrame(main_frame, text="Command Queue", padding="5")
+        queue_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        queue_frame.columnconfigure(0, weight=1)
+        
+        self.queue_view = ttk.Treeview(queue_frame, columns=("state", "command", "repo"), height=4)
+        self.queue_view.heading("#0", text="#")
+        self.queue_view.heading("state", text="State")
+        self.queue_view.heading("command", text="Command")
+        self.queue_view.heading("repo", text="Repository")
+        self.queue_view.column("#0", width=50, stretch=False)
+        self.queue_view.column("state", width=90, stretch=False)
+        self.queue_view.column("command", width=400)
+        self.queue_view.column("repo", width=300)
+        self.queue_view.grid(row=0, column=0, rowspan=2, sticky=(tk.W, tk.E))
+        
+        ttk.Button(queue_frame, text="Cancel Selected", command=self.cancel_selected_command).grid(row=0, column=1, padx=5, sticky=tk.N)
+        ttk.Button(queue_frame, text="Cancel All", command=self.scheduler.cancel_all).grid(row=1, column=1, padx=5, sticky=tk.N)
         
         # Buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=6, column=0, columnspan=2, pady=10)
+        button_frame.grid(row=7, column=0, columnspan=2, pady=10)
         
         ttk.Button(button_frame, text="Execute Command", command=self.execute_command).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Clear Output", command=self.clear_output).pack(side=tk.LEFT, padx=5)
@@ -121,6 +183,9 @@ class AdvancedGitGUI:
         ttk.Button(button_frame, text="Configure Git User", command=self.configure_git_user).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Save Auth", command=self.save_auth).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Load Auth", command=self.load_auth).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Operations", command=self.show_operations).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="UI Stalls", command=self.show_stalls).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Dashboard", command=self.show_dashboard).pack(side=tk.LEFT, padx=5)
         
         # Initially disable auth fields
         self.toggle_auth_fields()
@@ -153,7 +218,7 @@ class AdvancedGitGUI:
             return
         
         try:
-            subprocess.run(['git', 'init'], cwd=path, check=True, capture_output=True, text=True)
+            tracer.run(['git', 'init'], cwd=path, check=True, capture_output=True, text=True)
             messagebox.showinfo("Success", f"Initialized Git repository at {path}")
         except subprocess.CalledProcessError as e:
             messagebox.showerror("Error", f"Failed to initialize repository: {e.stderr}")
@@ -166,11 +231,11 @@ class AdvancedGitGUI:
         
         try:
             # Set global user name
-            subprocess.run(['git', 'config', '--global', 'user.name', self.username.get()], 
+            tracer.run(['git', 'config', '--global', 'user.name', self.username.get()], 
                          check=True, capture_output=True, text=True)
             
             # Set global user email
-            subprocess.run(['git', 'config', '--global', 'user.email', self.email.get()], 
+            tracer.run(['git', 'config', '--global', 'user.email', self.email.get()], 
                          check=True, capture_output=True, text=True)
             
             messagebox.showinfo("Success", "Git user configuration updated globally")
@@ -215,20 +280,22 @@ class AdvancedGitGUI:
             messagebox.showwarning("Warning", "Please enter a token")
             return
         
-        def test_auth_thread():
-            headers = self.setup_authentication_headers()
-            try:
-                import requests
-                response = requests.get('https://api.github.com/user', headers=headers)
-                
-                self.root.after(0, lambda: self.display_auth_test_result(response))
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Authentication test failed: {str(e)}"))
-        
-        threading.Thread(target=test_auth_thread, daemon=True).start()
+        from github_api import shared_client
+        headers = self.setup_authentication_headers()
+        # A newer test replaces one still waiting for GitHub
+        if self.auth_task is not None:
+            self.auth_task.cancel()
+        self.auth_task = self.core.submit(
+            self.core.http(shared_client().get, '/user', headers=headers),
+            on_done=self.display_auth_test_result
+        )
     
-    def display_auth_test_result(self, response):
-        if response.status_code == 200:
+    def display_auth_test_result(self, response, error=None):
+        if isinstance(error, asyncio.CancelledError):
+            return
+        if error is not None:
+            messagebox.showerror("Error", f"Authentication test failed: {str(error)}")
+        elif response.status_code == 200:
             user_data = response.json()
             messagebox.showinfo("Success", 
                               f"Authentication successful!\n\n"
@@ -327,6 +394,27 @@ class AdvancedGitGUI:
             entry.grid(row=row, column=1, sticky=(tk.W, tk.E), pady=2, padx=(5, 0))
             return var
             
+    def create_ref_field(self, row, label):
+        """Editable field offering the repository's branches and tags"""
+        ttk.Label(self.parameters_frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=2)
+        var = tk.StringVar()
+        combo = ttk.Combobox(self.parameters_frame, textvariable=var, values=self.list_refs())
+        combo.grid(row=row, column=1, sticky=(tk.W, tk.E), pady=2, padx=(5, 0))
+        return var
+
+    def list_refs(self):
+        """Branch and tag names, read from the ref files without running git"""
+        try:
+            repo = Repository(self.repo_path.get(), cache_bytes=0)
+        except (ObjectNotFound, OSError, ValueError):
+            return []
+        try:
+            return repo.branches() + repo.tags()
+        except OSError:
+            return []
+        finally:
+            repo.close()
+
     def create_checkbox(self, row, label, default=False):
         """Create a checkbox"""
         var = tk.BooleanVar(value=default)
@@ -395,6 +483,10 @@ class AdvancedGitGUI:
             self.setup_restore_options()
         elif command == 'switch':
             self.setup_switch_options()
+        elif command == 'blame':
+            self.setup_blame_options()
+        elif command == 'grep':
+            self.setup_grep_options()
             
     def setup_auth_specific_options(self):
         """Add authentication-specific options for remote operations"""
@@ -459,13 +551,13 @@ class AdvancedGitGUI:
         self.list_branches = self.create_checkbox(5, "List branches (-l)")
         
     def setup_checkout_options(self):
-        self.checkout_target = self.create_input_field(0, "Branch/commit:")
+        self.checkout_target = self.create_ref_field(0, "Branch/commit:")
         self.new_branch_checkout = self.create_checkbox(1, "Create new branch (-b)")
         self.force_checkout = self.create_checkbox(2, "Force checkout (--force)")
         self.detach_checkout = self.create_checkbox(3, "Detach HEAD (--detach)")
         
     def setup_merge_options(self):
-        self.merge_branch = self.create_input_field(0, "Branch to merge:")
+        self.merge_branch = self.create_ref_field(0, "Branch to merge:")
         self.no_ff_merge = self.create_checkbox(1, "No fast-forward (--no-ff)")
         self.squash_merge = self.create_checkbox(2, "Squash merge (--squash)")
         self.abort_merge = self.create_checkbox(3, "Abort merge (--abort)")
@@ -582,11 +674,31 @@ class AdvancedGitGUI:
         self.detach_switch = self.create_checkbox(2, "Detach HEAD (--detach)")
         self.force_switch = self.create_checkbox(3, "Force (--force)")
         
+    def setup_blame_options(self):
+        self.blame_file = self.create_input_field(0, "File:")
+        self.blame_rev = self.create_ref_field(1, "Revision (optional):")
+        self.blame_ignore_whitespace = self.create_checkbox(2, "Ignore whitespace (-w)")
+        self.blame_moves = self.create_checkbox(3, "Detect moved lines (-M)")
+        self.blame_copies = self.create_checkbox(4, "Detect copied lines (-C)")
+        self.blame_plain = self.create_checkbox(5, "Plain text in the output area")
+        
+    def setup_grep_options(self):
+        self.grep_pattern = self.create_input_field(0, "Search for:")
+        self.grep_ignore_case = self.create_checkbox(1, "Ignore case (-i)")
+        self.grep_regex = self.create_checkbox(2, "Regular expression (-E)")
+        self.grep_plain = self.create_checkbox(3, "Plain text in the output area")
+        
     def execute_command(self):
         command = self.command_var.get()
         if not command:
             messagebox.showwarning("Warning", "Please select a Git command")
             return
+        if command == 'blame' and not self.blame_plain.get():
+            self.show_blame()
+            return
+        if command == 'grep' and not self.grep_plain.get():
+            self.show_search()
+            return
             
         # Build command based on selected options
         git_cmd = ["git"]
@@ -600,8 +712,7 @@ class AdvancedGitGUI:
         if additional_args:
             git_cmd.extend(additional_args.split())
             
-        # Execute in thread to prevent GUI freezing
-        threading.Thread(target=self.run_git_command, args=(git_cmd,), daemon=True).start()
+        self.submit_git_command(git_cmd)
         
     def build_command_arguments(self, command):
         args = []
@@ -687,67 +798,167 @@ class AdvancedGitGUI:
                 if hasattr(self, 'branch_name') and self.branch_name.get():
                     args.append(self.branch_name.get())
                     
+            elif command == 'blame':
+                args.extend(self.blame_options())
+                if hasattr(self, 'blame_rev') and self.blame_rev.get():
+                    args.append(self.blame_rev.get())
+                if hasattr(self, 'blame_file') and self.blame_file.get():
+                    args.extend(["--", self.blame_file.get()])
+                    
+            elif command == 'grep':
+                args.append("-n")
+                if hasattr(self, 'grep_ignore_case') and self.grep_ignore_case.get():
+                    args.append("-i")
+                args.append("-E" if hasattr(self, 'grep_regex') and self.grep_regex.get() else "-F")
+                if hasattr(self, 'grep_pattern') and self.grep_pattern.get():
+                    args.extend(["-e", self.grep_pattern.get()])
+                    
             # Add more command-specific logic as needed...
             
         except Exception as e:
-            self.output_text.insert(tk.END, f"Error building command: {str(e)}\n")
+            self.output_text.write(f"Error building command: {str(e)}\n")
             
         return args
         
-    def run_git_command(self, git_cmd):
-        try:
-            self.output_text.insert(tk.END, f"Executing: {' '.join(git_cmd)}\n")
-            self.output_text.insert(tk.END, f"in directory: {self.repo_path.get()}\n")
-            self.output_text.see(tk.END)
+    def submit_git_command(self, git_cmd):
+        """Queue a git command on the scheduler for the current repository"""
+        repo = self.repo_path.get()
+        # Tk variables are read here, on the main thread, never by the worker
+        env = self.build_git_env()
+        # run_git_command is a coroutine; the scheduler runs it on self.core
+        self.scheduler.submit(repo, git_cmd, lambda job: self.run_git_command(git_cmd, job, env))
+        
+    def cancel_selected_command(self):
+        """Cancel the queued or running commands selected in the queue view"""
+        for item in self.queue_view.selection():
+            self.scheduler.cancel(int(item))
             
-            # Set environment variables for authentication if needed
-            env = os.environ.copy()
-            if self.use_auth.get() and self.token.get():
-                # Set environment variables that Git might use
-                if self.username.get():
-                    env['GIT_USERNAME'] = self.username.get()
-                if self.email.get():
-                    env['GIT_EMAIL'] = self.email.get()
-                env['GIT_ASKPASS'] = 'echo'  # Basic workaround for credential prompts
+    def refresh_queue_view(self):
+        self.queue_view.delete(*self.queue_view.get_children())
+        for job in self.scheduler.jobs():
+            self.queue_view.insert("", tk.END, iid=str(job.id), text=str(job.id),
+                                   values=(job.state, job.label, job.repo))
+        children = self.queue_view.get_children()
+        if children:
+            self.queue_view.see(children[-1])
             
-            result = subprocess.run(
+    def build_git_env(self):
+        """Environment for git commands; call on the main thread"""
+        env = os.environ.copy()
+        if self.use_auth.get() and self.token.get():
+            # Set environment variables that Git might use
+            if self.username.get():
+                env['GIT_USERNAME'] = self.username.get()
+            if self.email.get():
+                env['GIT_EMAIL'] = self.email.get()
+            env['GIT_ASKPASS'] = 'echo'  # Basic workaround for credential prompts
+        return env
+        
+    async def run_git_command(self, git_cmd, job=None, env=None):
+        """Coroutine on the async core; all output goes through the UI bus"""
+        cwd = job.repo if job else self.repo_path.get()
+        try:
+            self.ui_bus.post(self.display_output, [
+                ('stdout', f"Executing: {' '.join(git_cmd)}\n"),
+                ('stdout', f"in directory: {cwd}\n"),
+            ])
+            
+            # Stream output while the command runs instead of buffering it all;
+            # cancelling the job cancels this coroutine, which kills git
+            result = await self.core.git(
                 git_cmd,
-                cwd=self.repo_path.get(),
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                env=env
+                cwd=cwd,
+                env=env,
+                on_output=lambda chunks: self.ui_bus.post(self.display_output, chunks),
+                capture=False
             )
+            self.ui_bus.post(self.display_result, result.returncode)
             
-            self.root.after(0, self.display_result, result)
-            
+        except asyncio.CancelledError:
+            self.ui_bus.post(self.display_result, None, True)
+            raise
         except Exception as e:
-            self.root.after(0, lambda: self.output_text.insert(tk.END, f"Error: {str(e)}\n"))
+            self.ui_bus.post(self.display_output, [('stdout', f"Error: {str(e)}\n")])
             
-    def display_result(self, result):
-        if result.stdout:
-            self.output_text.insert(tk.END, "STDOUT:\n")
-            self.output_text.insert(tk.END, result.stdout + "\n")
-            
-        if result.stderr:
-            self.output_text.insert(tk.END, "STDERR:\n")
-            self.output_text.insert(tk.END, result.stderr + "\n")
-            
-        self.output_text.insert(tk.END, f"Return code: {result.returncode}\n")
-        self.output_text.insert(tk.END, "-" * 80 + "\n")
-        self.output_text.see(tk.END)
+    def display_output(self, chunks):
+        """Append a batch of streamed (stream, text) chunks to the output area"""
+        for stream_name, text in chunks:
+            self.output_text.write(text, "stderr" if stream_name == 'stderr' else None)
+        
+    def display_result(self, returncode, cancelled=False):
+        if not self.output_text.ends_with_newline():
+            self.output_text.write("\n")
+        if cancelled:
+            self.output_text.write("Cancelled by user\n")
+        if returncode is not None:
+            self.output_text.write(f"Return code: {returncode}\n")
+        self.output_text.write("-" * 80 + "\n")
         
     def clear_output(self):
         """Clear the output text area"""
-        self.output_text.delete(1.0, tk.END)
+        self.output_text.clear()
+        
+    def show_operations(self):
+        """Show the timings of recent git commands and API requests"""
+        if self.operations_window is not None and self.operations_window.exists():
+            self.operations_window.lift()
+        else:
+            self.operations_window = OperationsWindow(self.root)
+        
+    def show_stalls(self):
+        """Show the code paths that blocked the UI the longest"""
+        if self.stall_window is not None and self.stall_window.exists():
+            self.stall_window.lift()
+        else:
+            self.stall_window = StallReportWindow(self.root, self.watchdog)
+        
+    def show_dashboard(self):
+        """Show status, ahead/behind and last commit of every repo under a folder"""
+        if self.dashboard_window is not None and self.dashboard_window.exists():
+            self.dashboard_window.lift()
+        else:
+            # Fetch and pull get the same environment as executed commands
+            self.dashboard_window = DashboardWindow(self.root, self.core, self.ui_bus, on_open=self.repo_path.set,
+                                                    root_dir=os.path.dirname(self.repo_path.get()),
+                                                    env=self.build_git_env())
+        
+    def blame_options(self):
+        options = []
+        if hasattr(self, 'blame_ignore_whitespace') and self.blame_ignore_whitespace.get():
+            options.append("-w")
+        if hasattr(self, 'blame_moves') and self.blame_moves.get():
+            options.append("-M")
+        if hasattr(self, 'blame_copies') and self.blame_copies.get():
+            options.append("-C")
+        return options
+        
+    def show_blame(self):
+        """Open a blame view that annotates lines as git reports them"""
+        path = self.blame_file.get().strip()
+        if not path:
+            messagebox.showwarning("Warning", "Please enter the file to blame")
+            return
+        # Additional arguments (e.g. -L 10,20) go to git blame as options
+        options = self.blame_options() + self.args_var.get().split()
+        BlameWindow(self.root, self.core, self.ui_bus, self.blame_cache, self.repo_path.get(), path,
+                    rev=self.blame_rev.get().strip(), options=options, env=self.build_git_env())
+        
+    def show_search(self):
+        """Open the search window on the repository, seeded with the pattern"""
+        if self.search_window is None or not self.search_window.exists():
+            self.search_window = SearchWindow(self.root, self.ui_bus, self.repo_path.get)
+        self.search_window.lift()
+        self.search_window.ignore_case.set(self.grep_ignore_case.get())
+        self.search_window.regex.set(self.grep_regex.get())
+        self.search_window.query.set(self.grep_pattern.get())
+        self.search_window.schedule()
         
     def show_git_help(self):
         """Show Git help for the selected command"""
         command = self.command_var.get()
         if command:
             git_cmd = ["git", command, "--help"]
-            threading.Thread(target=self.run_git_command, args=(git_cmd,), daemon=True).start()
+            self.submit_git_command(git_cmd)
         else:
             messagebox.showinfo("Git Help", "Please select a command first")
 
@@ -755,6 +966,8 @@ def main():
     root = tk.Tk()
     app = AdvancedGitGUI(root)
     root.mainloop()
+    app.scheduler.shutdown()
+    app.core.shutdown()
 
 if __name__ == "__main__":
     main()
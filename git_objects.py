@@ -0,0 +1,567 @@
+import heapq
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+from commit_history import find_git_dir
+
+OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG = 1, 2, 3, 4
+OBJ_OFS_DELTA, OBJ_REF_DELTA = 6, 7
+TYPE_NAMES = {OBJ_COMMIT: 'commit', OBJ_TREE: 'tree', OBJ_BLOB: 'blob', OBJ_TAG: 'tag'}
+
+HEX_OID = re.compile(r'^[0-9a-f]{40}([0-9a-f]{24})?$')
+
+# Where a short ref name is looked for, in git's order (see gitrevisions(7))
+REF_SEARCH = ['{}', 'refs/{}', 'refs/tags/{}', 'refs/heads/{}', 'refs/remotes/{}', 'refs/remotes/{}/HEAD']
+
+
+class ObjectNotFound(KeyError):
+    """An object, ref or path that the repository does not contain"""
+
+
+def _map_file(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _inflate(buffer, offset, size_hint=0):
+    """Inflate one zlib stream starting at ``offset`` of a bytes-like buffer"""
+    decompressor = zlib.decompressobj()
+    step = max(size_hint + 64, 4096)
+    chunks = []
+    while not decompressor.eof:
+        if offset >= len(buffer):
+            raise ValueError("truncated object data")
+        chunks.append(decompressor.decompress(buffer[offset:offset + step]))
+        offset += step
+        step = min(step * 2, 1 << 20)
+    return b''.join(chunks)
+
+
+def _varint(data, pos):
+    """Little-endian base-128 size used in delta headers"""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def apply_delta(base, delta):
+    """Rebuild an object from its base and a git delta"""
+    source_size, pos = _varint(delta, 0)
+    target_size, pos = _varint(delta, pos)
+    if source_size != len(base):
+        raise ValueError("delta base size mismatch")
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            # Copy from the base: offset and size bytes are present per flag bit
+            offset = size = 0
+            for bit in range(4):
+                if op & (1 << bit):
+                    offset |= delta[pos] << (8 * bit)
+                    pos += 1
+            for bit in range(3):
+                if op & (0x10 << bit):
+                    size |= delta[pos] << (8 * bit)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise ValueError("invalid delta opcode")
+    if len(out) != target_size:
+        raise ValueError("delta result size mismatch")
+    return bytes(out)
+
+
+class PackIndex:
+    """A pack ``.idx`` file (version 1 or 2), memory-mapped and binary searched"""
+
+    def __init__(self, path, oid_size=20):
+        self.path = path
+        self.oid_size = oid_size
+        self._map = _map_file(path)
+        if self._map[:4] == b'\xfftOc':
+            version = struct.unpack('>I', self._map[4:8])[0]
+            if version != 2:
+                raise ValueError(f"unsupported pack index version {version}")
+            self.version = 2
+            fanout_start = 8
+        else:
+            self.version = 1
+            fanout_start = 0
+        self._fanout = struct.unpack('>256I', self._map[fanout_start:fanout_start + 1024])
+        self.count = self._fanout[255]
+        table = fanout_start + 1024
+        if self.version == 2:
+            self._names = table
+            self._name_stride = oid_size
+            self._offsets = table + self.count * (oid_size + 4)    # names, then CRC32s
+            self._large_offsets = self._offsets + self.count * 4
+        else:
+            # Entries are a 4-byte offset followed by the object id
+            self._names = table + 4
+            self._name_stride = oid_size + 4
+
+    def __len__(self):
+        return self.count
+
+    def _name(self, index):
+        start = self._names + index * self._name_stride
+        return self._map[start:start + self.oid_size]
+
+    def find(self, oid):
+        """Pack offset of the raw object id ``oid``, or None"""
+        first = oid[0]
+        low = self._fanout[first - 1] if first else 0
+        high = self._fanout[first]
+        while low < high:
+            middle = (low + high) // 2
+            name = self._name(middle)
+            if name < oid:
+                low = middle + 1
+            elif name > oid:
+                high = middle
+            else:
+                return self._offset(middle)
+        return None
+
+    def _offset(self, index):
+        if self.version == 1:
+            start = self._names + index * self._name_stride - 4
+            return struct.unpack('>I', self._map[start:start + 4])[0]
+        start = self._offsets + index * 4
+        offset = struct.unpack('>I', self._map[start:start + 4])[0]
+        if offset & 0x80000000:
+            start = self._large_offsets + (offset & 0x7fffffff) * 8
+            offset = struct.unpack('>Q', self._map[start:start + 8])[0]
+        return offset
+
+    def close(self):
+        self._map.close()
+
+
+class Pack:
+    """A memory-mapped ``.pack`` file with its index"""
+
+    def __init__(self, pack_path, oid_size=20):
+        self.path = pack_path
+        self.index = PackIndex(pack_path[:-len('.pack')] + '.idx', oid_size)
+        self.data = _map_file(pack_path)
+        self.oid_size = oid_size
+
+    def header(self, offset):
+        """Return ``(type, size, data_offset, base)`` of the entry at ``offset``.
+
+        ``base`` is the base's pack offset for OFS_DELTA, its raw object id for
+        REF_DELTA and None otherwise.
+        """
+        data = self.data
+        byte = data[offset]
+        offset += 1
+        obj_type = (byte >> 4) & 7
+        size = byte & 0x0f
+        shift = 4
+        while byte & 0x80:
+            byte = data[offset]
+            offset += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+        base = None
+        if obj_type == OBJ_OFS_DELTA:
+            # Distance back to the base entry, in git's offset encoding
+            byte = data[offset]
+            offset += 1
+            base = byte & 0x7f
+            while byte & 0x80:
+                byte = data[offset]
+                offset += 1
+                base = ((base + 1) << 7) | (byte & 0x7f)
+        elif obj_type == OBJ_REF_DELTA:
+            base = bytes(data[offset:offset + self.oid_size])
+            offset += self.oid_size
+        return obj_type, size, offset, base
+
+    def close(self):
+        self.index.close()
+        self.data.close()
+
+
+class Commit:
+    __slots__ = ('oid', 'tree', 'parents', 'author', 'author_time', 'committer', 'commit_time', 'message')
+
+    def __init__(self, oid, data):
+        self.oid = oid
+        self.tree = None
+        self.parents = []
+        self.author = self.committer = ""
+        self.author_time = self.commit_time = 0
+        header, _, message = data.partition(b'\n\n')
+        self.message = message.decode('utf-8', errors='replace')
+        for line in header.split(b'\n'):
+            key, _, value = line.partition(b' ')
+            if key == b'tree':
+                self.tree = value.decode('ascii')
+            elif key == b'parent':
+                self.parents.append(value.decode('ascii'))
+            elif key in (b'author', b'committer'):
+                # "Name <email> 1700000000 +0100"
+                ident, _, rest = value.rpartition(b'> ')
+                name = ident.partition(b' <')[0].decode('utf-8', errors='replace')
+                timestamp = int(rest.split()[0]) if rest else 0
+                if key == b'author':
+                    self.author, self.author_time = name, timestamp
+                else:
+                    self.committer, self.commit_time = name, timestamp
+
+    @property
+    def subject(self):
+        return self.message.split('\n', 1)[0]
+
+    def __repr__(self):
+        return f"Commit({self.oid[:7]} {self.subject!r})"
+
+
+def parse_tree(data, oid_size=20):
+    """Entries of a tree object as ``(mode, name, oid)`` tuples"""
+    entries = []
+    pos = 0
+    end = len(data)
+    while pos < end:
+        space = data.index(b' ', pos)
+        nul = data.index(b'\0', space)
+        mode = data[pos:space].decode('ascii')
+        name = os.fsdecode(data[space + 1:nul])
+        oid = data[nul + 1:nul + 1 + oid_size].hex()
+        entries.append((mode, name, oid))
+        pos = nul + 1 + oid_size
+    return entries
+
+
+class Repository:
+    """Read-only, in-process access to a repository's refs and objects.
+
+    Refs are read from loose files and ``packed-refs``; objects come from
+    loose files or from memory-mapped packs, whose ``.idx`` is binary searched
+    without loading it. Deltas are resolved iteratively, and the objects they
+    are built on are kept in an LRU cache of ``cache_bytes``, so walking
+    history or reading neighbouring blobs does not re-inflate whole delta
+    chains. Nothing here spawns git or writes to the repository; it is meant
+    for read-mostly views and falls back to git for anything else.
+    """
+
+    def __init__(self, repo_path, cache_bytes=32 * 1024 * 1024):
+        self.repo_path = repo_path
+        self.git_dir = find_git_dir(repo_path)
+        if not os.path.isfile(os.path.join(self.git_dir, 'HEAD')):
+            raise ObjectNotFound(f"not a git repository: {repo_path}")
+        self.common_dir = self.git_dir
+        try:
+            with open(os.path.join(self.git_dir, 'commondir')) as f:
+                self.common_dir = os.path.normpath(os.path.join(self.git_dir, f.read().strip()))
+        except OSError:
+            pass
+        self.oid_size = 32 if self._config_value('objectformat') == 'sha256' else 20
+        self.object_dirs = self._object_dirs(os.path.join(self.common_dir, 'objects'))
+        self.cache_bytes = cache_bytes
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self._packs = {}
+        self._packed_refs = None
+        self._packed_refs_stat = None
+        self._scan_packs()
+
+    def close(self):
+        with self._lock:
+            for pack in self._packs.values():
+                pack.close()
+            self._packs = {}
+            self._cache.clear()
+            self._cached_bytes = 0
+
+    # Setup
+
+    def _config_value(self, key):
+        try:
+            with open(os.path.join(self.common_dir, 'config')) as f:
+                for line in f:
+                    name, _, value = line.strip().partition('=')
+                    if name.strip().lower() == key:
+                        return value.strip().lower()
+        except OSError:
+            pass
+        return None
+
+    def _object_dirs(self, objects_dir, depth=0):
+        dirs = [objects_dir]
+        try:
+            with open(os.path.join(objects_dir, 'info', 'alternates')) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#') and depth < 5:
+                        dirs += self._object_dirs(os.path.normpath(os.path.join(objects_dir, line)), depth + 1)
+        except OSError:
+            pass
+        return dirs
+
+    def _scan_packs(self):
+        """Open packs that appeared since the last scan (after fetch, gc, ...)"""
+        with self._lock:
+            for objects_dir in self.object_dirs:
+                pack_dir = os.path.join(objects_dir, 'pack')
+                try:
+                    names = os.listdir(pack_dir)
+                except OSError:
+                    continue
+                for name in sorted(names):
+                    path = os.path.join(pack_dir, name)
+                    if name.endswith('.pack') and path not in self._packs:
+                        try:
+                            self._packs[path] = Pack(path, self.oid_size)
+                        except (OSError, ValueError):
+                            continue
+
+    # Refs
+
+    def _read_packed_refs(self):
+        path = os.path.join(self.common_dir, 'packed-refs')
+        try:
+            st = os.stat(path)
+            stat = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return {}
+        if stat != self._packed_refs_stat:
+            refs = {}
+            with open(path) as f:
+                for line in f:
+                    # Skip the header and "^<oid>" peeled tag lines
+                    if line[0] in '#^':
+                        continue
+                    oid, _, name = line.strip().partition(' ')
+                    refs[name] = oid
+            self._packed_refs, self._packed_refs_stat = refs, stat
+        return self._packed_refs
+
+    def _read_loose_ref(self, name):
+        # HEAD and other pseudo refs are per worktree, refs/ live in the common dir
+        base = self.common_dir if name.startswith('refs/') else self.git_dir
+        try:
+            with open(os.path.join(base, name)) as f:
+                return f.read().strip() or None
+        except (OSError, ValueError):
+            return None
+
+    def read_ref(self, name):
+        """Value of one ref: an object id, ``ref: <target>`` or None"""
+        value = self._read_loose_ref(name)
+        if value is None:
+            value = self._read_packed_refs().get(name)
+        return value
+
+    def resolve_ref(self, name):
+        """Follow symbolic refs to an object id; None if ``name`` is not a ref"""
+        for _ in range(10):
+            value = self.read_ref(name)
+            if value is None or not value.startswith('ref: '):
+                return value
+            name = value[len('ref: '):]
+        return None
+
+    def head(self):
+        """Object id HEAD points to; None on an unborn branch"""
+        return self.resolve_ref('HEAD')
+
+    def head_branch(self):
+        """Branch name HEAD points to; None when detached"""
+        value = self.read_ref('HEAD')
+        if value and value.startswith('ref: refs/heads/'):
+            return value[len('ref: refs/heads/'):]
+        return None
+
+    def refs(self, prefix='refs/'):
+        """Every ref under ``prefix`` as a ``{name: oid}`` dict, sorted by name"""
+        refs = {name: oid for name, oid in self._read_packed_refs().items() if name.startswith(prefix)}
+        top = os.path.join(self.common_dir, *prefix.rstrip('/').split('/'))
+        for root, _, files in os.walk(top):
+            for file in files:
+                name = os.path.relpath(os.path.join(root, file), self.common_dir).replace(os.sep, '/')
+                value = self._read_loose_ref(name)
+                if value and not value.startswith('ref: ') and HEX_OID.match(value):
+                    refs[name] = value
+        return dict(sorted(refs.items()))
+
+    def branches(self):
+        return [name[len('refs/heads/'):] for name in self.refs('refs/heads/')]
+
+    def tags(self):
+        return [name[len('refs/tags/'):] for name in self.refs('refs/tags/')]
+
+    def resolve(self, rev):
+        """Object id of a full object id or a ref name (``HEAD``, ``main``, ``v1.0``...)"""
+        if HEX_OID.match(rev):
+            return rev
+        for pattern in REF_SEARCH:
+            oid = self.resolve_ref(pattern.format(rev))
+            if oid is not None:
+                return oid
+        raise ObjectNotFound(rev)
+
+    # Objects
+
+    def read(self, oid):
+        """Return ``(type_name, data)`` of an object given as a hex id"""
+        raw = bytes.fromhex(oid)
+        found = self._read(raw)
+        if found is None:
+            # A fetch or gc may have added packs since they were scanned
+            self._scan_packs()
+            found = self._read(raw)
+            if found is None:
+                raise ObjectNotFound(oid)
+        obj_type, data = found
+        return TYPE_NAMES[obj_type], data
+
+    def _read(self, raw):
+        with self._lock:
+            packs = list(self._packs.values())
+        for pack in packs:
+            offset = pack.index.find(raw)
+            if offset is not None:
+                return self._read_packed(pack, offset)
+        return self._read_loose(raw.hex())
+
+    def _read_loose(self, oid):
+        for objects_dir in self.object_dirs:
+            try:
+                with open(os.path.join(objects_dir, oid[:2], oid[2:]), 'rb') as f:
+                    data = zlib.decompress(f.read())
+            except OSError:
+                continue
+            header, _, body = data.partition(b'\0')
+            kind = header.split(b' ', 1)[0].decode('ascii')
+            for obj_type, name in TYPE_NAMES.items():
+                if name == kind:
+                    return obj_type, body
+            raise ValueError(f"unknown object type {kind!r}")
+        return None
+
+    def _read_packed(self, pack, offset):
+        # Walk down the delta chain to a cached or full object, then apply
+        # the deltas back up; every intermediate result is a base worth caching
+        chain = []
+        while True:
+            cached = self._cache_get((pack.path, offset))
+            if cached is not None:
+                obj_type, data = cached
+                break
+            obj_type, size, data_offset, base = pack.header(offset)
+            if obj_type == OBJ_OFS_DELTA:
+                chain.append((offset, data_offset, size))
+                offset -= base
+                continue
+            if obj_type == OBJ_REF_DELTA:
+                chain.append((offset, data_offset, size))
+                found = self._read(base)
+                if found is None:
+                    raise ObjectNotFound(base.hex())
+                obj_type, data = found
+                break
+            data = _inflate(pack.data, data_offset, size)
+            if chain:
+                self._cache_put((pack.path, offset), obj_type, data)
+            break
+        for index, (entry_offset, data_offset, size) in enumerate(reversed(chain)):
+            data = apply_delta(data, _inflate(pack.data, data_offset, size))
+            if index < len(chain) - 1:
+                self._cache_put((pack.path, entry_offset), obj_type, data)
+        return obj_type, data
+
+    def _cache_get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _cache_put(self, key, obj_type, data):
+        if len(data) > self.cache_bytes // 4:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = (obj_type, data)
+            self._cached_bytes += len(data)
+            while self._cached_bytes > self.cache_bytes:
+                _, (_, evicted) = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+
+    def commit(self, rev='HEAD'):
+        oid = self.resolve(rev)
+        kind, data = self.read(oid)
+        # Annotated tags point at the commit
+        while kind == 'tag':
+            oid = data.split(b'\n', 1)[0].split(b' ', 1)[1].decode('ascii')
+            kind, data = self.read(oid)
+        if kind != 'commit':
+            raise ObjectNotFound(f"{rev} is a {kind}, not a commit")
+        return Commit(oid, data)
+
+    def tree(self, oid):
+        kind, data = self.read(oid)
+        if kind != 'tree':
+            raise ObjectNotFound(f"{oid} is a {kind}, not a tree")
+        return parse_tree(data, self.oid_size)
+
+    def entry_at(self, rev, path):
+        """``(mode, oid)`` of ``path`` in the tree of commit ``rev``"""
+        mode, oid = '40000', self.commit(rev).tree
+        for part in [part for part in path.replace(os.sep, '/').split('/') if part]:
+            if mode != '40000':
+                raise ObjectNotFound(path)
+            for entry_mode, name, entry_oid in self.tree(oid):
+                if name == part:
+                    mode, oid = entry_mode, entry_oid
+                    break
+            else:
+                raise ObjectNotFound(path)
+        return mode, oid
+
+    def blob_at(self, rev, path):
+        """Content of ``path`` as committed in ``rev``"""
+        _, oid = self.entry_at(rev, path)
+        kind, data = self.read(oid)
+        if kind != 'blob':
+            raise ObjectNotFound(f"{path} is a {kind} in {rev}")
+        return data
+
+    def walk(self, rev='HEAD', limit=None):
+        """Yield commits reachable from ``rev``, newest commit date first (like ``git log``)"""
+        start = self.commit(rev)
+        queue = [(-start.commit_time, 0, start)]
+        seen = {start.oid}
+        counter = 1
+        yielded = 0
+        while queue and (limit is None or yielded < limit):
+            _, _, commit = heapq.heappop(queue)
+            yield commit
+            yielded += 1
+            for parent in commit.parents:
+                if parent not in seen:
+                    seen.add(parent)
+                    parent_commit = Commit(parent, self.read(parent)[1])
+                    heapq.heappush(queue, (-parent_commit.commit_time, counter, parent_commit))
+                    counter += 1
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import tracer
+
+# Base URL can be pointed at a local stub server for tests and benchmarks
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+
+
+def retry_after_seconds(value):
+    """Seconds to wait for a ``Retry-After`` header: delta-seconds or an HTTP-date"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return 60.0
+
+
+class RateLimiter:
+    """Shared GitHub rate limit state for concurrent API calls.
+
+    Honours ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` for the primary
+    limit and ``Retry-After`` (or exponential backoff) for secondary limits,
+    and spaces content-creating requests ``min_interval`` seconds apart as
+    GitHub asks for.
+    """
+
+    def __init__(self, min_interval=1.0, max_retries=5, max_backoff=900):
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.throttled_seconds = 0.0
+        self.throttle_events = 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+
+    def wait(self):
+        """Block until the caller may send its next request"""
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot, self._paused_until)
+            self._next_slot = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        seconds = min(max(seconds, 0.0), self.max_backoff)
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.time() + seconds)
+            self.throttled_seconds += seconds
+            self.throttle_events += 1
+
+    def update(self, response, attempt=0):
+        """Record a response; return True if the request should be retried"""
+        headers = response.headers
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        retry_after = headers.get('Retry-After')
+
+        limited = response.status_code == 429 or (
+            response.status_code == 403 and (
+                retry_after is not None or remaining == '0' or 'rate limit' in response.text.lower()
+            )
+        )
+        if limited:
+            if retry_after is not None:
+                self.pause(retry_after_seconds(retry_after))
+            elif remaining == '0' and reset:
+                self.pause(float(reset) - time.time())
+            else:
+                # Secondary limit without hints: back off exponentially from a minute
+                self.pause(60 * 2 ** attempt)
+            return attempt < self.max_retries
+
+        if remaining == '0' and reset:
+            # Primary budget used up, hold everyone until the window resets
+            self.pause(float(reset) - time.time())
+        return False
+
+
+class GitHubClient:
+    """Pooled GitHub REST client with conditional-request caching.
+
+    All calls go through one keep-alive ``requests.Session``. GET responses
+    that carry an ``ETag`` or ``Last-Modified`` are cached, and repeat requests
+    are sent with ``If-None-Match``/``If-Modified-Since``; a 304 answer (which
+    does not count against the rate limit) returns the cached response with
+    ``from_cache`` set.
+    """
+
+    def __init__(self, base_url=None, pool_size=10, cache_size=256, timeout=30):
+        self.base_url = (base_url or GITHUB_API_URL).rstrip('/')
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.session = requests.Session()
+        self.session.headers['Accept'] = 'application/vnd.github.v3+json'
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def url(self, path):
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def get(self, path, params=None, headers=None, use_cache=True):
+        url = self.url(path)
+        headers = dict(headers or {})
+        # The credentials are part of the key so cached data never leaks between users
+        key = (url, tuple(sorted((params or {}).items())), headers.get('Authorization'))
+        cached = self._cache_get(key) if use_cache else None
+        if cached is not None:
+            if cached.headers.get('ETag'):
+                headers['If-None-Match'] = cached.headers['ETag']
+            if cached.headers.get('Last-Modified'):
+                headers['If-Modified-Since'] = cached.headers['Last-Modified']
+
+        response = self._request('GET', url, params=params, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            cached.from_cache = True
+            return cached
+
+        response.from_cache = False
+        if use_cache and response.status_code == 200 and (
+                response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            self._cache_put(key, response)
+        return response
+
+    def get_pages(self, path, params=None, headers=None):
+        """Yield each page's JSON, following the ``Link: rel="next"`` header"""
+        url = self.url(path)
+        while url:
+            response = self.get(url, params=params, headers=headers, use_cache=False)
+            response.raise_for_status()
+            yield response.json()
+            url = response.links.get('next', {}).get('url')
+            params = None  # the next link carries the query
+
+    def post(self, path, json=None, headers=None, rate_limiter=None):
+        """POST, retrying while ``rate_limiter`` says the call was throttled"""
+        attempt = 0
+        while True:
+            if rate_limiter:
+                rate_limiter.wait()
+            response = self._request('POST', self.url(path), json=json, headers=headers)
+            if not (rate_limiter and rate_limiter.update(response, attempt)):
+                return response
+            attempt += 1
+
+    def delete(self, path, headers=None):
+        return self._request('DELETE', self.url(path), headers=headers)
+
+    def _request(self, method, url, **kwargs):
+        span = tracer.start('http', [method, url])
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            span.finish(error=e)
+            raise
+        span.finish(response.status_code, len(response.content))
+        return response
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            response = self._cache.get(key)
+            if response is not None:
+                self._cache.move_to_end(key)
+            return response
+
+    def _cache_put(self, key, response):
+        response.content  # read the body so the cached response stays usable
+        with self._cache_lock:
+            self._cache[key] = response
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(base_url=None):
+    """Return the process-wide client for ``base_url`` (default: GitHub)"""
+    base_url = (base_url or GITHUB_API_URL).rstrip('/')
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = GitHubClient(base_url)
+        return client
@@ -0,0 +1,240 @@
+import asyncio
+import inspect
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from commit_engine import push_command
+from github_api import shared_client
+from tracing import tracer
+
+# Extra files written on top of README.md for each template
+TEMPLATES = {
+    'python': [
+        ('README.md', "# {name}\nA Python project template by Repo-Rocket."),
+        ('.gitignore', "__pycache__\n*.pyc\nvenv/")
+    ],
+    'nodejs': [
+        ('README.md', "# {name}\nA Node.js project template by Repo-Rocket."),
+        ('.gitignore', "node_modules/\n*.log")
+    ]
+}
+
+
+class GitCall:
+    """A git command a pipeline stage runs with its own environment"""
+
+    def __init__(self, git_cmd, env):
+        self.git_cmd = git_cmd
+        self.env = env
+
+
+class LaunchPipeline:
+    """Create a local repo and its GitHub counterpart in explicit stages.
+
+    The local stages (``prepare`` and ``init_commit``) run while the GitHub
+    ``create_remote`` call is in flight, so the network round trip overlaps the
+    local git work. ``details`` and ``push`` then run once both are done.
+    Nothing here touches Tk, so the pipeline can run on a worker thread;
+    ``on_progress(stage, state, seconds)`` is called from whichever thread runs
+    a stage and ``timings`` records how long every stage took.
+
+    Stages that run git yield the git arguments one command at a time (or a
+    GitCall for a command with its own environment), so the same stages drive
+    both ``run()`` (threads, blocking git) and ``run_async(core)`` (asyncio
+    subprocesses on an async_core.AsyncCore, where cancelling the task kills
+    the running git). If a local stage fails or is cancelled, the pipeline
+    still waits for the API call and deletes the repository it created, so
+    no empty GitHub repository is left behind.
+    """
+
+    STAGES = ['prepare', 'init_commit', 'create_remote', 'details', 'push']
+
+    def __init__(self, repo_name, access_token, directory, description="", private=False,
+                 template="empty", details=None, api_url=None, on_progress=None,
+                 rate_limiter=None):
+        self.repo_name = repo_name
+        self.access_token = access_token
+        self.directory = directory
+        self.description = description
+        self.private = private
+        self.template = template
+        # details(repo_data) -> (filename, content) for the creation details file
+        self.details = details
+        self.client = shared_client(api_url)
+        self.on_progress = on_progress
+        # Optional github_api.RateLimiter shared between concurrent pipelines
+        self.rate_limiter = rate_limiter
+        self.timings = {}
+        self.repo_data = None
+
+    def run(self):
+        """Run all stages and return the GitHub repository data"""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="launch-api") as executor:
+            remote = executor.submit(self._stage, 'create_remote', self.create_remote)
+            try:
+                self._stage('prepare', self.prepare)
+                self._stage('init_commit', self.init_commit)
+            except BaseException:
+                try:
+                    created = remote.result()
+                except Exception:
+                    created = None
+                self.delete_remote(created)
+                raise
+            self.repo_data = remote.result()
+        self._stage('details', self.write_details)
+        self._stage('push', self.push)
+        self.timings['total'] = time.perf_counter() - started
+        return self.repo_data
+
+    async def run_async(self, core):
+        """Coroutine version of run() for an async_core.AsyncCore"""
+        started = time.perf_counter()
+        remote = asyncio.ensure_future(self._stage_async(core, 'create_remote', self.create_remote, http=True))
+        try:
+            await self._stage_async(core, 'prepare', self.prepare, blocking=True)
+            await self._stage_async(core, 'init_commit', self.init_commit)
+            # Shielded, so a cancel while the request is in flight still
+            # leaves it to finish and be deleted below
+            self.repo_data = await asyncio.shield(remote)
+        except BaseException:
+            # The request cannot be called back once sent; wait for it and
+            # delete what it created. Errors here never replace the original.
+            try:
+                created = await asyncio.shield(remote)
+            except BaseException:
+                created = None
+            try:
+                await core.http(self.delete_remote, created)
+            except BaseException:
+                pass
+            raise
+        await self._stage_async(core, 'details', self.write_details)
+        await self._stage_async(core, 'push', self.push)
+        self.timings['total'] = time.perf_counter() - started
+        return self.repo_data
+
+    def _stage(self, name, func):
+        self._report(name, 'running', 0.0)
+        start = time.perf_counter()
+        try:
+            result = func()
+            if inspect.isgenerator(result):
+                for args in result:
+                    self._git(args)
+                result = None
+        except Exception:
+            self.timings[name] = time.perf_counter() - start
+            self._report(name, 'failed', self.timings[name])
+            raise
+        self.timings[name] = time.perf_counter() - start
+        self._report(name, 'done', self.timings[name])
+        return result
+
+    async def _stage_async(self, core, name, func, http=False, blocking=False):
+        """Run one stage on the loop; ``blocking`` stages (file writes) run in
+        a worker thread so they do not stall other operations"""
+        self._report(name, 'running', 0.0)
+        start = time.perf_counter()
+        try:
+            if http:
+                result = await core.http(func)
+            elif blocking:
+                result = await asyncio.to_thread(func)
+            else:
+                result = func()
+                if inspect.isgenerator(result):
+                    for args in result:
+                        git_cmd, env = self._command(args)
+                        await core.git(git_cmd, cwd=self.directory, env=env, check=True)
+                    result = None
+        except BaseException:
+            self.timings[name] = time.perf_counter() - start
+            self._report(name, 'failed', self.timings[name])
+            raise
+        self.timings[name] = time.perf_counter() - start
+        self._report(name, 'done', self.timings[name])
+        return result
+
+    def _report(self, stage, state, seconds):
+        if self.on_progress:
+            self.on_progress(stage, state, seconds)
+
+    def _command(self, args):
+        if isinstance(args, GitCall):
+            return args.git_cmd, args.env
+        return ['git', *args], None
+
+    def _git(self, args):
+        git_cmd, env = self._command(args)
+        tracer.run(git_cmd, cwd=self.directory, env=env, check=True, capture_output=True, text=True)
+
+    def prepare(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'README.md'), 'w') as f:
+            f.write(f"# {self.repo_name}\nCreated by Repo-Rocket on {time.ctime()}.")
+        for filename, content in TEMPLATES.get(self.template, []):
+            with open(os.path.join(self.directory, filename), 'w') as f:
+                f.write(content.format(name=self.repo_name))
+
+    def init_commit(self):
+        yield 'init', '--initial-branch=main'
+        yield 'add', '.'
+        yield 'commit', '-m', 'Initial commit by RepoTinker'
+
+    def create_remote(self):
+        headers = {'Authorization': f'token {self.access_token}'}
+        data = {
+            'name': self.repo_name,
+            'description': self.description,
+            'private': self.private
+        }
+        response = self.client.post('/user/repos', json=data, headers=headers, rate_limiter=self.rate_limiter)
+        response.raise_for_status()
+        return response.json()
+
+    def delete_remote(self, repo_data):
+        """Best-effort removal of a repository created by an aborted launch"""
+        if not repo_data or not repo_data.get('full_name'):
+            return
+        headers = {'Authorization': f'token {self.access_token}'}
+        try:
+            self.client.delete(f"/repos/{repo_data['full_name']}", headers=headers)
+        except requests.RequestException:
+            pass
+
+    def write_details(self):
+        if not self.details:
+            return
+        filename, content = self.details(self.repo_data)
+        with open(os.path.join(self.directory, filename), 'w') as f:
+            f.write(content)
+        yield 'add', filename
+        yield 'commit', '-m', f'Add {filename} with creation details'
+
+    def push(self):
+        # The token only reaches git through the one-shot credential helper,
+        # never .git/config, so a failed or cancelled push leaves nothing behind
+        yield 'remote', 'add', 'origin', self.repo_data['clone_url']
+        git_cmd, env = push_command(self.access_token, refspec='main', set_upstream=True)
+        yield GitCall(git_cmd, env)
+
+
+def describe_error(error):
+    """Best human-readable message for a failed launch"""
+    if isinstance(error, requests.RequestException):
+        response = getattr(error, 'response', None)
+        if response is not None:
+            try:
+                return response.json().get('message', 'Unknown error')
+            except ValueError:
+                return response.text or str(error)
+        return str(error)
+    if isinstance(error, subprocess.CalledProcessError) and error.stderr:
+        return error.stderr.strip()
+    return str(error)
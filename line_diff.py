@@ -0,0 +1,323 @@
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+
+
+def split_lines(text):
+    """Split on '\\n' only; a trailing newline does not add an empty line"""
+    if not text:
+        return []
+    lines = text.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+class LineDiffer:
+    """Line diff over interned line ids, reusable across edits of one file.
+
+    Every distinct line is mapped once to a small integer, so the rest of the
+    algorithm only compares ints. ``matching_blocks()`` trims the common
+    prefix and suffix, anchors the middle on lines that occur exactly once on
+    both sides (patience diff) and runs Myers' O(ND) diff on the gaps between
+    anchors. Gap results are cached by content, so after a small edit only
+    the gap around it is diffed again. A gap whose edit distance exceeds
+    ``max_cost`` is reported as one replaced block instead of being searched
+    further, which bounds the time spent on rewritten regions.
+    """
+
+    MAX_IDS = 1000000
+
+    def __init__(self, max_cost=1000, cache_size=4096):
+        self.max_cost = max_cost
+        self.cache_size = cache_size
+        self._ids = {}
+        self._gaps = OrderedDict()
+        # Bumped whenever ids are reassigned, so holders of old ids re-intern
+        self.generation = 0
+
+    def intern(self, lines):
+        """Return the id list of ``lines``"""
+        if len(self._ids) > self.MAX_IDS:
+            # Ids change meaning, so the cached gaps go too
+            self._ids = {}
+            self._gaps.clear()
+            self.generation += 1
+        ids = self._ids
+        return [ids.setdefault(line, len(ids)) for line in lines]
+
+    def matching_blocks(self, a, b):
+        """``(i, j, n)`` triples with ``a[i:i+n] == b[j:j+n]``, ascending and
+        ending with the sentinel ``(len(a), len(b), 0)`` like difflib"""
+        blocks = []
+        self._match(a, 0, len(a), b, 0, len(b), blocks, 2)
+        return _merge(blocks, len(a), len(b))
+
+    def rematch(self, a, b, blocks, start, old_end, new_end):
+        """Matching blocks of ``a`` against an edited ``b``.
+
+        ``blocks`` matched the previous ``b``, whose lines ``start:old_end``
+        became the current ``b[start:new_end]``. Blocks outside the edit are
+        kept (shifted) and only the stretch between them is matched again.
+        """
+        delta = new_end - old_end
+        left, right = [], []
+        a_lo = b_lo = 0
+        for i, j, n in blocks[:-1]:
+            if j < start:
+                size = min(n, start - j)
+                left.append((i, j, size))
+                a_lo, b_lo = i + size, j + size
+            if j + n > old_end:
+                size = min(n, j + n - old_end)
+                right.append((i + n - size, j + n - size + delta, size))
+        a_hi, b_hi = (right[0][0], right[0][1]) if right else (len(a), len(b))
+        middle = []
+        self._match(a, a_lo, a_hi, b, b_lo, b_hi, middle, 2)
+        return _merge(left + middle + right, len(a), len(b))
+
+    def opcodes(self, a, b):
+        """difflib-style ``(tag, i1, i2, j1, j2)`` tuples"""
+        return blocks_to_opcodes(self.matching_blocks(a, b))
+
+    # Internals
+
+    def _match(self, a, alo, ahi, b, blo, bhi, out, depth):
+        start = alo
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        if alo > start:
+            out.append((start, blo - (alo - start), alo - start))
+        suffix = 0
+        while alo < ahi - suffix and blo < bhi - suffix and a[ahi - suffix - 1] == b[bhi - suffix - 1]:
+            suffix += 1
+        ahi -= suffix
+        bhi -= suffix
+        if alo < ahi and blo < bhi:
+            anchors = self._anchors(a, alo, ahi, b, blo, bhi) if depth else []
+            if anchors:
+                for i, j in anchors:
+                    if i > alo or j > blo:
+                        self._match(a, alo, i, b, blo, j, out, depth - 1)
+                    out.append((i, j, 1))
+                    alo, blo = i + 1, j + 1
+                self._match(a, alo, ahi, b, blo, bhi, out, depth - 1)
+            else:
+                for i, j, n in self._gap(a[alo:ahi], b[blo:bhi]):
+                    out.append((alo + i, blo + j, n))
+        if suffix:
+            out.append((ahi, bhi, suffix))
+
+    def _anchors(self, a, alo, ahi, b, blo, bhi):
+        """Pairs of lines unique on both sides, longest run in common order"""
+        a_counts = Counter(a[alo:ahi])
+        b_counts = Counter(b[blo:bhi])
+        unique = {line for line, count in a_counts.items() if count == 1 and b_counts.get(line) == 1}
+        if not unique:
+            return []
+        b_index = {line: blo + index for index, line in enumerate(b[blo:bhi]) if line in unique}
+        pairs = [(alo + index, b_index[line]) for index, line in enumerate(a[alo:ahi]) if line in unique]
+        # Longest increasing subsequence of the b positions (patience sorting)
+        tails = []
+        tail_indexes = []
+        previous = [None] * len(pairs)
+        for index, (_, j) in enumerate(pairs):
+            low = bisect_left(tails, j)
+            if low:
+                previous[index] = tail_indexes[low - 1]
+            if low == len(tails):
+                tails.append(j)
+                tail_indexes.append(index)
+            else:
+                tails[low] = j
+                tail_indexes[low] = index
+        result = []
+        index = tail_indexes[-1]
+        while index is not None:
+            result.append(pairs[index])
+            index = previous[index]
+        result.reverse()
+        return result
+
+    def _gap(self, a, b):
+        key = (len(a), len(b), hash(tuple(a)), hash(tuple(b)))
+        blocks = self._gaps.get(key)
+        if blocks is not None:
+            self._gaps.move_to_end(key)
+            return blocks
+        blocks = myers_blocks(a, b, self.max_cost)
+        self._gaps[key] = blocks
+        if len(self._gaps) > self.cache_size:
+            self._gaps.popitem(last=False)
+        return blocks
+
+
+def _merge(blocks, a_len, b_len):
+    merged = []
+    for i, j, n in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + n)
+        elif n:
+            merged.append((i, j, n))
+    merged.append((a_len, b_len, 0))
+    return merged
+
+
+def myers_blocks(a, b, max_cost):
+    """Matching ``(i, j, n)`` blocks of a shortest edit script, or none at all
+    when the edit distance exceeds ``max_cost``"""
+    n, m = len(a), len(b)
+    if not n or not m:
+        return []
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    trace = []
+    for d in range(min(n + m, max_cost) + 1):
+        # Only diagonals -d-1 .. d+1 matter for step d and for backtracking it
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return []
+
+
+def _backtrack(trace, x, y):
+    blocks = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1 + d + 1] < v[k + 1 + d + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[prev_k + d + 1]
+        prev_y = prev_x - prev_k
+        run = min(x - prev_x, y - prev_y) if d else min(x, y)
+        if run > 0:
+            blocks.append((x - run, y - run, run))
+        x, y = prev_x, prev_y
+    blocks.reverse()
+    return blocks
+
+
+def blocks_to_opcodes(blocks):
+    opcodes = []
+    i = j = 0
+    for ai, bj, size in blocks:
+        tag = ''
+        if i < ai and j < bj:
+            tag = 'replace'
+        elif i < ai:
+            tag = 'delete'
+        elif j < bj:
+            tag = 'insert'
+        if tag:
+            opcodes.append((tag, i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(('equal', ai, i, bj, j))
+    return opcodes
+
+
+def group_opcodes(opcodes, context=3):
+    """Split opcodes into hunks with ``context`` lines around each change,
+    as difflib.SequenceMatcher.get_grouped_opcodes() does"""
+    codes = list(opcodes)
+    if not codes:
+        return []
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+    hunks = []
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == 'equal' and i2 - i1 > context * 2:
+            group.append((tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            hunks.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        hunks.append(group)
+    return [hunk for hunk in hunks if any(code[0] != 'equal' for code in hunk)]
+
+
+class DiffResult:
+    """Lines of both sides plus their opcodes and context hunks"""
+
+    def __init__(self, a_lines, b_lines, opcodes, context=3):
+        self.a_lines = a_lines
+        self.b_lines = b_lines
+        self.opcodes = opcodes
+        self.hunks = group_opcodes(opcodes, context)
+        self.removed = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag in ('delete', 'replace'))
+        self.added = sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag in ('insert', 'replace'))
+
+    @property
+    def identical(self):
+        return not self.hunks
+
+
+class DiffSession:
+    """Diffs successive versions of one buffer against a fixed base text.
+
+    The base is split and interned once. Each ``diff(text)`` compares the
+    buffer with the previous one, interns only the lines that changed and
+    re-diffs only the region between the matches that survived the edit, so
+    typing in a large file costs a scan for the edited lines plus a small
+    diff. Not thread-safe: keep a session on one worker thread.
+    """
+
+    def __init__(self, base_text, context=3):
+        self.context = context
+        self.differ = LineDiffer()
+        self.base_lines = split_lines(base_text)
+        self.base_ids = self.differ.intern(self.base_lines)
+        self.generation = self.differ.generation
+        self._lines = None
+        self._ids = None
+        self._blocks = None
+
+    def diff(self, text):
+        lines = split_lines(text)
+        if self._lines is not None and self.generation == self.differ.generation:
+            ids, blocks = self._update(lines)
+        else:
+            if self.generation != self.differ.generation:
+                self.base_ids = self.differ.intern(self.base_lines)
+                self.generation = self.differ.generation
+            ids = self.differ.intern(lines)
+            blocks = self.differ.matching_blocks(self.base_ids, ids)
+        self._lines, self._ids, self._blocks = lines, ids, blocks
+        return DiffResult(self.base_lines, lines, blocks_to_opcodes(blocks), self.context)
+
+    def _update(self, lines):
+        old = self._lines
+        limit = min(len(old), len(lines))
+        start = next((index for index, (x, y) in enumerate(zip(old, lines)) if x != y), limit)
+        suffix = next((index for index, (x, y) in enumerate(zip(reversed(old), reversed(lines)))
+                       if x != y or index >= limit - start), limit - start)
+        old_end, new_end = len(old) - suffix, len(lines) - suffix
+        if start == old_end == new_end:
+            return self._ids, self._blocks
+        ids = self._ids[:start] + self.differ.intern(lines[start:new_end]) + self._ids[old_end:]
+        if self.generation != self.differ.generation:
+            # The id table was just rebuilt; start over
+            self._lines = None
+            self.base_ids = self.differ.intern(self.base_lines)
+            self.generation = self.differ.generation
+            ids = self.differ.intern(lines)
+            return ids, self.differ.matching_blocks(self.base_ids, ids)
+        return ids, self.differ.rematch(self.base_ids, ids, self._blocks, start, old_end, new_end)
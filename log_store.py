@@ -0,0 +1,200 @@
+import os
+import subprocess
+import tempfile
+import time
+from array import array
+
+from tracing import tracer
+
+# Every commit starts with SOH so it can be told apart from --name-only paths;
+# fields are NUL separated, and -z terminates each commit (and path) with NUL
+LOG_FORMAT = '--format=%x01%H%x00%an%x00%at%x00%s'
+
+
+class CommitStore:
+    """Compact, columnar storage for parsed commits.
+
+    Object ids are packed as raw bytes, authors and paths are interned and
+    referenced by integer id, timestamps are integers, and all subjects live in
+    one UTF-8 buffer indexed by an offset array. A few hundred thousand commits
+    fit in a few MB and can be filtered without touching git.
+    """
+
+    def __init__(self):
+        self.oid_size = 20
+        self._oids = bytearray()
+        self._times = array('q')
+        self._author_ids = array('I')
+        self._authors = []
+        self._author_index = {}
+        self._messages = bytearray()
+        self._message_offsets = array('Q', [0])
+        self.has_paths = False
+        self._paths = []
+        self._path_index = {}
+        self._path_ids = array('I')
+        self._path_offsets = array('Q', [0])
+
+    def __len__(self):
+        return len(self._times)
+
+    def _intern(self, value, values, index):
+        value_id = index.get(value)
+        if value_id is None:
+            value_id = index[value] = len(values)
+            values.append(value)
+        return value_id
+
+    def append(self, oid_hex, author, timestamp, subject, paths=None):
+        oid = bytes.fromhex(oid_hex)
+        if not self._times:
+            self.oid_size = len(oid)
+        self._oids += oid
+        self._times.append(timestamp)
+        self._author_ids.append(self._intern(author, self._authors, self._author_index))
+        self._messages += subject.encode('utf-8')
+        self._message_offsets.append(len(self._messages))
+        if paths is not None:
+            self.has_paths = True
+            for path in paths:
+                self._path_ids.append(self._intern(path, self._paths, self._path_index))
+        self._path_offsets.append(len(self._path_ids))
+
+    def extend(self, other):
+        """Append every commit of another store"""
+        for row in range(len(other)):
+            self.append(other.oid(row), other.author(row), other.timestamp(row), other.subject(row),
+                        other.paths(row) if other.has_paths else None)
+
+    # Column access
+
+    def oid(self, row):
+        return self._oids[row * self.oid_size:(row + 1) * self.oid_size].hex()
+
+    def author(self, row):
+        return self._authors[self._author_ids[row]]
+
+    def timestamp(self, row):
+        return self._times[row]
+
+    def subject(self, row):
+        start, end = self._message_offsets[row], self._message_offsets[row + 1]
+        return self._messages[start:end].decode('utf-8', errors='replace')
+
+    def paths(self, row):
+        start, end = self._path_offsets[row], self._path_offsets[row + 1]
+        return [self._paths[path_id] for path_id in self._path_ids[start:end]]
+
+    def rows(self, start=0, end=None):
+        """Yield (oid, author, timestamp, subject) tuples for a range of rows"""
+        end = len(self) if end is None else min(end, len(self))
+        for row in range(start, end):
+            yield self.oid(row), self.author(row), self._times[row], self.subject(row)
+
+    def nbytes(self):
+        """Approximate memory used by the column buffers"""
+        return (len(self._oids) + len(self._messages)
+                + self._times.itemsize * len(self._times)
+                + self._author_ids.itemsize * len(self._author_ids)
+                + self._message_offsets.itemsize * len(self._message_offsets)
+                + self._path_ids.itemsize * len(self._path_ids)
+                + self._path_offsets.itemsize * len(self._path_offsets)
+                + sum(len(author) for author in self._authors)
+                + sum(len(path) for path in self._paths))
+
+    # Filtering
+
+    def filter(self, author=None, since=None, until=None, path=None):
+        """Return the row numbers matching all given filters.
+
+        ``author`` is a case-insensitive substring, ``since``/``until`` are
+        Unix timestamps and ``path`` matches a file or anything below a
+        directory (only for stores built with paths).
+        """
+        author_ids = None
+        if author is not None:
+            needle = author.lower()
+            author_ids = {i for i, name in enumerate(self._authors) if needle in name.lower()}
+        path_ids = None
+        if path is not None:
+            if not self.has_paths:
+                raise ValueError("This commit store was loaded without paths")
+            prefix = path.rstrip('/') + '/'
+            path_ids = {i for i, name in enumerate(self._paths) if name == path or name.startswith(prefix)}
+
+        matches = array('I')
+        times = self._times
+        ids = self._author_ids
+        for row in range(len(times)):
+            if author_ids is not None and ids[row] not in author_ids:
+                continue
+            if since is not None and times[row] < since:
+                continue
+            if until is not None and times[row] > until:
+                continue
+            if path_ids is not None:
+                start, end = self._path_offsets[row], self._path_offsets[row + 1]
+                if not any(path_id in path_ids for path_id in self._path_ids[start:end]):
+                    continue
+            matches.append(row)
+        return matches
+
+
+def ingest_log(repo_path, args, store=None, with_paths=False):
+    """Stream ``git log -z`` for ``args`` into a CommitStore and return it"""
+    store = store if store is not None else CommitStore()
+    git_cmd = ['git', 'log', '-z', LOG_FORMAT]
+    if with_paths:
+        git_cmd.append('--name-only')
+    git_cmd += args
+    span = tracer.start('git', git_cmd, repo_path)
+    # stderr goes to a file: a pipe nobody reads until stdout ends could fill
+    # up and leave git blocked on it
+    errors = tempfile.TemporaryFile()
+    try:
+        process = subprocess.Popen(git_cmd, cwd=repo_path, stdout=subprocess.PIPE, stderr=errors)
+    except BaseException:
+        errors.close()
+        raise
+    bytes_out = 0
+
+    fields = None
+    paths = None
+
+    def finish():
+        if fields is not None:
+            oid, author, timestamp, subject = fields
+            store.append(oid, author, int(timestamp or 0), subject, paths)
+
+    remainder = b''
+    try:
+        for data in iter(lambda: process.stdout.read(256 * 1024), b''):
+            bytes_out += len(data)
+            tokens = (remainder + data).split(b'\0')
+            remainder = tokens.pop()
+            for token in tokens:
+                if token.startswith(b'\x01'):
+                    finish()
+                    fields = [token[1:].decode('ascii')]
+                    paths = [] if with_paths else None
+                elif fields is not None and len(fields) < 4:
+                    fields.append(token.decode('utf-8', errors='replace'))
+                elif token.strip(b'\n') and paths is not None:
+                    paths.append(os.fsdecode(token.lstrip(b'\n')))
+        if remainder and fields is not None and len(fields) < 4:
+            fields.append(remainder.decode('utf-8', errors='replace'))
+        finish()
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+        errors.seek(0)
+        stderr = errors.read()
+        errors.close()
+        span.finish(returncode, bytes_out, len(stderr))
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, git_cmd, stderr=stderr.decode('utf-8', errors='replace'))
+    return store
+
+
+def format_timestamp(timestamp):
+    return time.strftime('%a %b %d %H:%M:%S %Y', time.localtime(timestamp))
@@ -0,0 +1,197 @@
+import tkinter as tk
+from tkinter import ttk
+import tempfile
+from array import array
+
+
+class OutputConsole(ttk.Frame):
+    """Scrolling output pane with a bounded in-memory window.
+
+    Everything written is appended to an on-disk session log. The Text widget
+    only ever holds a window of at most ``max_lines`` lines / ``max_chars``
+    characters of that log: while following the tail, older lines are dropped
+    from the top, and when the user scrolls past either edge of the window the
+    neighbouring page is read back in from disk. Memory use and insert cost
+    therefore stay flat however much output a session produces.
+    """
+
+    # Line start offsets are only kept for every INDEX_STRIDE-th line
+    INDEX_STRIDE = 256
+
+    def __init__(self, master, max_lines=5000, max_chars=2 * 1024 * 1024, page_lines=1000,
+                 log_dir=None, **text_options):
+        super().__init__(master)
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.page_lines = page_lines
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical")
+        self.text = tk.Text(self, yscrollcommand=self._on_yscroll, **text_options)
+        self.scrollbar.configure(command=self.text.yview)
+        self.text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        self._log = tempfile.TemporaryFile(prefix="git-output-", suffix=".log", dir=log_dir)
+        self._reset_state()
+
+    def _reset_state(self):
+        self._log_size = 0
+        self._index = array('Q', [0])
+        self._total_lines = 0      # complete (newline terminated) lines in the log
+        self._window_start = 0     # first log line shown in the widget
+        self._window_end = 0       # one past the last complete log line shown
+        self._window_chars = 0
+        self._following = True     # widget shows the tail and receives new writes
+        self._page_pending = False
+
+    def tag_configure(self, tag_name, **options):
+        return self.text.tag_configure(tag_name, **options)
+
+    @property
+    def total_lines(self):
+        return self._total_lines
+
+    def write(self, text, tag=None):
+        """Append text to the log and, when following, to the visible window"""
+        if not text:
+            return
+        self._append_log(text.encode('utf-8'))
+        if not self._following:
+            return
+        if tag:
+            self.text.insert(tk.END, text, tag)
+        else:
+            self.text.insert(tk.END, text)
+        self._window_chars += len(text)
+        self._window_end = self._total_lines
+        self._trim_top()
+        self.text.see(tk.END)
+
+    def ends_with_newline(self):
+        """True when the log is empty or its last line is complete"""
+        return self._log_size == 0 or self._tail_offset() == self._log_size
+
+    def clear(self):
+        """Drop all output, both on screen and on disk"""
+        self.text.delete("1.0", tk.END)
+        self._log.seek(0)
+        self._log.truncate()
+        self._reset_state()
+
+    def close(self):
+        self._log.close()
+
+    # Log file handling
+
+    def _append_log(self, data):
+        self._log.seek(0, 2)
+        self._log.write(data)
+        base = self._log_size
+        self._log_size += len(data)
+
+        newlines = data.count(b'\n')
+        to_boundary = self.INDEX_STRIDE - self._total_lines % self.INDEX_STRIDE
+        if newlines < to_boundary:
+            self._total_lines += newlines
+            return
+        pos = 0
+        for _ in range(newlines):
+            pos = data.index(b'\n', pos) + 1
+            self._total_lines += 1
+            if self._total_lines % self.INDEX_STRIDE == 0:
+                self._index.append(base + pos)
+
+    def _seek_line(self, line):
+        """Position the log at the start of ``line`` and return its offset"""
+        self._log.flush()
+        self._log.seek(self._index[line // self.INDEX_STRIDE])
+        for _ in range(line % self.INDEX_STRIDE):
+            self._log.readline()
+        return self._log.tell()
+
+    def _tail_offset(self):
+        return self._seek_line(self._total_lines)
+
+    def _read_lines(self, start, end, include_tail=False):
+        self._seek_line(start)
+        chunks = [self._log.readline() for _ in range(end - start)]
+        if include_tail:
+            chunks.append(self._log.read())
+        return b''.join(chunks).decode('utf-8', errors='replace')
+
+    # Window management
+
+    def _widget_lines(self):
+        return self._window_end - self._window_start
+
+    def _trim_top(self):
+        excess = self._widget_lines() - self.max_lines
+        if excess <= 0 and self._window_chars <= self.max_chars:
+            return
+        # Trim in whole pages so the cost is amortised over many writes
+        count = max(excess, 0) + self.page_lines
+        count = min(count, self._widget_lines())
+        if count <= 0:
+            # Only an unterminated line is shown (progress output, minified
+            # JSON): cut its start instead, down to three quarters of
+            # max_chars so this does not run on every write. The log keeps it all.
+            cut = self._window_chars - self.max_chars * 3 // 4
+            if self._window_chars > self.max_chars and cut > 0:
+                self.text.delete("1.0", f"1.0 + {cut} chars")
+                self._window_chars -= cut
+            return
+        removed = self.text.get("1.0", f"{count + 1}.0")
+        self.text.delete("1.0", f"{count + 1}.0")
+        self._window_chars -= len(removed)
+        self._window_start += count
+
+    def _trim_bottom(self):
+        keep = min(self._widget_lines(), self.max_lines)
+        self.text.delete(f"{keep + 1}.0", tk.END)
+        self._window_end = self._window_start + keep
+        self._window_chars = len(self.text.get("1.0", "end-1c"))
+        self._following = False
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._page_pending:
+            return
+        if float(first) <= 0.0 and self._window_start > 0:
+            self._page_pending = True
+            self.after_idle(self._page_up)
+        elif float(last) >= 1.0 and not self._following:
+            self._page_pending = True
+            self.after_idle(self._page_down)
+
+    def _page_up(self):
+        self._page_pending = False
+        if self._window_start == 0:
+            return
+        start = max(0, self._window_start - self.page_lines)
+        text = self._read_lines(start, self._window_start)
+        self.text.insert("1.0", text)
+        added = self._window_start - start
+        self._window_start = start
+        self._window_chars += len(text)
+        self._trim_bottom()
+        self.text.yview(f"{added + 1}.0")
+
+    def _page_down(self):
+        self._page_pending = False
+        if self._following:
+            return
+        end = min(self._total_lines, self._window_end + self.page_lines)
+        at_tail = end == self._total_lines
+        first_visible = self.text.index("@0,0")
+        text = self._read_lines(self._window_end, end, include_tail=at_tail)
+        self.text.insert(tk.END, text)
+        self._window_end = end
+        self._window_chars += len(text)
+        self._following = at_tail
+        before = self._window_start
+        self._trim_top()
+        removed = self._window_start - before
+        line = int(first_visible.split('.')[0]) - removed
+        self.text.yview(f"{max(line, 1)}.0")
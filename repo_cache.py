@@ -0,0 +1,204 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from commit_history import HistoryPages, find_git_dir, read_head_oid
+from log_store import CommitStore
+from repo_status import FileStatus
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    repo TEXT NOT NULL,
+    section TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    data BLOB NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (repo, section)
+)
+"""
+
+
+def default_cache_path():
+    """SQLite file in the per-user cache directory ($REPOROCKET_CACHE_DIR overrides)"""
+    base = os.environ.get("REPOROCKET_CACHE_DIR")
+    if not base:
+        if sys.platform == 'win32':
+            base = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "RepoRocket", "Cache")
+        elif sys.platform == 'darwin':
+            base = os.path.join(os.path.expanduser("~/Library/Caches"), "RepoRocket")
+        else:
+            base = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "reporocket")
+    return os.path.join(base, "metadata.sqlite3")
+
+
+def repo_fingerprint(repo_path):
+    """HEAD object id plus the index's mtime and size, read without running git.
+
+    None outside a git repository. Anything that commits, checks out or
+    stages changes at least one of the three.
+    """
+    head = read_head_oid(repo_path)
+    try:
+        st = os.stat(os.path.join(find_git_dir(repo_path), 'index'))
+        index = f"{st.st_mtime_ns}:{st.st_size}"
+    except OSError:
+        index = "-"
+    if head is None and index == "-":
+        return None
+    return f"{head or '-'}:{index}"
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), 1)
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+class CachedRepo:
+    """What the cache knows about a repository that is still current.
+
+    ``files`` is the file list, ``status`` a ``(files, branch)`` pair for
+    RepoStatus.restore() and ``history`` a ``(head_oid, HistoryPages)`` pair;
+    each is None when missing or recorded for another HEAD/index.
+    """
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.files = None
+        self.status = None
+        self.history = None
+
+
+class RepoCache:
+    """On-disk cache of file lists, status snapshots and history pages.
+
+    Entries are keyed by repository path and section, and carry the
+    fingerprint (``repo_fingerprint()``; HEAD alone for history) they were
+    recorded under, so a reopened repository is painted from the cache only
+    while HEAD and the index are unchanged. The caller still revalidates
+    with git in the background. Reads happen on the calling thread; writes
+    are queued to one background thread, so saving never blocks the UI.
+    """
+
+    MAX_REPOS = 50
+    HISTORY_LIMIT = 1000
+
+    def __init__(self, path=None):
+        self.path = path or default_cache_path()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(SCHEMA)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="repo-cache")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    # Reads
+
+    def load(self, repo_path):
+        """Return a CachedRepo with the entries still valid for ``repo_path``"""
+        fingerprint = repo_fingerprint(repo_path)
+        cached = CachedRepo(fingerprint)
+        if fingerprint is None:
+            return cached
+        head = fingerprint.split(':', 1)[0]
+        try:
+            with self._connect() as db:
+                rows = db.execute("SELECT section, fingerprint, data FROM entries WHERE repo = ?",
+                                  (self._key(repo_path),)).fetchall()
+        except sqlite3.Error:
+            return cached
+        for section, stored, data in rows:
+            try:
+                if section == 'files' and stored == fingerprint:
+                    cached.files = zlib.decompress(data).decode('utf-8', errors='surrogateescape').split('\0')
+                    if cached.files == ['']:
+                        cached.files = []
+                elif section == 'status' and stored == fingerprint:
+                    value = _unpack(data)
+                    files = {path: FileStatus(path, kind, xy, orig_path)
+                             for path, kind, xy, orig_path in value['files']}
+                    cached.status = (files, value['branch'])
+                elif section == 'history' and stored == head:
+                    value = _unpack(data)
+                    commits = CommitStore()
+                    for oid, author, timestamp, subject in value['commits']:
+                        commits.append(oid, author, timestamp, subject)
+                    cached.history = (head, HistoryPages(commits, value['complete'], value['base'],
+                                                         value['base_offset']))
+            except (zlib.error, ValueError, KeyError, TypeError):
+                # Corrupt or from an older format: ignore, it gets rewritten
+                continue
+        return cached
+
+    # Writes (queued)
+
+    def save_files(self, repo_path, fingerprint, files):
+        if fingerprint is None:
+            return
+        self._submit(self._write, repo_path, 'files', fingerprint,
+                     lambda: zlib.compress('\0'.join(files).encode('utf-8', errors='surrogateescape'), 1))
+
+    def save_status(self, repo_path, fingerprint, files, branch):
+        if fingerprint is None:
+            return
+        entries = [(entry.path, entry.kind, entry.xy, entry.orig_path) for entry in files.values()]
+        self._submit(self._write, repo_path, 'status', fingerprint,
+                     lambda: _pack({'files': entries, 'branch': dict(branch)}))
+
+    def save_history(self, repo_path, head_oid, pages):
+        """Store the first HISTORY_LIMIT loaded commits for ``head_oid``"""
+        if head_oid is None:
+            return
+        # The store is append-only, so rows below this count stay valid. Never
+        # cut into fast-forwarded commits, which the base walk cannot reload.
+        count = min(len(pages.commits), max(self.HISTORY_LIMIT, pages.base_offset))
+        complete = pages.complete and count == len(pages.commits)
+        base, base_offset = pages.base, pages.base_offset
+        self._submit(self._write, repo_path, 'history', head_oid,
+                     lambda: _pack({'commits': list(pages.commits.rows(0, count)), 'complete': complete,
+                                    'base': base, 'base_offset': base_offset}))
+
+    def flush(self):
+        """Wait for queued writes"""
+        self._writer.submit(lambda: None).result()
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+
+    def _submit(self, func, *args):
+        try:
+            self._writer.submit(func, *args)
+        except RuntimeError:
+            pass  # closed
+
+    def _write(self, repo_path, section, fingerprint, encode):
+        try:
+            data = encode()
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO entries (repo, section, fingerprint, data, updated) "
+                           "VALUES (?, ?, ?, ?, ?)",
+                           (self._key(repo_path), section, fingerprint, data, time.time()))
+                # Forget the least recently saved repositories
+                db.execute("DELETE FROM entries WHERE repo NOT IN "
+                           "(SELECT repo FROM entries GROUP BY repo ORDER BY MAX(updated) DESC LIMIT ?)",
+                           (self.MAX_REPOS,))
+        except sqlite3.Error:
+            pass  # the cache is only an optimisation
+
+    def _key(self, repo_path):
+        return os.path.realpath(repo_path)
@@ -0,0 +1,397 @@
+"""Status of every git working tree under a directory, refreshed in parallel.
+
+    python repo_dashboard.py ~/src [--fetch] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tkinter as tk
+import zlib
+from tkinter import ttk, messagebox, filedialog
+
+from async_core import AsyncCore
+from file_index import PRUNED_DIRS
+from git_objects import ObjectNotFound, Repository
+from log_store import format_timestamp
+from repo_status import parse_porcelain_v2
+
+# One line: oid, author, timestamp, subject
+LAST_COMMIT_FORMAT = '--format=%H%x00%an%x00%at%x00%s'
+
+
+def discover_repos(root, max_depth=4):
+    """Working trees under ``root``, sorted; repositories are not descended into"""
+    root = os.path.abspath(root)
+    base_depth = root.rstrip(os.sep).count(os.sep)
+    repos = []
+    for dir_path, dirs, files in os.walk(root):
+        if '.git' in dirs or '.git' in files:
+            repos.append(dir_path)
+            dirs[:] = []
+            continue
+        if dir_path.rstrip(os.sep).count(os.sep) - base_depth >= max_depth:
+            dirs[:] = []
+            continue
+        dirs[:] = sorted(d for d in dirs if d not in PRUNED_DIRS and not d.startswith('.'))
+    return sorted(repos)
+
+
+class RepoSummary:
+    """Branch, ahead/behind, dirty state and last commit of one working tree"""
+
+    def __init__(self, path):
+        self.path = path
+        self.branch = None
+        self.upstream = None
+        self.ahead = None
+        self.behind = None
+        self.changed = 0
+        self.untracked = 0
+        self.last_oid = None
+        self.last_author = None
+        self.last_time = None
+        self.last_subject = None
+        self.state = 'pending'    # 'pending', 'ok', 'fetch', 'pull' (running) or 'failed'
+        self.error = None
+        self.updated = None
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def dirty(self):
+        return bool(self.changed or self.untracked)
+
+
+class RepoDashboard:
+    """Refreshes, fetches and pulls many repositories on an AsyncCore.
+
+    Each repository costs one ``git status --branch``; the last commit is
+    read in-process with git_objects on an executor thread (``git log -1``
+    only if that fails). At most ``concurrency`` repositories are worked on at
+    once (and the core caps the total number of git processes), so hundreds
+    of clones cost coroutines rather than threads. Results are reported one
+    repository at a time through ``on_result(summary)``.
+    """
+
+    def __init__(self, core, concurrency=16, env=None):
+        self.core = core
+        self.concurrency = concurrency
+        # Network commands must fail rather than wait for a password prompt
+        self.env = dict(env if env is not None else os.environ, GIT_TERMINAL_PROMPT='0')
+        self.summaries = {}
+
+    def summary(self, path):
+        summary = self.summaries.get(path)
+        if summary is None:
+            summary = self.summaries[path] = RepoSummary(path)
+        return summary
+
+    async def refresh(self, paths, on_result=None):
+        """Inspect every repository in ``paths``; return their summaries"""
+        return await self._each(paths, self.concurrency, self._refresh_one, on_result)
+
+    async def fetch(self, paths, concurrency=4, on_result=None):
+        return await self._each(paths, concurrency, lambda path: self._network(path, 'fetch'), on_result)
+
+    async def pull(self, paths, concurrency=4, on_result=None):
+        """Fast-forward-only pulls; diverged or dirty repositories are reported as failed"""
+        return await self._each(paths, concurrency, lambda path: self._network(path, 'pull'), on_result)
+
+    async def _each(self, paths, concurrency, work, on_result):
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one(path):
+            async with slots:
+                summary = await work(path)
+            if on_result is not None:
+                on_result(summary)
+            return summary
+
+        return await asyncio.gather(*(one(path) for path in paths))
+
+    async def _refresh_one(self, path):
+        summary = self.summary(path)
+        status = await self.core.git(['git', '-c', 'core.untrackedCache=true', 'status', '--porcelain=v2', '-z',
+                                      '--branch', '--untracked-files=normal'], cwd=path, env=self.env)
+        if status.returncode != 0:
+            summary.state = 'failed'
+            summary.error = status.stderr.decode('utf-8', errors='replace').strip() or "git status failed"
+            summary.updated = time.time()
+            return summary
+
+        files, branch = parse_porcelain_v2(status.stdout)
+        summary.branch = branch.get('branch.head')
+        summary.upstream = branch.get('branch.upstream')
+        summary.ahead = summary.behind = None
+        if 'branch.ab' in branch:
+            ahead, behind = branch['branch.ab'].split()
+            summary.ahead, summary.behind = int(ahead), -int(behind)
+        summary.untracked = sum(1 for entry in files.values() if entry.kind == 'untracked')
+        summary.changed = sum(1 for entry in files.values() if entry.kind not in ('untracked', 'ignored'))
+
+        summary.last_oid = summary.last_author = summary.last_time = summary.last_subject = None
+        last = await self._last_commit(path)
+        if last is not None:
+            summary.last_oid, summary.last_author, summary.last_time, summary.last_subject = last
+        summary.state = 'ok'
+        summary.error = None
+        summary.updated = time.time()
+        return summary
+
+    async def _last_commit(self, path):
+        """``(oid, author, author_time, subject)`` of HEAD; None on an unborn branch"""
+        # Reading objects blocks on disk, so keep it off the event loop
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, self._read_last_commit, path)
+        except (ObjectNotFound, OSError, ValueError, zlib.error):
+            pass
+        last = await self.core.git(['git', 'log', '-1', LAST_COMMIT_FORMAT], cwd=path, env=self.env)
+        fields = last.stdout.decode('utf-8', errors='replace').rstrip('\n').split('\0')
+        if last.returncode != 0 or len(fields) != 4:
+            return None
+        return fields[0], fields[1], int(fields[2] or 0), fields[3]
+
+    def _read_last_commit(self, path):
+        repo = Repository(path, cache_bytes=0)
+        try:
+            if repo.head() is None:
+                return None
+            commit = repo.commit('HEAD')
+            return commit.oid, commit.author, commit.author_time, commit.subject
+        finally:
+            repo.close()
+
+    async def _network(self, path, action):
+        summary = self.summary(path)
+        summary.state = action
+        summary.error = None
+        git_cmd = ['git', 'fetch', '--prune'] if action == 'fetch' else ['git', 'pull', '--ff-only']
+        result = await self.core.git(git_cmd, cwd=path, env=self.env)
+        await self._refresh_one(path)
+        if result.returncode != 0:
+            lines = result.stderr.decode('utf-8', errors='replace').strip().splitlines()
+            summary.state = 'failed'
+            summary.error = lines[-1] if lines else f"{action} failed"
+        return summary
+
+
+def describe_age(timestamp, now=None):
+    if timestamp is None:
+        return ""
+    seconds = max(0, (now or time.time()) - timestamp)
+    for unit, size in (('y', 365 * 86400), ('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return "now"
+
+
+class DashboardWindow:
+    """Table of every repository under a root directory with bulk fetch/pull.
+
+    Work runs on the app's AsyncCore and each finished repository updates its
+    row through the UI bus; ``on_open(path)`` is called for a double-clicked
+    row.
+    """
+
+    COLUMNS = [
+        ('repo', "Repository", 180),
+        ('branch', "Branch", 110),
+        ('ahead', "Ahead", 55),
+        ('behind', "Behind", 55),
+        ('dirty', "Changes", 80),
+        ('commit', "Last Commit", 260),
+        ('age', "Age", 50),
+        ('state', "State", 160),
+    ]
+
+    def __init__(self, master, core, ui_bus, on_open=None, root_dir="", env=None):
+        self.core = core
+        self.ui_bus = ui_bus
+        self.on_open = on_open
+        self.dashboard = RepoDashboard(core, env=env)
+        self.repos = []
+        self.task = None
+        self.started = None
+
+        self.window = tk.Toplevel(master)
+        self.window.title("Repository Dashboard")
+        self.window.geometry("1000x500")
+
+        top = ttk.Frame(self.window, padding=5)
+        top.pack(fill="x")
+        ttk.Label(top, text="Root:").pack(side="left")
+        self.root_dir = tk.StringVar(value=root_dir)
+        ttk.Entry(top, textvariable=self.root_dir, width=50).pack(side="left", padx=5, fill="x", expand=True)
+        ttk.Button(top, text="Browse", command=self.browse).pack(side="left", padx=5)
+        ttk.Button(top, text="Scan", command=self.scan).pack(side="left", padx=5)
+
+        frame = ttk.Frame(self.window, padding=5)
+        frame.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(frame, columns=[name for name, _, _ in self.COLUMNS], show="headings")
+        for name, heading, width in self.COLUMNS:
+            self.tree.heading(name, text=heading)
+            anchor = "e" if name in ('ahead', 'behind', 'age') else "w"
+            self.tree.column(name, width=width, anchor=anchor, stretch=name in ('commit', 'state'))
+        self.tree.tag_configure('dirty', foreground="#b36b00")
+        self.tree.tag_configure('failed', foreground="#c62828")
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<Double-1>", self.open_selected)
+
+        buttons = ttk.Frame(self.window, padding=5)
+        buttons.pack(fill="x")
+        ttk.Button(buttons, text="Refresh", command=self.refresh).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Fetch All", command=lambda: self.run_network('fetch')).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Pull All", command=lambda: self.run_network('pull')).pack(side="left", padx=5)
+        ttk.Label(buttons, text="Parallel:").pack(side="left", padx=(10, 0))
+        self.network_concurrency = tk.IntVar(value=4)
+        ttk.Spinbox(buttons, from_=1, to=32, width=4, textvariable=self.network_concurrency).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Stop", command=self.stop).pack(side="left", padx=5)
+        self.summary = tk.StringVar()
+        ttk.Label(buttons, textvariable=self.summary).pack(side="right", padx=5)
+
+        if root_dir:
+            self.scan()
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def lift(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def browse(self):
+        path = filedialog.askdirectory(parent=self.window, initialdir=self.root_dir.get() or os.path.expanduser("~"),
+                                       title="Select Root Directory")
+        if path:
+            self.root_dir.set(path)
+            self.scan()
+
+    def scan(self):
+        root_dir = self.root_dir.get()
+        if not root_dir or not os.path.isdir(root_dir):
+            messagebox.showerror("Error", "Select a valid root directory!", parent=self.window)
+            return
+        self.stop()
+        self.repos = discover_repos(root_dir)
+        self.tree.delete(*self.tree.get_children())
+        for path in self.repos:
+            self.tree.insert("", tk.END, iid=path, values=(os.path.relpath(path, root_dir),) + ("",) * 6 + ("queued",))
+        self.refresh()
+
+    def refresh(self):
+        self._start("Refreshing", self.dashboard.refresh(self.repos, on_result=self._post_row))
+
+    def run_network(self, action):
+        try:
+            concurrency = max(1, self.network_concurrency.get())
+        except tk.TclError:
+            concurrency = 4
+        work = self.dashboard.fetch if action == 'fetch' else self.dashboard.pull
+        for path in self.repos:
+            self.tree.set(path, 'state', f"{action} queued")
+        self._start(f"{action.capitalize()}ing", work(self.repos, concurrency, on_result=self._post_row))
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def _start(self, label, coro):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        if not self.repos:
+            coro.close()
+            self.summary.set("No repositories found")
+            return
+        self.started = time.perf_counter()
+        self.summary.set(f"{label} {len(self.repos)} repositories...")
+        self.task = self.core.submit(coro, on_done=lambda result, error: self._finished(label, result, error))
+
+    def _post_row(self, summary):
+        # Called on the loop thread; rows are updated on the Tk thread
+        self.ui_bus.post(self._update_row, summary)
+
+    def _update_row(self, summary):
+        if not self.exists() or not self.tree.exists(summary.path):
+            return
+        dirty = []
+        if summary.changed:
+            dirty.append(f"{summary.changed} changed")
+        if summary.untracked:
+            dirty.append(f"{summary.untracked} new")
+        commit = ""
+        if summary.last_oid:
+            commit = f"{summary.last_oid[:7]} {summary.last_subject} ({summary.last_author})"
+        state = summary.error if summary.state == 'failed' else summary.state
+        self.tree.item(summary.path, values=(
+            self.tree.set(summary.path, 'repo'),
+            summary.branch or "",
+            "" if summary.ahead is None else summary.ahead,
+            "" if summary.behind is None else summary.behind,
+            ", ".join(dirty) or "clean",
+            commit,
+            describe_age(summary.last_time),
+            state,
+        ), tags=('failed',) if summary.state == 'failed' else ('dirty',) if summary.dirty else ())
+
+    def _finished(self, label, result, error):
+        if not self.exists():
+            return
+        elapsed = time.perf_counter() - self.started
+        if isinstance(error, asyncio.CancelledError):
+            self.summary.set(f"{label} stopped after {elapsed:.1f}s")
+        elif error is not None:
+            self.summary.set(f"{label} failed: {error}")
+        else:
+            failed = sum(1 for summary in result if summary.state == 'failed')
+            dirty = sum(1 for summary in result if summary.dirty)
+            self.summary.set(f"{len(result)} repositories in {elapsed:.1f}s, {dirty} with changes, {failed} failed")
+
+    def open_selected(self, event=None):
+        selection = self.tree.selection()
+        if selection and self.on_open is not None:
+            self.on_open(selection[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the status of every git repository under a directory.")
+    parser.add_argument('root', help="Directory to search for repositories")
+    parser.add_argument('--fetch', action='store_true', help="Fetch every repository first")
+    parser.add_argument('--concurrency', type=int, default=16, help="Repositories inspected at once")
+    parser.add_argument('--max-depth', type=int, default=4, help="Directory levels searched below the root")
+    args = parser.parse_args(argv)
+
+    core = AsyncCore(max_processes=args.concurrency * 2).start()
+    dashboard = RepoDashboard(core, concurrency=args.concurrency)
+    try:
+        started = time.perf_counter()
+        repos = discover_repos(args.root, args.max_depth)
+        if args.fetch:
+            summaries = core.submit(dashboard.fetch(repos, args.concurrency)).future.result()
+        else:
+            summaries = core.submit(dashboard.refresh(repos)).future.result()
+        elapsed = time.perf_counter() - started
+    finally:
+        core.shutdown()
+
+    for summary in summaries:
+        ab = "" if summary.ahead is None else f"+{summary.ahead} -{summary.behind}"
+        dirty = "dirty" if summary.dirty else "clean"
+        last = format_timestamp(summary.last_time) if summary.last_time is not None else ""
+        detail = summary.error if summary.state == 'failed' else last
+        print(f"{os.path.relpath(summary.path, args.root):40s} {summary.branch or '':20s} {ab:10s} {dirty:6s} {detail}")
+    print(f"{len(summaries)} repositories in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+from commit_history import find_git_dir, find_toplevel
+from file_saver import TEMP_SUFFIX
+from tracing import tracer
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: fall back to mtime tracking
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class FileStatus:
+    """One entry of ``git status --porcelain=v2``"""
+
+    __slots__ = ('path', 'kind', 'xy', 'orig_path')
+
+    def __init__(self, path, kind, xy, orig_path=None):
+        self.path = path
+        self.kind = kind          # 'changed', 'renamed', 'unmerged', 'untracked' or 'ignored'
+        self.xy = xy              # index / worktree status letters, '??' for untracked
+        self.orig_path = orig_path
+
+    @property
+    def staged(self):
+        return self.xy[0] not in '.?!'
+
+    @property
+    def unstaged(self):
+        return self.xy[1] not in '.?!'
+
+    def __repr__(self):
+        return f"FileStatus({self.path!r}, {self.kind!r}, {self.xy!r})"
+
+
+def parse_porcelain_v2(data):
+    """Parse ``git status --porcelain=v2 -z [--branch]`` output.
+
+    Returns ``(files, branch)`` where ``files`` maps each path to a
+    FileStatus and ``branch`` holds the ``# branch.*`` headers.
+    """
+    files = {}
+    branch = {}
+    records = data.split(b'\0')
+    index = 0
+    while index < len(records):
+        record = os.fsdecode(records[index])
+        index += 1
+        if not record:
+            continue
+        kind = record[0]
+        if kind == '#':
+            key, _, value = record[2:].partition(' ')
+            branch[key] = value
+        elif kind == '1':
+            # 1 XY sub mH mI mW hH hI path
+            fields = record.split(' ', 8)
+            files[fields[8]] = FileStatus(fields[8], 'changed', fields[1])
+        elif kind == '2':
+            # 2 XY sub mH mI mW hH hI Xscore path, followed by the original path
+            fields = record.split(' ', 9)
+            orig_path = os.fsdecode(records[index])
+            index += 1
+            files[fields[9]] = FileStatus(fields[9], 'renamed', fields[1], orig_path)
+        elif kind == 'u':
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            fields = record.split(' ', 10)
+            files[fields[10]] = FileStatus(fields[10], 'unmerged', fields[1])
+        elif kind == '?':
+            files[record[2:]] = FileStatus(record[2:], 'untracked', '??')
+        elif kind == '!':
+            files[record[2:]] = FileStatus(record[2:], 'ignored', '!!')
+    return files, branch
+
+
+_fsmonitor_supported = None
+
+
+def fsmonitor_supported():
+    """True if git's built-in fsmonitor daemon can be used on this machine"""
+    global _fsmonitor_supported
+    if _fsmonitor_supported is None:
+        _fsmonitor_supported = False
+        if sys.platform in ('win32', 'darwin'):
+            try:
+                output = tracer.run(['git', 'version'], capture_output=True, text=True).stdout
+                match = re.search(r'(\d+)\.(\d+)', output)
+                _fsmonitor_supported = bool(match) and (int(match.group(1)), int(match.group(2))) >= (2, 36)
+            except OSError:
+                pass
+    return _fsmonitor_supported
+
+
+def status_command(pathspecs=None, branch=False):
+    """``git status --porcelain=v2 -z`` with the untracked cache (and
+    fsmonitor where supported) switched on; run it from the top of the tree"""
+    git_cmd = ['git', '-c', 'core.untrackedCache=true']
+    if fsmonitor_supported():
+        git_cmd += ['-c', 'core.fsmonitor=true']
+    git_cmd += ['status', '--porcelain=v2', '-z', '--untracked-files=all']
+    if branch:
+        git_cmd.append('--branch')
+    if pathspecs is not None:
+        git_cmd += ['--', *pathspecs]
+    return git_cmd
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, status):
+        self.status = status
+
+    def on_any_event(self, event):
+        for path in (getattr(event, 'src_path', None), getattr(event, 'dest_path', None)):
+            if path:
+                self.status.note_change(path)
+
+
+class RepoStatus:
+    """Structured, incrementally maintained ``git status`` of one working tree.
+
+    ``refresh()`` runs one full ``git status --porcelain=v2 -z``, with the
+    untracked cache (and fsmonitor where git supports it) switched on for the
+    call. Afterwards ``refresh_paths()`` re-checks only the given paths with a
+    pathspec-limited status, so saving one file costs a status of one file.
+    ``scan()``/``scan_paths()`` run git without touching the model, so they
+    can run on a worker thread, and ``apply()``/``apply_paths()`` merge the
+    result on the thread that owns the model.
+
+    Git runs from the top of the working tree and every path in the model is
+    relative to it, even when ``repo_path`` is a subdirectory. Changes made
+    outside the app are reported by ``poll()``: through watchdog notifications
+    when that package is installed, otherwise by watching the mtimes of the
+    index/HEAD and of the paths already known to be dirty, plus a full scan
+    every FALLBACK_SCAN_SECONDS for edits to clean files. The model is a hint
+    for display; anything that must be exact (committing, searching) should
+    scan afresh.
+    """
+
+    # poll() result asking for a full scan
+    FULL = 'full'
+    # More changed paths than this are re-checked with a full scan
+    MAX_PATHSPECS = 200
+    FALLBACK_SCAN_SECONDS = 30
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.toplevel = find_toplevel(repo_path) or repo_path
+        git_dir = find_git_dir(self.toplevel)
+        # Files that change whenever git itself touches the index or moves HEAD
+        self.git_state_files = [os.path.join(git_dir, 'index'), os.path.join(git_dir, 'HEAD'),
+                                os.path.join(git_dir, 'logs', 'HEAD')]
+        self.files = {}
+        self.branch = {}
+        self.loaded = False
+        self.error = None
+        # Bumped by every update, so a background scan can tell it is outdated
+        self.version = 0
+        self._lock = threading.Lock()
+        self._changed = set()
+        self._mtimes = {}
+        self._written = {}
+        self._observer = None
+        self._scanned_at = 0.0
+
+    # Queries
+
+    @property
+    def clean(self):
+        return not any(entry.kind != 'ignored' for entry in self.files.values())
+
+    def counts(self):
+        counts = {}
+        for entry in self.files.values():
+            counts[entry.kind] = counts.get(entry.kind, 0) + 1
+        return counts
+
+    def dirty_paths(self):
+        """Paths with working tree or index changes (including untracked files)"""
+        return [path for path, entry in self.files.items() if entry.kind != 'ignored']
+
+    def maybe_dirty_paths(self):
+        """Dirty paths plus those the watcher reported since the last scan,
+        relative to the top of the tree; a superset of what a fresh scan
+        would list as dirty. None when only a scan can tell (not loaded, or
+        no watchdog notifications for edits to clean files)."""
+        if not self.loaded or self.error or self._observer is None:
+            return None
+        with self._lock:
+            changed = list(self._changed)
+        paths = set(self.dirty_paths())
+        for path in changed:
+            relative = self._relative(path)
+            if relative.startswith('..') or self._in_git_dir(relative) or path.endswith(TEMP_SUFFIX):
+                continue
+            if not os.path.isdir(os.path.join(self.toplevel, relative)):
+                paths.add(relative)
+        return sorted(paths)
+
+    def summary(self):
+        if self.error:
+            return f"Error ({self.error})"
+        if not self.loaded:
+            return "Not Loaded"
+        if self.clean:
+            return "Clean"
+        parts = [f"{count} {kind}" for kind, count in sorted(self.counts().items()) if kind != 'ignored']
+        return f"Changes Pending ({', '.join(parts)})"
+
+    # Updates
+
+    def _git_status(self, pathspecs=None, branch=False):
+        result = tracer.run(status_command(pathspecs, branch), cwd=self.toplevel, capture_output=True, check=True)
+        return parse_porcelain_v2(result.stdout)
+
+    def scan(self):
+        """Run a full status and return ``(files, branch)`` without applying it.
+
+        Touches no model state, so it may run on a worker thread; pass the
+        result to ``apply()`` on the thread that owns the model.
+        """
+        return self._git_status(branch=True)
+
+    def refresh(self):
+        """Full status scan; raises CalledProcessError outside a git repo"""
+        try:
+            files, branch = self.scan()
+        except subprocess.CalledProcessError:
+            self.error = "Not a Git Repo"
+            self.version += 1
+            raise
+        return self.apply(files, branch)
+
+    def apply(self, files, branch):
+        """Replace the model with the result of a full scan"""
+        with self._lock:
+            self._changed.clear()
+        self._written = {}
+        self.files = files
+        self.branch = branch
+        self.loaded = True
+        self.error = None
+        self.version += 1
+        self._scanned_at = time.monotonic()
+        self._remember_mtimes()
+        return self
+
+    def restore(self, files, branch):
+        """Load a snapshot saved earlier (e.g. from repo_cache) instead of scanning"""
+        return self.apply(files, branch)
+
+    def refresh_paths(self, paths):
+        """Re-check only ``paths`` (absolute or relative to the top of the tree)"""
+        if not self.loaded:
+            return self.refresh()
+        return self.apply_paths(*self.scan_paths(paths))
+
+    def scan_paths(self, paths):
+        """Pathspec-limited status of ``paths``; returns ``(relative, files)``
+        for ``apply_paths()`` without touching the model"""
+        relative = sorted({self._relative(path) for path in paths if path})
+        relative = [path for path in relative if not path.startswith('..') and not self._in_git_dir(path)]
+        if not relative:
+            return relative, {}
+        files, _ = self._git_status(pathspecs=[f':(top,literal){path}' for path in relative])
+        return relative, files
+
+    def apply_paths(self, relative, files):
+        """Merge a ``scan_paths()`` result into the model"""
+        if not relative:
+            return self
+        wanted = set(relative)
+        # A new dict, so readers on other threads never see it half updated
+        merged = {path: entry for path, entry in self.files.items()
+                  if not (path in wanted or entry.orig_path in wanted or
+                          any(path.startswith(p + '/') for p in wanted))}
+        merged.update(files)
+        self.files = merged
+        self.version += 1
+        for path in relative:
+            self._written.pop(path, None)
+        self._remember_mtimes(relative + self.git_state_files)
+        return self
+
+    def note_change(self, path):
+        """Record a changed path; thread-safe, applied on the next poll()"""
+        with self._lock:
+            self._changed.add(path)
+
+    def note_written(self, path, matches_index):
+        """Account for a file the app just wrote itself.
+
+        ``matches_index`` says whether the new content equals the staged blob
+        (None for untracked files). Returns True if the model is still accurate,
+        in which case the write is not reported by later polls; False means
+        the caller should ``refresh_paths([path])``.
+        """
+        if not self.loaded:
+            return False
+        relative = self._relative(path)
+        entry = self.files.get(relative)
+        if matches_index is None:
+            current = entry is not None and entry.kind == 'untracked'
+        elif matches_index:
+            current = entry is None or (entry.kind in ('changed', 'renamed') and not entry.unstaged)
+        else:
+            current = entry is not None and entry.kind in ('changed', 'renamed') and entry.unstaged
+        if current:
+            stat = self._stat(relative)
+            self._written[relative] = stat
+            if relative in self._mtimes:
+                self._mtimes[relative] = stat
+        return current
+
+    def poll(self):
+        """Collect pending change notifications without running git.
+
+        Returns None when nothing changed, FULL when a full ``scan()`` is
+        needed (git state changed, too many paths changed, or the periodic
+        scan of the mtime fallback is due), else the paths for ``scan_paths()``.
+        """
+        if not self.loaded:
+            return None
+        if self._git_state_changed():
+            # Something ran git behind our back: index or refs changed
+            return self.FULL
+        if self._observer is None:
+            if time.monotonic() - self._scanned_at > self.FALLBACK_SCAN_SECONDS:
+                return self.FULL
+            self._check_dirty_mtimes()
+        with self._lock:
+            changed = {path for path in self._changed
+                       if not self._in_git_dir(self._relative(path)) and not path.endswith(TEMP_SUFFIX)}
+            self._changed = set()
+        # Writes the app already accounted for in note_written()
+        changed = {path for path in changed
+                   if self._written.get(self._relative(path), False) != self._stat(self._relative(path))}
+        if len(changed) > self.MAX_PATHSPECS:
+            return self.FULL
+        return sorted(changed) or None
+
+    def refresh_changes(self):
+        """Apply what ``poll()`` reports, running git on this thread; return
+        True if anything was re-checked"""
+        change = self.poll()
+        if change == self.FULL:
+            self.refresh()
+        elif change:
+            self.refresh_paths(change)
+        return bool(change)
+
+    # Change tracking
+
+    def start_watching(self):
+        """Start watchdog notifications if available; return True on success"""
+        if Observer is None or self._observer is not None:
+            return self._observer is not None
+        observer = Observer()
+        observer.schedule(_ChangeHandler(self), self.toplevel, recursive=True)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        return True
+
+    def stop_watching(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def _relative(self, path):
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.toplevel)
+        return path.replace(os.sep, '/')
+
+    def _in_git_dir(self, relative):
+        return relative == '.git' or relative.startswith('.git/')
+
+    def _stat(self, relative):
+        try:
+            # Absolute paths (the git state files) are kept as they are
+            st = os.stat(os.path.join(self.toplevel, relative))
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _remember_mtimes(self, paths=None):
+        if paths is None:
+            self._mtimes = {}
+            paths = self.git_state_files + self.dirty_paths()
+        for path in paths:
+            self._mtimes[path] = self._stat(path)
+
+    def _git_state_changed(self):
+        return any(self._stat(path) != self._mtimes.get(path) for path in self.git_state_files)
+
+    def _check_dirty_mtimes(self):
+        for path, known in list(self._mtimes.items()):
+            if path not in self.git_state_files and self._stat(path) != known:
+                self.note_change(path)
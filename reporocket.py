@@ -2,10 +2,32 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import os
 import subprocess
-import requests
-import time
+import threading
+import asyncio
+import sqlite3
+from launch_pipeline import LaunchPipeline, describe_error
+from bulk_launch import BulkLauncher, load_manifest
+from file_index import list_repo_files
+from virtual_list import VirtualListbox
+from repo_status import RepoStatus
+from repo_cache import RepoCache, repo_fingerprint
+from commit_history import CommitHistory
+from log_store import format_timestamp
+from file_loader import classify_file, LargeFileView
+from file_saver import SaveTracker
+from commit_engine import NothingToCommit, commit_and_push_async
+from trace_view import OperationsWindow
+from ui_watchdog import UIWatchdog, StallReportWindow
+from ui_bus import UIBus
+from repo_dashboard import DashboardWindow
+from diff_view import DiffWindow
+from search_view import SearchWindow
+from async_core import AsyncCore
 
 class RepoTinker:
+    # How often the status model checks for changes made outside the app
+    STATUS_POLL_MS = 2000
+
     def __init__(self, root):
         self.root = root
         self.root.title("Repo-Rocket")
@@ -30,6 +52,10 @@ class RepoTinker:
         self.notes = tk.StringVar()
         self.new_directory = tk.StringVar()
         self.selected_file = None
+        # Set when the selected file is shown in the read-only large file view
+        self.selected_file_kind = None
+        # Line ending of the selected file, restored on save
+        self.selected_file_newline = "\n"
         self.commit_message = tk.StringVar(value="Update via Repo-Rocket")
         self.repo_status = tk.StringVar(value="Status: Not Loaded")
 
@@ -41,6 +67,44 @@ class RepoTinker:
         # Reference to the Notes tk.Text widget
         self.notes_text_widget = None
 
+        # Background launch pipeline and commit & push tasks (async_core.AsyncTask)
+        self.launch_task = None
+        self.commit_task = None
+        self.launch_status = tk.StringVar(value="")
+        self.last_launch_timings = {}
+
+        # Bumped on every load_files so stale background listings are dropped
+        self.file_listing_generation = 0
+
+        # Incrementally maintained git status of the selected directory
+        self.status_model = None
+        # Status scans running on worker threads
+        self.status_scans = 0
+
+        # Recent git/HTTP operations window, created on demand
+        self.operations_window = None
+        # Multi-repository dashboard, created on demand
+        self.dashboard_window = None
+        # Diff of the editor buffer against the index/HEAD, created on demand
+        self.diff_window = None
+        self.search_window = None
+
+        # Remembers what was loaded/saved so unchanged saves are skipped
+        self.save_tracker = None
+
+        # On-disk file list / status / history cache, painted before git revalidates
+        try:
+            self.metadata_cache = RepoCache()
+        except (OSError, sqlite3.Error):
+            self.metadata_cache = None
+
+        # Paginated commit history of the selected directory
+        self.history_model = None
+        self.history_loading = False
+        self.history_resync = False
+        self.history_rendered = 0
+        self.history_rendered_head = None
+
         # Load logo
         self.logo = None
         logo_path = os.path.join(os.path.dirname(__file__), "logo.png")
@@ -53,7 +117,19 @@ class RepoTinker:
             messagebox.showerror("Logo Error", f"Failed to load logo.png: {e}\nEnsure it's a 300x100px PNG file.")
 
         # GUI Setup
+        # Worker threads hand UI updates to the main thread through this bus
+        self.ui_bus = UIBus(self.root)
+        # asyncio loop thread that runs launches and commit & push as coroutines
+        self.core = AsyncCore(self.ui_bus).start()
+
         self.setup_ui()
+        self.ui_bus.start()
+        self.root.after(self.STATUS_POLL_MS, self.poll_repo_status)
+
+        # Logs callbacks that block the mainloop; see "UI Stalls"
+        self.watchdog = UIWatchdog(self.root)
+        self.watchdog.start()
+        self.stall_window = None
 
     def setup_ui(self):
         # Styles for black backgrounds
@@ -148,10 +224,21 @@ class RepoTinker:
             elif widget_type == "check":
                 ttk.Checkbutton(inner_form_frame, variable=var).pack(anchor="w", pady=2)
 
-        ttk.Button(inner_form_frame, text="Launch Repo", command=self.launch_repo, style="TButton").pack(side="top", pady=5)
+        self.launch_button = ttk.Button(inner_form_frame, text="Launch Repo", command=self.launch_repo, style="TButton")
+        self.launch_button.pack(side="top", pady=5)
+        self.cancel_launch_button = ttk.Button(inner_form_frame, text="Cancel Launch", command=self.cancel_launch,
+                                               style="TButton", state="disabled")
+        self.cancel_launch_button.pack(side="top", pady=5)
+        ttk.Button(inner_form_frame, text="Bulk Launch...", command=self.bulk_launch, style="TButton").pack(side="top", pady=5)
+        self.launch_progress = ttk.Progressbar(inner_form_frame, maximum=len(LaunchPipeline.STAGES), mode="determinate")
+        self.launch_progress.pack(fill="x", pady=2)
+        ttk.Label(inner_form_frame, textvariable=self.launch_status, style="TLabel").pack(anchor="w")
         ttk.Button(inner_form_frame, text="Clear Form", command=self.clear_form, style="TButton").pack(side="top", pady=5)
         # New: Add "Show Git Commands" button
         ttk.Button(inner_form_frame, text="Show Git Commands", command=self.show_git_commands, style="TButton").pack(side="top", pady=5)
+        ttk.Button(inner_form_frame, text="Recent Operations", command=self.show_operations, style="TButton").pack(side="top", pady=5)
+        ttk.Button(inner_form_frame, text="UI Stalls", command=self.show_stalls, style="TButton").pack(side="top", pady=5)
+        ttk.Button(inner_form_frame, text="Dashboard", command=self.show_dashboard, style="TButton").pack(side="top", pady=5)
 
         # Middle: Editor Frame
         editor_frame = ttk.LabelFrame(main_frame, text="Edit Repo", padding=10, style="Black.TLabelframe")
@@ -167,13 +254,20 @@ class RepoTinker:
         self.status_label.pack(anchor="w", pady=2)
 
         ttk.Label(editor_frame, text="Files:", style="TLabel").pack(anchor="w")
-        self.file_list = tk.Listbox(editor_frame, height=5, bg="#333333", fg="#ffffff", selectbackground="#4CAF50")
+        self.file_list = VirtualListbox(editor_frame, height=5, bg="#333333", fg="#ffffff", selectbackground="#4CAF50")
         self.file_list.pack(fill="x", pady=2)
         self.file_list.bind("<<ListboxSelect>>", self.load_file)
 
-        self.text_editor = tk.Text(editor_frame, height=10, bg="#333333", fg="#ffffff", insertbackground="white")
-        self.text_editor.pack(fill="both", expand=True, pady=2)
+        # Small text files are edited in text_editor; large, binary and LFS
+        # pointer files are paged into the read-only large_file_view instead
+        editor_container = ttk.Frame(editor_frame, style="Black.TFrame")
+        editor_container.pack(fill="both", expand=True, pady=2)
+        self.text_editor = tk.Text(editor_container, height=10, bg="#333333", fg="#ffffff", insertbackground="white")
+        self.text_editor.pack(fill="both", expand=True)
         self.text_editor.bind("<Button-3>", self.show_context_menu)
+        self.text_editor.bind("<<Modified>>", self.on_editor_modified)
+        self.text_editor.tag_configure('search_match', background="#5d4037")
+        self.large_file_view = LargeFileView(editor_container, height=10, bg="#333333", fg="#ffffff")
 
         ttk.Label(editor_frame, text="Commit Message:", style="TLabel").pack(anchor="w")
         self.commit_entry = ttk.Entry(editor_frame, textvariable=self.commit_message, width=50, style="TEntry")
@@ -183,13 +277,100 @@ class RepoTinker:
         btn_frame = ttk.Frame(editor_frame, style="Black.TFrame")
         btn_frame.pack(fill="x")
         ttk.Button(btn_frame, text="Save File", command=self.save_file, style="TButton").pack(side="left", padx=5)
-        ttk.Button(btn_frame, text="Commit & Push", command=self.commit_push, style="TButton").pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Show Diff", command=self.show_diff, style="TButton").pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Search", command=self.show_search, style="TButton").pack(side="left", padx=5)
+        self.commit_button = ttk.Button(btn_frame, text="Commit & Push", command=self.commit_push, style="TButton")
+        self.commit_button.pack(side="left", padx=5)
+        self.cancel_commit_button = ttk.Button(btn_frame, text="Cancel", command=self.cancel_commit_push,
+                                               style="TButton", state="disabled")
+        self.cancel_commit_button.pack(side="left", padx=5)
 
         # Right Side: Commit History Frame
         history_frame = ttk.LabelFrame(main_frame, text="Commit History", padding=5, style="Black.TLabelframe")
         history_frame.pack(side="right", fill="y", padx=5)
-        self.commit_history = tk.Listbox(history_frame, width=30, height=15, bg="#333333", fg="#ffeb3b", selectbackground="#4CAF50")
-        self.commit_history.pack(fill="y")
+        self.history_scrollbar = ttk.Scrollbar(history_frame, orient="vertical")
+        self.commit_history = tk.Listbox(history_frame, width=30, height=15, bg="#333333", fg="#ffeb3b", selectbackground="#4CAF50",
+                                         yscrollcommand=self.on_history_scroll)
+        self.history_scrollbar.configure(command=self.commit_history.yview)
+        self.history_scrollbar.pack(side="right", fill="y")
+        self.commit_history.pack(side="left", fill="y")
+
+    def show_operations(self):
+        """Show the timings of recent git commands and API requests"""
+        if self.operations_window is not None and self.operations_window.exists():
+            self.operations_window.lift()
+        else:
+            self.operations_window = OperationsWindow(self.root)
+
+    def show_stalls(self):
+        """Show the code paths that blocked the UI the longest"""
+        if self.stall_window is not None and self.stall_window.exists():
+            self.stall_window.lift()
+        else:
+            self.stall_window = StallReportWindow(self.root, self.watchdog)
+
+    def show_dashboard(self):
+        """Show status, ahead/behind and last commit of every repo under a folder"""
+        if self.dashboard_window is not None and self.dashboard_window.exists():
+            self.dashboard_window.lift()
+        else:
+            current = self.new_directory.get()
+            self.dashboard_window = DashboardWindow(self.root, self.core, self.ui_bus, on_open=self.open_directory,
+                                                    root_dir=os.path.dirname(current) if current else "")
+
+    def show_diff(self):
+        """Show the selected file's changes against the index or HEAD"""
+        if self.diff_window is not None and self.diff_window.exists():
+            self.diff_window.lift()
+        else:
+            self.diff_window = DiffWindow(self.root, self.ui_bus, self.diff_source)
+
+    def diff_source(self):
+        if not self.selected_file or self.selected_file_kind is None:
+            return None
+        # Editable files are diffed as typed; large ones as saved on disk
+        text = self.text_editor.get("1.0", "end-1c") if self.selected_file_kind == 'text' else None
+        return self.new_directory.get(), self.selected_file, text
+
+    def refresh_diff(self):
+        if self.diff_window is not None and self.diff_window.exists():
+            self.diff_window.schedule()
+
+    def show_search(self):
+        """Search the contents of the open repository"""
+        if self.search_window is not None and self.search_window.exists():
+            self.search_window.lift()
+        else:
+            self.search_window = SearchWindow(self.root, self.ui_bus, self.new_directory.get,
+                                              on_open=self.open_search_match, dirty_paths=self.search_dirty_paths)
+
+    def search_dirty_paths(self):
+        model = self.status_model
+        if model is None or model.repo_path != self.new_directory.get() or self.status_scans:
+            # A scan in flight holds changes the model does not show yet
+            return None
+        return model.maybe_dirty_paths()
+
+    def open_search_match(self, path, line):
+        """Select ``path`` in the file list, load it and show ``line``"""
+        try:
+            index = self.file_list.items.index(path)
+        except ValueError:
+            messagebox.showerror("Error", f"{path} is not in the file list")
+            return
+        self.file_list.select(index)
+        self.load_file(None)
+        if self.selected_file_kind == 'text':
+            self.text_editor.tag_remove('search_match', "1.0", tk.END)
+            self.text_editor.tag_add('search_match', f"{line}.0", f"{line}.0 lineend")
+            self.text_editor.mark_set(tk.INSERT, f"{line}.0")
+            self.text_editor.see(f"{line}.0")
+            self.text_editor.focus_set()
+
+    def on_editor_modified(self, event):
+        # Tk only reports the first change until the flag is cleared again
+        self.text_editor.edit_modified(False)
+        self.refresh_diff()
 
     # New: Show Git commands in a new window
     def show_git_commands(self):
@@ -309,33 +490,108 @@ class RepoTinker:
             pass
 
     def update_commit_history(self):
-        self.commit_history.delete(0, tk.END)
         dir_path = self.new_directory.get()
         if not dir_path or not os.path.isdir(dir_path):
+            self.history_model = None
+            self.commit_history.delete(0, tk.END)
             self.commit_history.insert(tk.END, "No directory selected")
             return
 
-        try:
-            result = subprocess.run(
-                ['git', 'log', '--pretty=format:%h|%an|%ad|%s', '-n', '5'],
-                cwd=dir_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            commits = result.stdout.strip().split('\n')
-            if not commits or commits == ['']:
-                self.commit_history.insert(tk.END, "No commits found")
-                return
-
-            for commit in commits:
-                if commit:
-                    hash_val, author, date, message = commit.split('|', 3)
-                    message = (message[:20] + '...') if len(message) > 20 else message
-                    display = f"[{date}] {message} ({hash_val}) by {author}"
-                    self.commit_history.insert(tk.END, display)
-        except subprocess.CalledProcessError:
+        if self.history_model is None or self.history_model.repo_path != dir_path:
+            self.history_model = CommitHistory(dir_path)
+            self.history_rendered = 0
+            self.commit_history.delete(0, tk.END)
+            self.commit_history.insert(tk.END, "Loading...")
+        self.run_history_task('sync')
+
+    def run_history_task(self, task):
+        """Run a history sync or page load on a worker thread, one at a time"""
+        if self.history_loading:
+            if task == 'sync':
+                self.history_resync = True
+            return
+        model = self.history_model
+        self.history_loading = True
+
+        def worker():
+            error = None
+            changed = False
+            try:
+                if task == 'sync':
+                    changed = model.sync()
+                else:
+                    changed = model.load_more() > 0
+            except (subprocess.CalledProcessError, OSError) as e:
+                error = e
+            self.ui_bus.post(self.finish_history_task, model, error, changed)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def finish_history_task(self, model, error, changed):
+        self.history_loading = False
+        if model is not self.history_model:
+            # The directory changed while loading; start over for the new one
+            if self.history_model is not None:
+                self.run_history_task('sync')
+            return
+        self.render_commit_history(error)
+        if changed and error is None and self.metadata_cache is not None:
+            self.metadata_cache.save_history(model.repo_path, model.head_oid, model.pages)
+        if self.history_resync:
+            self.history_resync = False
+            self.run_history_task('sync')
+
+    def render_commit_history(self, error=None):
+        model = self.history_model
+        if error is not None:
+            self.commit_history.delete(0, tk.END)
             self.commit_history.insert(tk.END, "No history available")
+            self.history_rendered = 0
+            return
+        if not len(model.commits):
+            self.commit_history.delete(0, tk.END)
+            self.commit_history.insert(tk.END, "No commits found")
+            self.history_rendered = 0
+            self.history_rendered_head = model.head_oid
+            return
+
+        # Only append the newly loaded page unless HEAD moved
+        if model.head_oid != self.history_rendered_head or self.history_rendered == 0:
+            self.commit_history.delete(0, tk.END)
+            self.history_rendered = 0
+        rows = []
+        for hash_val, author, timestamp, message in model.commits.rows(self.history_rendered):
+            message = (message[:20] + '...') if len(message) > 20 else message
+            rows.append(f"[{format_timestamp(timestamp)}] {message} ({hash_val[:7]}) by {author}")
+        if rows:
+            self.commit_history.insert(tk.END, *rows)
+        self.history_rendered = len(model.commits)
+        self.history_rendered_head = model.head_oid
+
+    def on_history_scroll(self, first, last):
+        self.history_scrollbar.set(first, last)
+        model = self.history_model
+        if model is not None and not model.complete and float(last) >= 0.9:
+            self.run_history_task('more')
+
+    def snapshot_form(self):
+        """Copy the launch form fields into a plain dict usable from worker threads"""
+        return {
+            'repo_name': self.repo_name.get(),
+            'access_token': self.access_token.get(),
+            'new_directory': self.new_directory.get(),
+            'notes': self.notes_text_widget.get("1.0", tk.END).strip() if self.notes_text_widget else "None",
+            'description': self.description.get(),
+            'template': self.template.get(),
+            'private': self.is_private.get(),
+            'branch_name': self.branch_name.get(),
+            'ssh_key_path': self.ssh_key_path.get(),
+            'ssh_key_content': self.ssh_key_content.get(),
+            'remote_name': self.remote_name.get(),
+            'username': self.username.get(),
+            'email': self.email.get(),
+            'last_commit': self.last_commit.get(),
+        }
 
     def launch_repo(self):
         repo_name = self.repo_name.get()
@@ -345,122 +601,243 @@ class RepoTinker:
         if not repo_name or not access_token or not new_directory:
             messagebox.showerror("Error", "Repo Name, Access Token, and New Directory are required!")
             return
+        if self.launch_task and not self.launch_task.done():
+            messagebox.showinfo("Info", "A launch is already in progress!")
+            return
 
         self.username_val = self.username.get() or "unknown"
         self.access_token_val = access_token
 
-        headers = {'Authorization': f'token {access_token}', 'Accept': 'application/vnd.github.v3+json'}
-        data = {
-            'name': repo_name,
-            'description': self.description.get(),
-            'private': self.is_private.get()
-        }
+        # Tk variables must only be read on the main thread, so snapshot the
+        # form before handing the work to the background pipeline
+        form = self.snapshot_form()
+        pipeline = LaunchPipeline(
+            repo_name,
+            access_token,
+            new_directory,
+            description=form['description'],
+            private=form['private'],
+            template=form['template'],
+            details=lambda repo_data: self.build_repo_details(form, repo_data),
+            on_progress=lambda stage, state, seconds: self.ui_bus.post(self.show_launch_progress, stage, state, seconds)
+        )
+
+        self.launch_button.configure(state="disabled")
+        self.launch_progress.configure(value=0)
+        self.launch_status.set("Launching...")
+        self.cancel_launch_button.configure(state="normal")
+        self.launch_task = self.core.submit(
+            pipeline.run_async(self.core),
+            on_done=lambda repo_data, error: self.on_launch_finished(pipeline, repo_data, error)
+        )
 
+    def cancel_launch(self):
+        if self.launch_task is not None:
+            self.launch_task.cancel()
+
+    def on_launch_finished(self, pipeline, repo_data, error):
+        self.cancel_launch_button.configure(state="disabled")
+        if isinstance(error, asyncio.CancelledError):
+            self.launch_button.configure(state="normal")
+            self.last_launch_timings = dict(pipeline.timings)
+            self.launch_status.set("Launch cancelled")
+        elif error is not None:
+            self.on_launch_failed(pipeline, error)
+        else:
+            self.on_launch_done(pipeline, repo_data)
+
+    def show_launch_progress(self, stage, state, seconds):
+        if state == 'running':
+            self.launch_status.set(f"{stage}...")
+        elif state == 'done':
+            self.launch_progress.step(1)
+            self.launch_status.set(f"{stage} done ({seconds:.2f}s)")
+        else:
+            self.launch_status.set(f"{stage} failed after {seconds:.2f}s")
+
+    def format_timings(self, timings):
+        return "\n".join(f"{stage}: {seconds:.2f}s" for stage, seconds in timings.items())
+
+    def on_launch_done(self, pipeline, repo_data):
+        self.launch_button.configure(state="normal")
+        self.last_launch_timings = dict(pipeline.timings)
+        self.repo_owner = repo_data['owner']['login']
+        self.launch_status.set(f"Launched in {pipeline.timings['total']:.2f}s")
+        messagebox.showinfo("Success", f"Repo launched at {repo_data['html_url']}!\nDir: {pipeline.directory}\n\n"
+                                       f"Stage timings:\n{self.format_timings(pipeline.timings)}")
+        self.load_files()
+        self.update_commit_history()
+
+    def on_launch_failed(self, pipeline, error):
+        self.launch_button.configure(state="normal")
+        self.last_launch_timings = dict(pipeline.timings)
+        self.launch_status.set("Launch failed")
+        messagebox.showerror("Error", f"Failed to launch repo: {describe_error(error)}")
+
+    def bulk_launch(self):
+        """Launch every repository listed in a CSV/JSON/YAML manifest"""
+        access_token = self.access_token.get()
+        if not access_token:
+            messagebox.showerror("Error", "Access Token is required for bulk launch!")
+            return
+        manifest = filedialog.askopenfilename(
+            title="Select Repo Manifest",
+            filetypes=[("Manifests", "*.csv *.json *.yml *.yaml"), ("All files", "*.*")]
+        )
+        if not manifest:
+            return
         try:
-            os.makedirs(new_directory, exist_ok=True)
-            with open(os.path.join(new_directory, 'README.md'), 'w') as f:
-                f.write(f"# {repo_name}\nCreated by Repo-Rocket on {time.ctime()}.")
-
-            templates = {
-                'python': [
-                    ('README.md', f"# {repo_name}\nA Python project template by Repo-Rocket."),
-                    ('.gitignore', "__pycache__\n*.pyc\nvenv/")
-                ],
-                'nodejs': [
-                    ('README.md', f"# {repo_name}\nA Node.js project template by Repo-Rocket."),
-                    ('.gitignore', "node_modules/\n*.log")
-                ]
-            }
-            template = self.template.get()
-            if template in templates:
-                for filename, content in templates[template]:
-                    with open(os.path.join(new_directory, filename), 'w') as f:
-                        f.write(content)
-
-            subprocess.run(['git', 'init', '--initial-branch=main'], cwd=new_directory, check=True)
-            subprocess.run(['git', 'add', '.'], cwd=new_directory, check=True)
-            subprocess.run(['git', 'commit', '-m', 'Initial commit by RepoTinker'], cwd=new_directory, check=True)
-
-            response = requests.post('https://api.github.com/user/repos', headers=headers, json=data)
-            response.raise_for_status()
-            repo_data = response.json()
-
-            self.repo_owner = repo_data['owner']['login']
-            push_url = f"https://{self.access_token_val}@github.com/{self.repo_owner}/{repo_name}.git"
-            subprocess.run(['git', 'remote', 'add', 'origin', push_url], cwd=new_directory, check=True)
-
-            # Create <repo_name>_details.txt with detailed repo info
-            notes_content = self.notes_text_widget.get("1.0", tk.END).strip() if self.notes_text_widget else "None"
-            description = self.description.get() or "N/A"
-            branch_name = self.branch_name.get() or "main"
-            ssh_key_path = self.ssh_key_path.get() or "Not set"
-            ssh_key_content = self.ssh_key_content.get() or "Not set"
-            remote_name = self.remote_name.get() or "origin"
-            username = self.username.get() or "Not set"
-            email = self.email.get() or "Not set"
-            last_commit = self.last_commit.get() or "N/A"
-            github_url = repo_data['html_url']
-            clone_command = f"git clone {github_url}.git"
-            access_token_display = f"***HIDDEN*** (Original: {len(access_token)} chars)"
-
-            repo_details = (
-                f"RepoTinker - Repository Details:\n"
-                f"Name: {repo_name}\n"
-                f"URL: {github_url}\n"
-                f"Branch Name: {branch_name}\n"
-                f"Access Token: {access_token_display}\n"
-                f"Description: {description}\n"
-                f"Template: {template}\n"
-                f"Private: {self.is_private.get()}\n"
-                f"SSH Key Path: {ssh_key_path}\n"
-                f"SSH Key Content: {ssh_key_content}\n"
-                f"Clone Command: {clone_command}\n"
-                f"Remote Name: {remote_name}\n"
-                f"Username: {username}\n"
-                f"Email: {email}\n"
-                f"Last Commit Hash: {last_commit}\n"
-                f"Notes: {notes_content}\n"
-                f"GitHub Created URL: {github_url}\n"
-                f"Local Directory: {new_directory}\n"
-                f"Git Status: Your new directory is a Git repo, synced with GitHub—edit, commit, and push as needed!\n"
-            )
-            details_filename = f"{repo_name}_details.txt"
-            with open(os.path.join(new_directory, details_filename), 'w') as f:
-                f.write(repo_details)
-
-            # Add the new file to the Git commit and push
-            subprocess.run(['git', 'add', details_filename], cwd=new_directory, check=True)
-            subprocess.run(['git', 'commit', '-m', f'Add {details_filename} with creation details'], cwd=new_directory, check=True)
-            subprocess.run(['git', 'push', 'origin', 'main'], cwd=new_directory, check=True)
-            subprocess.run(['git', 'remote', 'set-url', 'origin', repo_data['clone_url']], cwd=new_directory, check=True)
-
-            messagebox.showinfo("Success", f"Repo launched at {repo_data['html_url']}!\nDir: {new_directory}")
-            self.load_files()
-            self.update_commit_history()
+            entries = load_manifest(manifest, base_dir=os.path.dirname(manifest))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to read manifest: {e}")
+            return
+        if not entries:
+            messagebox.showinfo("Info", "The manifest does not list any repositories!")
+            return
 
-        except (requests.RequestException, subprocess.CalledProcessError, OSError) as e:
-            error_msg = e.response.json().get('message', 'Unknown error') if isinstance(e, requests.RequestException) else str(e)
-            messagebox.showerror("Error", f"Failed to launch repo: {error_msg}")
+        self.username_val = self.username.get() or "unknown"
+        self.access_token_val = access_token
+        form = self.snapshot_form()
+
+        def details(entry, repo_data):
+            entry_form = dict(form, repo_name=entry['name'], description=entry['description'],
+                              template=entry['template'], private=entry['private'],
+                              new_directory=entry['directory'])
+            return self.build_repo_details(entry_form, repo_data)
+
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Bulk Launch")
+        report_window.geometry("600x400")
+        report_window.configure(bg="#000000")
+        report = tk.Text(report_window, bg="#333333", fg="#ffeb3b", insertbackground="white")
+        report.pack(fill="both", expand=True, padx=10, pady=10)
+        report.insert(tk.END, f"Launching {len(entries)} repositories from {manifest}...\n")
+
+        def show_result(result):
+            status = "OK  " if result['ok'] else "FAIL"
+            report.insert(tk.END, f"{status} {result['name']}: {result['url'] or result['error']}\n")
+            report.see(tk.END)
+
+        def show_summary(summary):
+            report.insert(tk.END, f"\nDone: {summary['succeeded']}/{summary['total']} succeeded in "
+                                  f"{summary['elapsed_seconds']:.1f}s ({summary['repos_per_second']:.2f} repos/s, "
+                                  f"{summary['throttled_seconds']:.0f}s rate-limited)\n")
+            report.see(tk.END)
+
+        launcher = BulkLauncher(
+            access_token,
+            entries,
+            parallelism=4,
+            details=details,
+            on_result=lambda result: self.ui_bus.post(show_result, result)
+        )
+        threading.Thread(
+            target=lambda: self.ui_bus.post(show_summary, launcher.run()),
+            daemon=True
+        ).start()
+
+    def build_repo_details(self, form, repo_data):
+        """Return the name and content of <repo_name>_details.txt"""
+        repo_name = form['repo_name']
+        notes_content = form['notes']
+        description = form['description'] or "N/A"
+        branch_name = form['branch_name'] or "main"
+        ssh_key_path = form['ssh_key_path'] or "Not set"
+        ssh_key_content = form['ssh_key_content'] or "Not set"
+        remote_name = form['remote_name'] or "origin"
+        username = form['username'] or "Not set"
+        email = form['email'] or "Not set"
+        last_commit = form['last_commit'] or "N/A"
+        github_url = repo_data['html_url']
+        clone_command = f"git clone {github_url}.git"
+        access_token_display = f"***HIDDEN*** (Original: {len(form['access_token'])} chars)"
+
+        repo_details = (
+            f"RepoTinker - Repository Details:\n"
+            f"Name: {repo_name}\n"
+            f"URL: {github_url}\n"
+            f"Branch Name: {branch_name}\n"
+            f"Access Token: {access_token_display}\n"
+            f"Description: {description}\n"
+            f"Template: {form['template']}\n"
+            f"Private: {form['private']}\n"
+            f"SSH Key Path: {ssh_key_path}\n"
+            f"SSH Key Content: {ssh_key_content}\n"
+            f"Clone Command: {clone_command}\n"
+            f"Remote Name: {remote_name}\n"
+            f"Username: {username}\n"
+            f"Email: {email}\n"
+            f"Last Commit Hash: {last_commit}\n"
+            f"Notes: {notes_content}\n"
+            f"GitHub Created URL: {github_url}\n"
+            f"Local Directory: {form['new_directory']}\n"
+            f"Git Status: Your new directory is a Git repo, synced with GitHub—edit, commit, and push as needed!\n"
+        )
+        return f"{repo_name}_details.txt", repo_details
 
     def browse_dir(self):
         dir_path = filedialog.askdirectory(initialdir=os.path.expanduser("~"), title="Select Repo Directory")
         if dir_path:
-            self.new_directory.set(dir_path)
-            self.load_files()
-            self.update_commit_history()
+            self.open_directory(dir_path)
+
+    def open_directory(self, dir_path):
+        self.new_directory.set(dir_path)
+        self.load_files()
+        self.update_commit_history()
 
     def load_files(self):
         dir_path = self.new_directory.get()
         if not dir_path or not os.path.isdir(dir_path):
             messagebox.showerror("Error", "Select a valid directory!")
             return
-        self.file_list.delete(0, tk.END)
-        for root, _, files in os.walk(dir_path):
-            for file in files:
-                if file != ".git":
-                    rel_path = os.path.relpath(os.path.join(root, file), dir_path)
-                    self.file_list.insert(tk.END, rel_path)
-        self.update_repo_status()
+        # Paint whatever the metadata cache still holds for this HEAD/index
+        # at once; git revalidates everything in the background
+        cached = self.metadata_cache.load(dir_path) if self.metadata_cache is not None else None
+        # Enumerate in the background and feed the virtual list batch by batch;
+        # a newer load_files call makes older listings stop early
+        self.file_listing_generation += 1
+        generation = self.file_listing_generation
+        replace = cached is not None and cached.files is not None
+        if replace:
+            self.file_list.set_items(cached.files)
+        else:
+            self.file_list.clear()
+        threading.Thread(target=self.list_files_thread, args=(dir_path, generation, replace), daemon=True).start()
+        if cached is not None and cached.status is not None:
+            self.restore_repo_status(dir_path, *cached.status)
+        else:
+            self.update_repo_status()
+        if cached is not None and cached.history is not None:
+            CommitHistory.seed(dir_path, *cached.history)
+
+    def list_files_thread(self, dir_path, generation, replace=False):
+        """List files; with ``replace`` the cached list on screen is swapped once at the end"""
+        files = []
+
+        def on_batch(batch):
+            files.extend(batch)
+            if not replace:
+                self.ui_bus.post(self.add_file_batch, generation, batch)
+
+        list_repo_files(
+            dir_path,
+            on_batch=on_batch,
+            should_stop=lambda: generation != self.file_listing_generation
+        )
+        if generation != self.file_listing_generation:
+            return
+        if replace:
+            self.ui_bus.post(self.replace_file_list, generation, files)
+        if self.metadata_cache is not None:
+            self.metadata_cache.save_files(dir_path, repo_fingerprint(dir_path), files)
+
+    def add_file_batch(self, generation, batch):
+        if generation == self.file_listing_generation:
+            self.file_list.extend(batch)
+
+    def replace_file_list(self, generation, files):
+        if generation == self.file_listing_generation and files != self.file_list.items:
+            self.file_list.replace_items(files)
 
     def load_file(self, event):
         selection = self.file_list.curselection()
@@ -469,24 +846,77 @@ class RepoTinker:
         file_name = self.file_list.get(selection[0])
         self.selected_file = os.path.join(self.new_directory.get(), file_name)
         try:
-            with open(self.selected_file, "r") as f:
-                content = f.read()
-            self.text_editor.delete("1.0", tk.END)
-            self.text_editor.insert("1.0", content)
+            kind, _ = classify_file(self.selected_file)
+            if kind == 'text':
+                with open(self.selected_file, "rb") as f:
+                    data = f.read()
+                try:
+                    content = data.decode("utf-8")
+                except UnicodeDecodeError:
+                    kind = 'binary'
+            if kind == 'text':
+                # Only an all-CRLF file is edited as LF and written back as
+                # CRLF; mixed endings are left as they are, \r and all
+                crlf = data.count(b"\r\n")
+                self.selected_file_newline = "\r\n" if crlf and crlf == data.count(b"\n") else "\n"
+                if self.selected_file_newline == "\r\n":
+                    content = content.replace("\r\n", "\n")
+                self.get_save_tracker().remember(self.selected_file, data)
+                self.show_text_editor()
+                self.text_editor.delete("1.0", tk.END)
+                self.text_editor.insert("1.0", content)
+            else:
+                self.text_editor.delete("1.0", tk.END)
+                self.large_file_view.open(self.selected_file, kind)
+                self.show_large_file_view()
+            self.selected_file_kind = kind
         except Exception as e:
+            # Whatever the editor shows now is not this file; never save it over it
+            self.selected_file = None
+            self.selected_file_kind = None
             messagebox.showerror("Error", f"Failed to load file: {e}")
+        self.refresh_diff()
+
+    def show_text_editor(self):
+        if self.large_file_view.winfo_manager():
+            self.large_file_view.close()
+            self.large_file_view.pack_forget()
+            self.text_editor.pack(fill="both", expand=True)
+
+    def show_large_file_view(self):
+        if not self.large_file_view.winfo_manager():
+            self.text_editor.pack_forget()
+            self.large_file_view.pack(fill="both", expand=True)
 
     def save_file(self):
         if not self.selected_file:
             messagebox.showerror("Error", "No file selected!")
             return
+        if self.selected_file_kind != 'text':
+            messagebox.showerror("Error", "This file is too large or not plain text; it is opened read-only.")
+            return
+        # "end-1c" drops the newline Tk always keeps after the last line
+        content = self.text_editor.get("1.0", "end-1c").replace("\n", self.selected_file_newline)
         try:
-            with open(self.selected_file, "w") as f:
-                f.write(self.text_editor.get("1.0", tk.END).strip())
-            messagebox.showinfo("Success", "File saved!")
-            self.update_repo_status()
+            result = self.get_save_tracker().save(self.selected_file, content.encode("utf-8"))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save file: {e}")
+            return
+        if not result.written:
+            messagebox.showinfo("Success", "No changes to save.")
+            return
+        messagebox.showinfo("Success", "File saved!")
+        model = self.status_model
+        if model is not None and model.repo_path == self.new_directory.get() and \
+                model.note_written(self.selected_file, result.matches_index):
+            return
+        self.update_repo_status([self.selected_file])
+
+    def get_save_tracker(self):
+        dir_path = self.new_directory.get()
+        if self.save_tracker is None or self.save_tracker.repo_path != dir_path:
+            self.save_tracker = SaveTracker(dir_path)
+        return self.save_tracker
 
     def commit_push(self):
         dir_path = self.new_directory.get()
@@ -496,49 +926,139 @@ class RepoTinker:
         if not self.access_token_val or not self.repo_owner:
             messagebox.showerror("Error", "Launch a repo first to set credentials!")
             return
+        if self.commit_task and not self.commit_task.done():
+            messagebox.showinfo("Info", "A commit & push is already in progress!")
+            return
 
-        try:
-            result = subprocess.run(['git', 'status', '--porcelain'], cwd=dir_path, capture_output=True, text=True, check=True)
-            if not result.stdout:
-                messagebox.showinfo("Info", "No changes to commit!")
-                return
-
-            repo_name = self.repo_name.get()
-            push_url = f"https://{self.access_token_val}@github.com/{self.repo_owner}/{repo_name}.git"
-            subprocess.run(['git', 'remote', 'set-url', 'origin', push_url], cwd=dir_path, check=True)
-            subprocess.run(['git', 'add', '.'], cwd=dir_path, check=True)
-            commit_msg = self.commit_message.get().strip()
-            if not commit_msg:
-                commit_msg = "Update via RepoTinker"
-            subprocess.run(['git', 'commit', '-m', commit_msg], cwd=dir_path, check=True)
-            subprocess.run(['git', 'push', 'origin', 'main'], cwd=dir_path, check=True)
-            clean_url = f"https://github.com/{self.repo_owner}/{repo_name}.git"
-            subprocess.run(['git', 'remote', 'set-url', 'origin', clean_url], cwd=dir_path, check=True)
+        commit_msg = self.commit_message.get().strip()
+        if not commit_msg:
+            commit_msg = "Update via RepoTinker"
+        self.commit_button.configure(state="disabled")
+        self.cancel_commit_button.configure(state="normal")
+        # The task scans the status itself (the model may have missed edits
+        # made outside the app) and pushes to the repository's own origin
+        self.commit_task = self.core.submit(
+            commit_and_push_async(self.core, dir_path, commit_msg, self.access_token_val),
+            on_done=lambda paths, error: self.on_commit_push_done(dir_path, paths, error)
+        )
 
+    def cancel_commit_push(self):
+        if self.commit_task is not None:
+            self.commit_task.cancel()
+
+    def on_commit_push_done(self, dir_path, paths, error):
+        self.commit_button.configure(state="normal")
+        self.cancel_commit_button.configure(state="disabled")
+        if isinstance(error, asyncio.CancelledError):
+            messagebox.showinfo("Info", "Commit & push cancelled.")
+        elif isinstance(error, NothingToCommit):
+            messagebox.showinfo("Info", "No changes to commit!")
+        elif isinstance(error, subprocess.CalledProcessError):
+            messagebox.showerror("Error", f"Git operation failed: {error.stderr}")
+        elif error is not None:
+            messagebox.showerror("Error", f"Git operation failed: {error}")
+        else:
             messagebox.showinfo("Success", "Changes committed and pushed to GitHub!")
-            self.update_repo_status()
+        if dir_path == self.new_directory.get():
+            # Even a cancelled or failed push may have staged or committed;
+            # without the staged paths, rescan everything
+            self.update_repo_status(paths)
             self.update_commit_history()
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("Error", f"Git operation failed: {e.stderr}")
+            self.refresh_diff()
 
-    def update_repo_status(self):
+    def update_repo_status(self, paths=None):
+        """Refresh the status model in the background; only ``paths`` are
+        re-checked when given"""
         dir_path = self.new_directory.get()
         if not dir_path or not os.path.isdir(dir_path):
             self.repo_status.set("Status: Not Loaded")
             self.status_label.configure(style="StatusError.TLabel")
             return
 
-        try:
-            result = subprocess.run(['git', 'status', '--porcelain'], cwd=dir_path, capture_output=True, text=True, check=True)
-            if result.stdout:
-                self.repo_status.set("Status: Changes Pending")
-                self.status_label.configure(style="StatusPending.TLabel")
-            else:
-                self.repo_status.set("Status: Clean")
-                self.status_label.configure(style="StatusClean.TLabel")
-        except subprocess.CalledProcessError:
-            self.repo_status.set("Status: Error (Not a Git Repo)")
+        model = self.open_status_model(dir_path)
+        self.run_status_scan(model, paths if paths and model.loaded else None)
+
+    def open_status_model(self, dir_path):
+        if self.status_model is None or self.status_model.repo_path != dir_path:
+            if self.status_model is not None:
+                self.status_model.stop_watching()
+            self.status_model = RepoStatus(dir_path)
+            self.status_model.start_watching()
+        return self.status_model
+
+    def restore_repo_status(self, dir_path, files, branch):
+        """Show a cached status at once and rescan it on a worker thread"""
+        model = self.open_status_model(dir_path)
+        model.restore(files, branch)
+        self.show_repo_status()
+        self.run_status_scan(model)
+
+    def run_status_scan(self, model, paths=None):
+        """Run git status (of ``paths`` only, if given) on a worker thread and
+        apply the result on the Tk thread"""
+        version = model.version
+        self.status_scans += 1
+
+        def worker():
+            try:
+                result = model.scan() if paths is None else model.scan_paths(paths)
+            except (subprocess.CalledProcessError, OSError):
+                result = None
+            # After the scan: git status may rewrite the index it refreshed
+            fingerprint = repo_fingerprint(model.repo_path)
+            self.ui_bus.post(self.apply_status_scan, model, version, paths, result, fingerprint)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def apply_status_scan(self, model, version, paths, result, fingerprint):
+        self.status_scans -= 1
+        if model is not self.status_model:
+            return  # another directory was opened meanwhile
+        if model.version != version:
+            # Updated while scanning (e.g. a save); this result may be older
+            self.run_status_scan(model, paths)
+            return
+        if result is None:
+            if paths is None:
+                model.error = "Not a Git Repo"
+                model.version += 1
+        elif paths is None:
+            model.apply(*result)
+        else:
+            model.apply_paths(*result)
+        if result is not None:
+            self.save_status_snapshot(fingerprint)
+        self.show_repo_status()
+
+    def save_status_snapshot(self, fingerprint=None):
+        model = self.status_model
+        if self.metadata_cache is None or model is None or not model.loaded or model.error:
+            return
+        if fingerprint is None:
+            fingerprint = repo_fingerprint(model.repo_path)
+        self.metadata_cache.save_status(model.repo_path, fingerprint, model.files, model.branch)
+
+    def show_repo_status(self):
+        model = self.status_model
+        self.repo_status.set(f"Status: {model.summary()}")
+        if model.error:
             self.status_label.configure(style="StatusError.TLabel")
+        elif model.clean:
+            self.status_label.configure(style="StatusClean.TLabel")
+        else:
+            self.status_label.configure(style="StatusPending.TLabel")
+
+    def poll_repo_status(self):
+        """Pick up changes made outside the app; git runs on a worker thread"""
+        model = self.status_model
+        # Skipped while a scan is in flight; its changes are collected next time
+        if model is not None and not self.status_scans:
+            change = model.poll()
+            if change == model.FULL:
+                self.run_status_scan(model)
+            elif change:
+                self.run_status_scan(model, change)
+        self.root.after(self.STATUS_POLL_MS, self.poll_repo_status)
 
     def clear_form(self):
         for var in [self.repo_name, self.access_token, self.repo_url, self.branch_name, self.description,
@@ -548,16 +1068,24 @@ class RepoTinker:
         self.template.set("empty")
         self.is_private.set(False)
         self.text_editor.delete("1.0", tk.END)
-        self.file_list.delete(0, tk.END)
+        self.show_text_editor()
+        self.file_listing_generation += 1
+        self.file_list.clear()
         self.selected_file = None
+        self.selected_file_kind = None
+        self.save_tracker = None
         self.username_val = None
         self.access_token_val = None
         self.repo_owner = None
+        if self.status_model is not None:
+            self.status_model.stop_watching()
+            self.status_model = None
         self.commit_message.set("Update via Repo-Rocket")
         self.repo_status.set("Status: Not Loaded")
         self.status_label.configure(style="StatusError.TLabel")
         if self.notes_text_widget:
             self.notes_text_widget.delete("1.0", tk.END)
+        self.history_model = None
         self.commit_history.delete(0, tk.END)
         self.commit_history.insert(tk.END, "No directory selected")
         messagebox.showinfo("Info", "Form and credentials cleared!")
@@ -566,3 +1094,4 @@ if __name__ == "__main__":
     root = tk.Tk()
     app = RepoTinker(root)
     root.mainloop()
+    app.core.shutdown()
@@ -0,0 +1,221 @@
+import os
+import subprocess
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from git_grep import GrepError, grep_repo, index_for
+from commit_history import find_toplevel
+from repo_status import RepoStatus
+
+
+class SearchWindow:
+    """Content search over the open repository, as you type.
+
+    ``repo_source()`` returns the repository directory (or "" when none is
+    open) and ``dirty_paths()`` every path that may differ from the index,
+    relative to the top of the tree (RepoStatus.maybe_dirty_paths()), or None
+    when unknown, in which case the search runs git status itself; both are
+    called on the Tk thread. Every keystroke cancels the running search
+    at once and starts a new one after DEBOUNCE_MS. Each search runs
+    ``git grep`` on its own thread and streams matches into the list in
+    batches through the UI bus, stopping after MAX_RESULTS.
+
+    While the window is open the repository's trigram index is (re)built in
+    the background. Once current, a literal query of three or more bytes
+    only greps the files the index names plus the dirty ones, unless that
+    is over MAX_INDEXED_PATHS files.
+    Double-click a match to open it.
+    """
+
+    DEBOUNCE_MS = 150
+    MAX_RESULTS = 1000
+    MAX_INDEXED_PATHS = 500
+
+    def __init__(self, master, ui_bus, repo_source, on_open=None, dirty_paths=None):
+        self.ui_bus = ui_bus
+        self.repo_source = repo_source
+        self.on_open = on_open
+        self.dirty_paths = dirty_paths
+        self._search = 0
+        self._after_id = None
+        self._matches = {}
+        self._files = set()
+
+        self.window = tk.Toplevel(master)
+        self.window.title("Search")
+        self.window.geometry("1000x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        controls = ttk.Frame(self.window, padding=5)
+        controls.pack(fill="x")
+        self.query = tk.StringVar()
+        self.ignore_case = tk.BooleanVar(value=True)
+        self.regex = tk.BooleanVar(value=False)
+        self.word = tk.BooleanVar(value=False)
+        entry = ttk.Entry(controls, textvariable=self.query, width=50)
+        entry.pack(side="left", fill="x", expand=True)
+        entry.focus_set()
+        for text, variable in (("Ignore case", self.ignore_case), ("Regex", self.regex),
+                               ("Whole word", self.word)):
+            ttk.Checkbutton(controls, text=text, variable=variable, command=self.schedule).pack(side="left", padx=5)
+        self.query.trace_add("write", lambda *args: self.schedule())
+
+        self.status = tk.StringVar(value="Type to search the working tree.")
+        ttk.Label(self.window, textvariable=self.status, padding=(5, 0)).pack(anchor="w")
+
+        frame = ttk.Frame(self.window)
+        frame.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(frame, columns=("line", "text"), selectmode="browse")
+        self.tree.heading("#0", text="File")
+        self.tree.heading("line", text="Line")
+        self.tree.heading("text", text="Text")
+        self.tree.column("#0", width=300)
+        self.tree.column("line", width=60, anchor="e", stretch=False)
+        self.tree.column("text", width=600)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<Double-1>", self.open_selected)
+        self.tree.bind("<Return>", self.open_selected)
+
+        repo_path = self.repo_source()
+        if repo_path and os.path.isdir(repo_path):
+            index_for(repo_path).start_build()
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def lift(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def close(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+        self._search += 1
+        self.window.destroy()
+
+    # Scheduling
+
+    def schedule(self):
+        """Cancel the running search; start a new one after DEBOUNCE_MS"""
+        self._search += 1
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+        self._after_id = self.window.after(self.DEBOUNCE_MS, self.search)
+
+    def search(self):
+        self._after_id = None
+        self._search += 1
+        search = self._search
+        self.tree.delete(*self.tree.get_children())
+        self._matches = {}
+        self._files = set()
+        query = self.query.get()
+        repo_path = self.repo_source()
+        if not query:
+            self.status.set("Type to search the working tree.")
+            return
+        if not repo_path or not os.path.isdir(repo_path):
+            self.status.set("Open a repository to search it.")
+            return
+        dirty = self.dirty_paths() if self.dirty_paths else None
+        self.status.set("Searching...")
+        threading.Thread(target=self._search_thread, name="search", daemon=True,
+                         args=(search, repo_path, query, not self.regex.get(), self.ignore_case.get(),
+                               self.word.get(), dirty)).start()
+
+    # Worker thread
+
+    def _search_thread(self, search, repo_path, query, fixed, ignore_case, word, dirty):
+        started = time.perf_counter()
+        paths = None
+        index = index_for(repo_path)
+        if fixed:
+            if index.current():
+                candidates = index.candidates(query, ignore_case)
+                if candidates is not None and dirty is not None:
+                    dirty = self._below(repo_path, find_toplevel(repo_path) or repo_path, dirty)
+                elif candidates is not None:
+                    # Without a watched status model only a scan is safe: a
+                    # file missing from the dirty list drops out of the results
+                    dirty = self._scan_dirty(repo_path)
+                if candidates is not None and dirty is not None:
+                    # Files changed since staging may match where their blobs did not
+                    paths = sorted(set(candidates).union(dirty))
+                    if len(paths) > self.MAX_INDEXED_PATHS:
+                        paths = None
+            else:
+                index.start_build()
+        try:
+            count, truncated = grep_repo(
+                repo_path, query,
+                on_batch=lambda batch: self.ui_bus.post(self._add_matches, search, batch),
+                fixed=fixed, ignore_case=ignore_case, word=word, paths=paths,
+                max_results=self.MAX_RESULTS,
+                should_stop=lambda: search != self._search
+            )
+        except GrepError as e:
+            self.ui_bus.post(self._show_status, search, f"Search failed: {e}")
+            return
+        if search != self._search:
+            return
+        self.ui_bus.post(self._finished, search, count, truncated, time.perf_counter() - started,
+                         paths is not None)
+
+    def _scan_dirty(self, repo_path):
+        status = RepoStatus(repo_path)
+        try:
+            files, _ = status.scan()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return self._below(repo_path, status.toplevel,
+                           [path for path, entry in files.items() if entry.kind != 'ignored'])
+
+    def _below(self, repo_path, toplevel, paths):
+        """Paths relative to the top of the tree, made relative to ``repo_path``
+        (where git grep runs); those outside it are dropped"""
+        below = []
+        for path in paths:
+            relative = os.path.relpath(os.path.join(toplevel, path), repo_path).replace(os.sep, '/')
+            if not relative.startswith('../'):
+                below.append(relative)
+        return below
+
+    # Tk thread
+
+    def _add_matches(self, search, batch):
+        if search != self._search or not self.exists():
+            return
+        for match in batch:
+            item = self.tree.insert("", tk.END, text=match.path, values=(match.line, match.text.strip()))
+            self._matches[item] = match
+            self._files.add(match.path)
+        self.status.set(f"Searching... {len(self._matches)} matches so far")
+
+    def _show_status(self, search, message):
+        if search == self._search and self.exists():
+            self.status.set(message)
+
+    def _finished(self, search, count, truncated, seconds, indexed):
+        if search != self._search or not self.exists():
+            return
+        if not count:
+            message = "No matches"
+        elif truncated:
+            message = f"First {count} matches in {len(self._files)} files shown"
+        else:
+            message = f"{count} matches in {len(self._files)} files"
+        self.status.set(f"{message} ({seconds:.2f} s{', indexed' if indexed else ''})")
+
+    def open_selected(self, event=None):
+        match = self._matches.get(self.tree.focus())
+        if match is not None and self.on_open:
+            self.on_open(match.path, match.line)
+        return "break"
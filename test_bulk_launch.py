@@ -0,0 +1,144 @@
+"""Bulk launch against a local fake GitHub API (python -m pytest test_bulk_launch.py)"""
+import json
+import subprocess
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from bulk_launch import BulkLauncher, load_manifest
+from github_api import RateLimiter, retry_after_seconds
+
+EXISTING = [f'existing-{index}' for index in range(150)]
+PER_PAGE = 100
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """Just enough of the GitHub REST API for BulkLauncher"""
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, value, headers=()):
+        data = json.dumps(value).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, header in headers:
+            self.send_header(name, header)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/user/repos':
+            return self.send_json(404, {'message': 'Not Found'})
+        self.server.calls.append(('GET', self.path))
+        page = int(parse_qs(url.query).get('page', ['1'])[0])
+        names = EXISTING[(page - 1) * PER_PAGE:page * PER_PAGE]
+        headers = []
+        if page * PER_PAGE < len(EXISTING):
+            base = f'http://127.0.0.1:{self.server.server_port}'
+            headers.append(('Link', f'<{base}/user/repos?per_page={PER_PAGE}&page={page + 1}>; rel="next"'))
+        self.send_json(200, [{'name': name} for name in names], headers)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        name = body['name']
+        self.server.calls.append(('POST', name))
+        if name == 'bad name':
+            return self.send_json(422, {'message': 'Repository creation failed.'})
+        if name == 'throttled' and self.server.calls.count(('POST', name)) == 1:
+            # Secondary rate limit, with the HTTP-date form of Retry-After
+            return self.send_json(403, {'message': 'You have exceeded a secondary rate limit.'},
+                                  [('Retry-After', formatdate(time.time() - 5, usegmt=True))])
+        remote = self.server.remotes / f'{name}.git'
+        subprocess.run(['git', 'init', '-q', '--bare', str(remote)], check=True)
+        self.send_json(201, {'name': name, 'full_name': f'me/{name}', 'clone_url': str(remote),
+                             'html_url': f'https://github.example/me/{name}'})
+
+    def do_DELETE(self):
+        self.server.calls.append(('DELETE', self.path))
+        self.send_response(204)
+        self.end_headers()
+
+
+@pytest.fixture
+def api(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGitHub)
+    server.calls = []
+    server.remotes = tmp_path / 'remotes'
+    server.remotes.mkdir()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def git_identity(monkeypatch, tmp_path):
+    monkeypatch.setenv('GIT_CONFIG_GLOBAL', str(tmp_path / 'gitconfig'))
+    for name in ('AUTHOR', 'COMMITTER'):
+        monkeypatch.setenv(f'GIT_{name}_NAME', 'Test')
+        monkeypatch.setenv(f'GIT_{name}_EMAIL', 'test@example.com')
+
+
+def write_manifest(tmp_path, rows):
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps(rows))
+    return str(path)
+
+
+def test_bulk_launch_against_fake_api(api, tmp_path):
+    manifest = write_manifest(tmp_path, [
+        {'name': 'alpha', 'template': 'python'},
+        {'name': 'throttled'},
+        {'name': 'bad name'},
+        {'name': 'Existing-120'},
+    ])
+    entries = load_manifest(manifest, base_dir=str(tmp_path / 'work'))
+    launcher = BulkLauncher('TOKEN', entries, parallelism=2,
+                            api_url=f'http://127.0.0.1:{api.server_port}',
+                            rate_limiter=RateLimiter(min_interval=0), skip_existing=True)
+    summary = launcher.run()
+
+    results = {result['name']: result for result in summary['results']}
+    assert (summary['succeeded'], summary['skipped'], summary['failed']) == (2, 1, 1)
+    assert results['alpha']['ok'] and results['throttled']['ok']
+    assert results['bad name']['error'] == 'Repository creation failed.'
+    assert results['Existing-120']['skipped']
+    # Both pages of the repository list were read, and nothing was created twice
+    assert [call for call in api.calls if call[0] == 'GET'] == [
+        ('GET', '/user/repos?per_page=100&affiliation=owner'),
+        ('GET', '/user/repos?per_page=100&page=2'),
+    ]
+    assert api.calls.count(('POST', 'throttled')) == 2
+    assert ('POST', 'Existing-120') not in api.calls
+    assert summary['throttle_events'] == 1
+
+    # Pushed to the remote, with the token never stored in the clone
+    log = subprocess.run(['git', 'log', '--oneline', 'main'], cwd=api.remotes / 'alpha.git',
+                         capture_output=True, text=True, check=True).stdout
+    assert 'Initial commit' in log
+    assert 'TOKEN' not in (tmp_path / 'work' / 'alpha' / '.git' / 'config').read_text()
+
+
+def test_retry_after_forms():
+    assert retry_after_seconds('7') == 7.0
+    assert 55 < retry_after_seconds(formatdate(time.time() + 60, usegmt=True)) <= 60
+    assert retry_after_seconds('soon') == 60.0
+
+
+@pytest.mark.parametrize('rows, message', [
+    (['alpha'], 'entry 1 is not an object'),
+    ({'repos': 'alpha'}, 'must be a list'),
+    ([{'description': 'no name'}], 'entry 1 has no name'),
+    ([{'name': 'x', 'template': 'rust'}], "unknown template 'rust'"),
+])
+def test_load_manifest_rejects_bad_rows(tmp_path, rows, message):
+    with pytest.raises(ValueError, match=message):
+        load_manifest(write_manifest(tmp_path, rows), base_dir=str(tmp_path))
@@ -0,0 +1,106 @@
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+from tracing import tracer
+
+
+class OperationsWindow:
+    """Recent git commands and HTTP requests, newest first.
+
+    Reads the shared tracer on a timer (only redrawing when something new was
+    recorded) and can export everything as a Chrome trace or as JSON lines.
+    """
+
+    COLUMNS = [
+        ('time', "Time", 70),
+        ('kind', "Kind", 45),
+        ('command', "Command", 320),
+        ('cwd', "Directory", 160),
+        ('wall', "Wall ms", 70),
+        ('cpu', "CPU ms", 70),
+        ('exit', "Exit", 45),
+        ('out', "Out bytes", 75),
+        ('err', "Err bytes", 75),
+    ]
+    REFRESH_MS = 1000
+
+    def __init__(self, master, limit=500):
+        self.limit = limit
+        self.shown_generation = None
+        self.window = tk.Toplevel(master)
+        self.window.title("Recent Operations")
+        self.window.geometry("980x400")
+
+        frame = ttk.Frame(self.window, padding=5)
+        frame.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(frame, columns=[name for name, _, _ in self.COLUMNS], show="headings")
+        for name, heading, width in self.COLUMNS:
+            self.tree.heading(name, text=heading)
+            anchor = "w" if name in ('command', 'cwd', 'kind') else "e"
+            self.tree.column(name, width=width, anchor=anchor, stretch=name in ('command', 'cwd'))
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        buttons = ttk.Frame(self.window, padding=5)
+        buttons.pack(fill="x")
+        ttk.Button(buttons, text="Export Chrome Trace...", command=self.export_chrome_trace).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Export JSON Lines...", command=self.export_json_lines).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Clear", command=tracer.clear).pack(side="left", padx=5)
+        self.summary = tk.StringVar()
+        ttk.Label(buttons, textvariable=self.summary).pack(side="right", padx=5)
+
+        self.refresh()
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def lift(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def refresh(self):
+        if not self.exists():
+            return
+        if tracer.generation != self.shown_generation:
+            self.shown_generation = tracer.generation
+            operations = tracer.operations()
+            self.tree.delete(*self.tree.get_children())
+            for operation in reversed(operations[-self.limit:]):
+                self.tree.insert("", tk.END, values=(
+                    time.strftime('%H:%M:%S', time.localtime(operation.started_at)),
+                    operation.kind,
+                    operation.command,
+                    operation.cwd or "",
+                    f"{operation.wall * 1000:.1f}",
+                    "" if operation.cpu is None else f"{operation.cpu * 1000:.1f}",
+                    operation.error or ("" if operation.returncode is None else operation.returncode),
+                    operation.bytes_out,
+                    operation.bytes_err,
+                ))
+            total = sum(operation.wall for operation in operations)
+            self.summary.set(f"{len(operations)} operations, {total:.2f}s total")
+        self.window.after(self.REFRESH_MS, self.refresh)
+
+    def export_chrome_trace(self):
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".json",
+                                            filetypes=[("Chrome trace", "*.json")])
+        if path:
+            self._export(tracer.export_chrome_trace, path)
+
+    def export_json_lines(self):
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".jsonl",
+                                            filetypes=[("JSON lines", "*.jsonl")])
+        if path:
+            self._export(tracer.export_json_lines, path)
+
+    def _export(self, export, path):
+        try:
+            export(path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export: {e}", parent=self.window)
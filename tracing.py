@@ -0,0 +1,188 @@
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows: no per-child CPU accounting
+    resource = None
+
+# Tokens embedded in https URLs (https://<token>@github.com/...) are never recorded
+_URL_CREDENTIALS = re.compile(r'(https?://)[^/@\s]+@')
+
+
+def _redact(value):
+    return _URL_CREDENTIALS.sub(r'\1***@', str(value))
+
+
+def _size(data):
+    return len(data) if data else 0
+
+
+def _children_cpu():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Operation:
+    """One recorded git command or HTTP request"""
+
+    __slots__ = ('kind', 'argv', 'cwd', 'started_at', 'start', 'wall', 'cpu',
+                 'returncode', 'bytes_out', 'bytes_err', 'thread', 'error')
+
+    def __init__(self, kind, argv, cwd):
+        self.kind = kind
+        self.argv = [_redact(arg) for arg in argv]
+        self.cwd = cwd
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.wall = None
+        self.cpu = None
+        self.returncode = None
+        self.bytes_out = 0
+        self.bytes_err = 0
+        self.thread = threading.current_thread().name
+        self.error = None
+
+    @property
+    def name(self):
+        """Short label: the git subcommand (after any -c options) or the HTTP method and URL"""
+        if self.kind == 'git':
+            args = iter(self.argv[1:])
+            for arg in args:
+                if arg in ('-c', '-C'):
+                    next(args, None)
+                elif not arg.startswith('-'):
+                    return f'git {arg}'
+            return 'git'
+        return ' '.join(self.argv[:2])
+
+    @property
+    def command(self):
+        return ' '.join(self.argv)
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'argv': self.argv,
+            'cwd': self.cwd,
+            'started_at': self.started_at,
+            'wall': self.wall,
+            'cpu': self.cpu,
+            'returncode': self.returncode,
+            'bytes_out': self.bytes_out,
+            'bytes_err': self.bytes_err,
+            'thread': self.thread,
+            'error': self.error,
+        }
+
+
+class Span:
+    """An operation in progress; ``finish()`` records it"""
+
+    def __init__(self, tracer, kind, argv, cwd):
+        self.tracer = tracer
+        self.operation = Operation(kind, argv, cwd)
+        # HTTP work happens in this thread, git work in a child process
+        self._cpu_start = time.thread_time() if kind == 'http' else _children_cpu()
+
+    def finish(self, returncode=None, bytes_out=0, bytes_err=0, error=None):
+        operation = self.operation
+        if operation.wall is not None:
+            return
+        operation.wall = time.perf_counter() - operation.start
+        if operation.kind == 'http':
+            operation.cpu = time.thread_time() - self._cpu_start
+        elif self._cpu_start is not None:
+            # Process-wide child CPU: approximate when commands overlap
+            operation.cpu = _children_cpu() - self._cpu_start
+        operation.returncode = returncode
+        operation.bytes_out = bytes_out
+        operation.bytes_err = bytes_err
+        operation.error = _redact(error) if error else None
+        self.tracer.record(operation)
+
+
+class Tracer:
+    """Records every git invocation and HTTP request made by the tools.
+
+    Finished operations go into a bounded ring buffer that the operations
+    window reads, and can be exported as a Chrome trace (``chrome://tracing``,
+    Perfetto) or as JSON lines.
+    """
+
+    def __init__(self, capacity=1000):
+        self._operations = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        # Bumped on every change so viewers can skip redundant redraws
+        self.generation = 0
+
+    def start(self, kind, argv, cwd=None):
+        return Span(self, kind, argv, cwd)
+
+    def record(self, operation):
+        with self._lock:
+            self._operations.append(operation)
+            self.generation += 1
+
+    def run(self, args, **kwargs):
+        """Drop-in replacement for ``subprocess.run`` that records the call"""
+        span = self.start('git' if args and args[0] == 'git' else 'process', args, kwargs.get('cwd'))
+        try:
+            result = subprocess.run(args, **kwargs)
+        except subprocess.CalledProcessError as e:
+            span.finish(e.returncode, _size(e.output), _size(e.stderr))
+            raise
+        except BaseException as e:
+            span.finish(error=e)
+            raise
+        span.finish(result.returncode, _size(result.stdout), _size(result.stderr))
+        return result
+
+    def operations(self):
+        with self._lock:
+            return list(self._operations)
+
+    def clear(self):
+        with self._lock:
+            self._operations.clear()
+            self.generation += 1
+
+    def export_json_lines(self, path):
+        with open(path, 'w') as f:
+            for operation in self.operations():
+                f.write(json.dumps(operation.as_dict()) + '\n')
+
+    def export_chrome_trace(self, path):
+        pid = os.getpid()
+        threads = {}
+        events = []
+        for operation in self.operations():
+            tid = threads.setdefault(operation.thread, len(threads) + 1)
+            args = operation.as_dict()
+            del args['name'], args['kind']
+            events.append({
+                'name': operation.name,
+                'cat': operation.kind,
+                'ph': 'X',
+                'ts': (operation.start - self._origin) * 1e6,
+                'dur': (operation.wall or 0) * 1e6,
+                'pid': pid,
+                'tid': tid,
+                'args': args,
+            })
+        for name, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+tracer = Tracer()
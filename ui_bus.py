@@ -0,0 +1,77 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+
+class UIBus:
+    """Thread-safe hand-off of UI updates from worker threads to Tk.
+
+    Workers call ``post()`` (or ``post_latest()``) and never touch Tk; not even
+    ``root.after`` is called off the main thread. The main thread drains the
+    queue every ``interval_ms`` and runs updates in order for at most
+    ``budget`` seconds per frame, leaving the rest for the next frame, so a
+    flood of background results costs a bounded slice of UI time.
+    ``post_latest()`` keeps only the newest update per key, so repeated status
+    or progress changes collapse into one redraw.
+    """
+
+    def __init__(self, root, interval_ms=16, budget=0.01):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.budget = budget
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._running = False
+        self.posted = 0
+        self.coalesced = 0
+        self.executed = 0
+
+    def post(self, callback, *args):
+        """Queue ``callback(*args)`` to run on the main thread; any thread"""
+        with self._lock:
+            self._pending[next(self._ids)] = (callback, args)
+            self.posted += 1
+
+    def post_latest(self, key, callback, *args):
+        """Like ``post()`` but replaces a still-pending update with the same key"""
+        with self._lock:
+            if self._pending.pop(('latest', key), None) is not None:
+                self.coalesced += 1
+            self._pending[('latest', key)] = (callback, args)
+            self.posted += 1
+
+    def start(self):
+        """Start draining; call from the Tk main thread"""
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        self._running = False
+
+    def drain(self):
+        """Run pending updates until the queue is empty or the budget is spent"""
+        deadline = time.perf_counter() + self.budget
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                _, (callback, args) = self._pending.popitem(last=False)
+            try:
+                callback(*args)
+            except Exception as e:
+                # One failing update must not stop the bus
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+            self.executed += 1
+            if time.perf_counter() >= deadline:
+                return
+
+    def _drain(self):
+        if not self._running:
+            return
+        # Scheduled first so updates keep flowing while a callback runs a
+        # nested event loop (e.g. a messagebox)
+        self.root.after(self.interval_ms, self._drain)
+        self.drain()
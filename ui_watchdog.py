@@ -0,0 +1,226 @@
+import logging
+import os
+import sys
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+logger = logging.getLogger(__name__)
+
+# Frames from these files are plumbing, not the code that blocked
+_TK_DIR = os.path.dirname(os.path.abspath(tk.__file__))
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {name}"
+
+
+def _callback_name(frame):
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def capture_stack(frame):
+    """Return ``(callback, frames)`` for a frame of the Tk main thread.
+
+    ``callback`` names the function Tk called into (the first frame below
+    tkinter's dispatch), ``frames`` lists the frames from there inwards.
+    """
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    stack.reverse()  # outermost first
+
+    # The callback is the first app frame called from tkinter (mainloop ->
+    # CallWrapper/after -> callback); deeper tkinter frames are kept since a
+    # huge Text.insert blocks just as well as app code
+    in_tk = [os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == _TK_DIR for frame in stack]
+    start = 0
+    for index in range(1, len(stack)):
+        if in_tk[index - 1] and not in_tk[index]:
+            start = index
+            break
+    frames = [frame for frame in stack[start:] if os.path.abspath(frame.f_code.co_filename) != _THIS_FILE]
+    if not frames:
+        return "(idle)", ()
+    return _callback_name(frames[0]), tuple(_frame_name(frame) for frame in frames)
+
+
+class Stall:
+    def __init__(self, started_at, duration, samples):
+        self.started_at = started_at
+        self.duration = duration
+        self.samples = samples      # [(callback, frames)]
+
+    @property
+    def callback(self):
+        return self.samples[0][0] if self.samples else "(unsampled)"
+
+    @property
+    def hot_path(self):
+        """The stack seen most often while stalled"""
+        if not self.samples:
+            return ()
+        counts = {}
+        for _, frames in self.samples:
+            counts[frames] = counts.get(frames, 0) + 1
+        return max(counts, key=counts.get)
+
+
+class UIWatchdog:
+    """Detects stalls of the Tk event loop and records what blocked it.
+
+    A heartbeat is scheduled with ``root.after`` every ``interval_ms``; how
+    late each beat fires is the loop's lag. A sampler thread watches the time
+    since the last beat and, once it exceeds ``threshold`` seconds, snapshots
+    the main thread's stack with ``sys._current_frames()`` every
+    ``sample_interval`` until the loop comes back. Each stall is logged with
+    the callback that was running, and ``report()`` ranks the code paths by
+    total time spent blocking.
+    """
+
+    HISTORY_SIZE = 200
+
+    def __init__(self, root, interval_ms=100, threshold=0.2, sample_interval=0.05):
+        self.root = root
+        self.interval = interval_ms / 1000
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.stalls = []
+        self.beats = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._main_ident = threading.get_ident()
+        self._lock = threading.Lock()
+        self._samples = []
+        self._expected = None
+        self._last_beat = None
+        self._running = False
+
+    def start(self):
+        """Start the heartbeat and sampler; call from the Tk main thread"""
+        if self._running:
+            return
+        self._running = True
+        self._main_ident = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._expected = self._last_beat + self.interval
+        self.root.after(int(self.interval * 1000), self._beat)
+        threading.Thread(target=self._sample_loop, name="ui-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._running = False
+
+    def reset(self):
+        with self._lock:
+            self.stalls = []
+        self.beats = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    def _beat(self):
+        if not self._running:
+            return
+        now = time.perf_counter()
+        lag = max(0.0, now - self._expected)
+        self.beats += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        with self._lock:
+            samples, self._samples = self._samples, []
+            if lag >= self.threshold:
+                stall = Stall(time.time() - lag, lag, samples)
+                self.stalls.append(stall)
+                del self.stalls[:-self.HISTORY_SIZE]
+            self._last_beat = now
+        if lag >= self.threshold:
+            logger.warning("UI stalled for %.0f ms in %s at %s", lag * 1000, stall.callback,
+                           " > ".join(stall.hot_path[-3:]) or "?")
+        self._expected = now + self.interval
+        self.root.after(int(self.interval * 1000), self._beat)
+
+    def _sample_loop(self):
+        while self._running:
+            time.sleep(self.sample_interval)
+            with self._lock:
+                overdue = time.perf_counter() - self._last_beat - self.interval
+            if overdue < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._main_ident)
+            if frame is None:
+                continue
+            sample = capture_stack(frame)
+            del frame
+            with self._lock:
+                self._samples.append(sample)
+
+    def report(self, limit=10):
+        """Worst blocking code paths, ranked by total stall time"""
+        with self._lock:
+            stalls = list(self.stalls)
+        paths = {}
+        for stall in stalls:
+            hot_path = stall.hot_path
+            key = (stall.callback, hot_path[-1] if hot_path else "?")
+            entry = paths.setdefault(key, {'count': 0, 'total': 0.0, 'max': 0.0, 'stack': hot_path})
+            entry['count'] += 1
+            entry['total'] += stall.duration
+            if stall.duration >= entry['max']:
+                entry['max'] = stall.duration
+                entry['stack'] = hot_path
+
+        average = self.total_lag / self.beats * 1000 if self.beats else 0.0
+        lines = [f"Heartbeats: {self.beats}, average lag {average:.1f} ms, max lag {self.max_lag * 1000:.0f} ms",
+                 f"Stalls over {self.threshold * 1000:.0f} ms: {len(stalls)}", ""]
+        ranked = sorted(paths.items(), key=lambda item: item[1]['total'], reverse=True)
+        for rank, ((callback, _), entry) in enumerate(ranked[:limit], 1):
+            lines.append(f"{rank}. {callback}: {entry['count']} stalls, {entry['total'] * 1000:.0f} ms total, "
+                         f"{entry['max'] * 1000:.0f} ms worst")
+            for frame in entry['stack']:
+                lines.append(f"       {frame}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+class StallReportWindow:
+    """Shows a watchdog's ranked stall report"""
+
+    def __init__(self, master, watchdog):
+        self.watchdog = watchdog
+        self.window = tk.Toplevel(master)
+        self.window.title("UI Stalls")
+        self.window.geometry("800x450")
+        self.text = tk.Text(self.window, wrap="none")
+        self.text.pack(fill="both", expand=True, padx=5, pady=5)
+        buttons = ttk.Frame(self.window, padding=5)
+        buttons.pack(fill="x")
+        ttk.Button(buttons, text="Refresh", command=self.refresh).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Reset", command=self.reset).pack(side="left", padx=5)
+        self.refresh()
+
+    def exists(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def lift(self):
+        self.window.deiconify()
+        self.window.lift()
+        self.refresh()
+
+    def refresh(self):
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", self.watchdog.report())
+        self.text.configure(state="disabled")
+
+    def reset(self):
+        self.watchdog.reset()
+        self.refresh()
@@ -0,0 +1,155 @@
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+
+class VirtualListbox(ttk.Frame):
+    """Listbox that only materializes the rows currently on screen.
+
+    Items live in a plain Python list; the inner ``tk.Listbox`` holds just the
+    visible window and is refilled on scroll, so adding 100k entries costs a
+    list extend instead of 100k Tk inserts. ``curselection()`` and ``get()``
+    work with absolute item indexes like their ``tk.Listbox`` counterparts,
+    and ``<<ListboxSelect>>`` is generated on this widget.
+    """
+
+    def __init__(self, master, height=5, **listbox_options):
+        super().__init__(master)
+        self.items = []
+        self.top = 0
+        self.rows = height
+        self.selected = None
+
+        self.listbox = tk.Listbox(self, height=height, exportselection=False, **listbox_options)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<Configure>", self._on_configure)
+        self.listbox.bind("<MouseWheel>", self._on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(3))
+        self.listbox.bind("<Up>", lambda e: self._move_selection(-1))
+        self.listbox.bind("<Down>", lambda e: self._move_selection(1))
+        self.listbox.bind("<Prior>", lambda e: self._move_selection(-self.rows))
+        self.listbox.bind("<Next>", lambda e: self._move_selection(self.rows))
+
+    def size(self):
+        return len(self.items)
+
+    def get(self, index):
+        return self.items[index]
+
+    def curselection(self):
+        return () if self.selected is None else (self.selected,)
+
+    def clear(self):
+        self.items = []
+        self.top = 0
+        self.selected = None
+        self._render()
+
+    def set_items(self, items):
+        self.items = list(items)
+        self.top = 0
+        self.selected = None
+        self._render()
+
+    def replace_items(self, items):
+        """Swap in a new list, keeping the scroll position and the selected item"""
+        selected = None if self.selected is None else self.items[self.selected]
+        self.items = list(items)
+        self.selected = None
+        if selected is not None:
+            try:
+                self.selected = self.items.index(selected)
+            except ValueError:
+                pass
+        self.top = max(0, min(self.top, len(self.items) - self.rows))
+        self._render()
+
+    def extend(self, items):
+        """Append items; only redraws if the new rows could be on screen"""
+        visible_end = self.top + self.rows
+        was_visible = len(self.items) < visible_end
+        self.items.extend(items)
+        if was_visible:
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def select(self, index):
+        """Select and scroll to ``index`` without generating <<ListboxSelect>>"""
+        self.selected = index
+        self.see(index)
+
+    def see(self, index):
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.rows:
+            self.top = index - self.rows + 1
+        self._render()
+
+    def scroll(self, delta):
+        self._set_top(self.top + delta)
+        return "break"
+
+    def _set_top(self, top):
+        top = max(0, min(top, len(self.items) - self.rows))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _render(self):
+        self.listbox.delete(0, tk.END)
+        window = self.items[self.top:self.top + self.rows]
+        if window:
+            self.listbox.insert(tk.END, *window)
+        if self.selected is not None and self.top <= self.selected < self.top + self.rows:
+            self.listbox.selection_set(self.selected - self.top)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.items)
+        if total <= self.rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.rows) / total)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._set_top(int(float(amount) * len(self.items)))
+        elif action == "scroll":
+            step = self.rows if unit == "pages" else 1
+            self._set_top(self.top + int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small deltas
+        if abs(event.delta) >= 120:
+            return self.scroll(-3 * (event.delta // 120))
+        return self.scroll(-1 if event.delta > 0 else 1)
+
+    def _on_configure(self, event):
+        linespace = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace")
+        rows = max(1, event.height // (linespace + 1))
+        if rows != self.rows:
+            self.rows = rows
+            self._set_top(self.top)
+            self._render()
+
+    def _on_select(self, event):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        self.selected = self.top + selection[0]
+        self.event_generate("<<ListboxSelect>>")
+
+    def _move_selection(self, delta):
+        if not self.items:
+            return "break"
+        current = self.top if self.selected is None else self.selected
+        self.selected = max(0, min(current + delta, len(self.items) - 1))
+        self.see(self.selected)
+        self.event_generate("<<ListboxSelect>>")
+        return "break"